@@ -0,0 +1,61 @@
+import axios from 'axios';
+
+const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:8001';
+const ML_EVENTS_ENABLED = process.env.ML_EVENTS_ENABLED !== 'false';
+
+/**
+ * Push an activity event to the ML service's online feature store.
+ * Fire-and-forget: never delays or fails the request that caused it; the
+ * ML service periodically reconciles with the database to cover lost events.
+ */
+export function publishMLEvent(event) {
+  if (!ML_EVENTS_ENABLED) {
+    return;
+  }
+  axios.post(`${ML_SERVICE_URL}/ml/events`, event, { timeout: 2000 })
+    .catch((error) => {
+      console.warn('⚠️ ML event not delivered:', { type: event.type, error: error.message });
+    });
+}
+
+export function sessionEvent(row) {
+  return {
+    type: 'session',
+    user_id: row.user_id,
+    id: row.id,
+    session_type: row.session_type,
+    duration: row.duration,
+    completed_at: row.completed_at
+  };
+}
+
+export function taskEvent(row) {
+  return {
+    type: 'task',
+    user_id: row.user_id,
+    id: row.id,
+    status: row.status,
+    priority: row.priority,
+    created_at: row.created_at,
+    updated_at: row.updated_at
+  };
+}
+
+export function moodEvent(row) {
+  return {
+    type: 'mood',
+    user_id: row.user_id,
+    id: row.id,
+    mood: row.mood,
+    created_at: row.created_at
+  };
+}
+
+export function gamificationEvent(row) {
+  return {
+    type: 'gamification',
+    user_id: row.user_id,
+    streak: row.streak,
+    level: row.level
+  };
+}
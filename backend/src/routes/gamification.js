@@ -1,6 +1,7 @@
 import express from 'express';
 import pool from '../config/database.js';
 import { authenticate } from '../middleware/auth.js';
+import { publishMLEvent, gamificationEvent } from '../mlEvents.js';
 
 const router = express.Router();
 
@@ -73,6 +74,9 @@ router.put('/profile', authenticate, async (req, res) => {
     const query = `UPDATE user_gamification SET ${updates.join(', ')}, updated_at = CURRENT_TIMESTAMP WHERE user_id = $${paramCount} RETURNING *`;
 
     const result = await pool.query(query, values);
+    if (result.rows[0]) {
+      publishMLEvent(gamificationEvent(result.rows[0]));
+    }
     res.json(result.rows[0]);
   } catch (error) {
     console.error('Update profile error:', error);
@@ -99,6 +103,9 @@ router.post('/award-points', authenticate, async (req, res) => {
       [points, req.userId]
     );
 
+    if (result.rows[0]) {
+      publishMLEvent(gamificationEvent(result.rows[0]));
+    }
     res.json(result.rows[0]);
   } catch (error) {
     console.error('Award points error:', error);
@@ -239,5 +239,37 @@ router.post('/mood-suggestions', authenticate, async (req, res) => {
     }
 });
 
+/**
+ * Get pomodoro, distraction, coach and (with a mood) mood suggestions in one call
+ */
+router.post('/insights', authenticate, async (req, res) => {
+    try {
+        const { task_priority = 'medium', session_duration = 25, mood, note, context } = req.body;
+        const userId = req.userId;
+
+        const response = await axios.post(`${ML_SERVICE_URL}/ml/insights`, {
+            user_id: userId,
+            task_priority,
+            session_duration,
+            mood: mood || null,
+            note: note || null,
+            context: context || {}
+        }, {
+            timeout: 10000
+        });
+
+        res.json({
+            success: true,
+            data: response.data
+        });
+    } catch (error) {
+        console.error('Insights service error:', error.message);
+        res.status(503).json({
+            success: false,
+            error: 'ML service unavailable'
+        });
+    }
+});
+
 export default router;
 
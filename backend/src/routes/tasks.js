@@ -1,6 +1,7 @@
 import express from 'express';
 import pool from '../config/database.js';
 import { authenticate } from '../middleware/auth.js';
+import { publishMLEvent, taskEvent } from '../mlEvents.js';
 
 const router = express.Router();
 
@@ -49,6 +50,7 @@ router.post('/', authenticate, async (req, res) => {
       userId: result.rows[0].user_id
     });
 
+    publishMLEvent(taskEvent(result.rows[0]));
     res.status(201).json(result.rows[0]);
   } catch (error) {
     console.error('❌ Create task error:', error);
@@ -104,6 +106,7 @@ router.put('/:id', authenticate, async (req, res) => {
       updated_at: result.rows[0].updated_at
     });
 
+    publishMLEvent(taskEvent(result.rows[0]));
     res.json(result.rows[0]);
   } catch (error) {
     console.error('❌ Update task error:', error);
@@ -133,6 +136,7 @@ router.delete('/:id', authenticate, async (req, res) => {
       return res.status(404).json({ message: 'Task not found' });
     }
 
+    publishMLEvent({ type: 'task_deleted', user_id: req.userId, id: result.rows[0].id });
     res.json({ message: 'Task deleted successfully' });
   } catch (error) {
     console.error('Delete task error:', error);
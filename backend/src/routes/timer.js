@@ -1,6 +1,7 @@
 import express from 'express';
 import pool from '../config/database.js';
 import { authenticate } from '../middleware/auth.js';
+import { publishMLEvent, sessionEvent } from '../mlEvents.js';
 
 const router = express.Router();
 
@@ -30,6 +31,7 @@ router.post('/sessions', authenticate, async (req, res) => {
       completed_at: result.rows[0].completed_at
     });
 
+    publishMLEvent(sessionEvent(result.rows[0]));
     res.status(201).json(result.rows[0]);
   } catch (error) {
     console.error('❌ Save session error:', error);
@@ -14,7 +14,15 @@ from loguru import logger
 import uvicorn
 
 from config.config import settings
-from app.routers import pomodoro, sentiment, coach, distraction
+from utils.db_pool import close_pool
+from utils.async_data_loader import close_async_data_loader
+from utils.feature_cache import get_feature_cache, start_invalidation_listener, stop_invalidation_listener
+from utils.activity_store import get_activity_store, start_activity_store, stop_activity_store
+from utils.active_users import get_active_user_set, start_active_user_set, stop_active_user_set
+from utils.online_features import get_online_feature_store, start_online_feature_store, stop_online_feature_store
+from utils.query_stats import query_stats
+from utils.single_flight import async_feature_flights, feature_flights
+from app.routers import pomodoro, sentiment, coach, distraction, events, insights
 
 # Configure logging
 logger.remove()
@@ -44,6 +52,25 @@ app.include_router(pomodoro.router, prefix="/ml", tags=["Pomodoro"])
 app.include_router(sentiment.router, prefix="/ml", tags=["Sentiment"])
 app.include_router(coach.router, prefix="/ml", tags=["Coach"])
 app.include_router(distraction.router, prefix="/ml", tags=["Distraction"])
+app.include_router(events.router, prefix="/ml", tags=["Events"])
+app.include_router(insights.router, prefix="/ml", tags=["Insights"])
+
+@app.on_event("startup")
+async def startup():
+    # Before the listener, which feeds it activity notifications
+    start_active_user_set()
+    start_invalidation_listener()
+    start_activity_store()
+    start_online_feature_store()
+
+@app.on_event("shutdown")
+async def shutdown():
+    stop_invalidation_listener()
+    stop_activity_store()
+    stop_online_feature_store()
+    stop_active_user_set()
+    await close_async_data_loader()
+    close_pool()
 
 @app.get("/")
 async def root():
@@ -55,17 +82,36 @@ async def root():
             "pomodoro": "/ml/recommend-pomodoro",
             "sentiment": "/ml/sentiment",
             "coach": "/ml/coach",
-            "distraction": "/ml/distraction-predict"
+            "distraction": "/ml/distraction-predict",
+            "events": "/ml/events",
+            "insights": "/ml/insights"
         }
     }
 
 @app.get("/health")
 async def health():
+    feature_cache = get_feature_cache()
+    activity_store = get_activity_store()
+    active_users = get_active_user_set()
+    online_features = get_online_feature_store()
     return {
         "status": "healthy",
-        "service": "ml-service"
+        "service": "ml-service",
+        "feature_cache": feature_cache.stats() if feature_cache is not None else None,
+        "activity_store": activity_store.stats() if activity_store is not None else None,
+        "active_users": active_users.stats() if active_users is not None else None,
+        "online_features": online_features.stats() if online_features is not None else None,
+        "single_flight": {
+            "sync": feature_flights.stats(),
+            "async": async_feature_flights.stats()
+        }
     }
 
+@app.get("/health/queries")
+async def query_health():
+    """Per-query latency histograms, row counts and bytes fetched by DataLoader"""
+    return query_stats.snapshot()
+
 if __name__ == "__main__":
     uvicorn.run(
         app,
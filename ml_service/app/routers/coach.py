@@ -6,12 +6,15 @@ ml_service_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspat
 if ml_service_root not in sys.path:
     sys.path.insert(0, ml_service_root)
 
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Optional, Dict
 from loguru import logger
 
 from inference.coach_service import CoachService
+from utils.async_data_loader import get_async_data_loader
 
 router = APIRouter()
 
@@ -46,7 +49,16 @@ async def get_coaching(request: CoachRequest):
         logger.info(f"Coaching requested for user {request.user_id}")
         
         coach_service = get_coach()
-        result = coach_service.get_coaching(request.user_id, request.context)
+        data_loader = get_async_data_loader()
+        user_features, recent_notes = await asyncio.gather(
+            data_loader.get_user_features(request.user_id),
+            data_loader.get_recent_notes(request.user_id, days=1, limit=3),
+        )
+        # LLM calls are blocking HTTP requests - keep them off the event loop
+        result = await run_in_threadpool(
+            coach_service.get_coaching, request.user_id, request.context,
+            user_features=user_features, recent_notes=recent_notes
+        )
         
         return CoachResponse(
             message=result["message"],
@@ -7,10 +7,12 @@ if ml_service_root not in sys.path:
     sys.path.insert(0, ml_service_root)
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from loguru import logger
 
 from inference.distraction_predictor import DistractionPredictor
+from utils.async_data_loader import get_async_data_loader
 
 router = APIRouter()
 
@@ -45,7 +47,10 @@ async def predict_distraction(request: DistractionRequest):
         logger.info(f"Distraction prediction requested for user {request.user_id}")
         
         predictor = get_predictor()
-        result = predictor.predict(request.user_id, request.session_duration)
+        user_features = await get_async_data_loader().get_user_features(request.user_id)
+        result = await run_in_threadpool(
+            predictor.predict, request.user_id, request.session_duration, user_features=user_features
+        )
         
         return DistractionResponse(
             distraction_probability=result["distraction_probability"],
@@ -0,0 +1,80 @@
+import os
+import sys
+
+# Add ml_service root to path
+ml_service_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ml_service_root not in sys.path:
+    sys.path.insert(0, ml_service_root)
+
+from datetime import datetime
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
+from loguru import logger
+
+from utils.online_features import get_online_feature_store
+
+router = APIRouter()
+
+class ActivityEvent(BaseModel):
+    type: Literal['session', 'task', 'task_deleted', 'mood', 'mood_deleted', 'gamification'] = Field(
+        ..., description="What changed", example="session")
+    user_id: int = Field(..., description="User ID", example=1)
+    id: Optional[int] = Field(None, description="Row id of the session, task or mood log", example=42)
+    session_type: Optional[str] = Field(None, description="Session type (session events)", example="work")
+    duration: Optional[int] = Field(None, description="Session duration in seconds (session events)", example=1500)
+    completed_at: Optional[datetime] = Field(None, description="When the session completed (session events)")
+    status: Optional[str] = Field(None, description="Task status (task events)", example="completed")
+    priority: Optional[str] = Field(None, description="Task priority (task events)", example="high")
+    created_at: Optional[datetime] = Field(None, description="When the task or mood log was created")
+    updated_at: Optional[datetime] = Field(None, description="When the task was last updated (task events)")
+    mood: Optional[str] = Field(None, description="Mood value (mood events)", example="happy")
+    streak: Optional[int] = Field(None, description="Current streak (gamification events)", example=3)
+    level: Optional[int] = Field(None, description="Current level (gamification events)", example=2)
+
+class EventBatch(BaseModel):
+    events: List[ActivityEvent] = Field(..., description="Events in the order they happened")
+
+class EventsResponse(BaseModel):
+    accepted: int = Field(..., description="Events applied to the online feature store", example=1)
+    rejected: int = Field(0, description="Malformed events that were skipped", example=0)
+
+def _to_store_event(event: ActivityEvent) -> dict:
+    """Drop unset fields; timestamps become naive local time like the database rows"""
+    data = event.model_dump(exclude_none=True)
+    for name in ('completed_at', 'created_at', 'updated_at'):
+        value = data.get(name)
+        if value is not None and value.tzinfo is not None:
+            data[name] = value.astimezone().replace(tzinfo=None)
+    return data
+
+@router.post("/events", response_model=EventsResponse)
+async def ingest_events(request: Union[EventBatch, ActivityEvent]):
+    """
+    Ingest activity events from the backend
+    
+    Accepts a single event or `{"events": [...]}`. Each event updates the
+    user's running aggregates in the online feature store.
+    """
+    store = get_online_feature_store()
+    if store is None:
+        # Not an error: the backend may post events before the store is enabled
+        return EventsResponse(accepted=0, rejected=0)
+    
+    events = request.events if isinstance(request, EventBatch) else [request]
+    accepted = sum(store.apply_event(_to_store_event(event)) for event in events)
+    return EventsResponse(accepted=accepted, rejected=len(events) - accepted)
+
+@router.post("/events/reconcile")
+async def reconcile_events():
+    """Rebuild the online feature store from PostgreSQL now"""
+    store = get_online_feature_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Online feature store is disabled")
+    try:
+        await run_in_threadpool(store.reconcile)
+        return store.stats()
+    except Exception as e:
+        logger.error(f"Error reconciling online features: {e}")
+        raise HTTPException(status_code=500, detail=f"Error reconciling online features: {str(e)}")
@@ -0,0 +1,147 @@
+import os
+import sys
+
+# Add ml_service root to path
+ml_service_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ml_service_root not in sys.path:
+    sys.path.insert(0, ml_service_root)
+
+import asyncio
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from loguru import logger
+
+from app.routers.pomodoro import PomodoroResponse, get_recommender
+from app.routers.distraction import DistractionResponse, get_predictor
+from app.routers.coach import CoachResponse, get_coach
+from app.routers.sentiment import (
+    MoodSuggestionsResponse, SentimentResponse, get_analyzer, get_mood_suggestions_service
+)
+from utils.async_data_loader import get_async_data_loader
+
+router = APIRouter()
+
+class InsightsRequest(BaseModel):
+    user_id: int = Field(..., description="User ID", example=1)
+    task_priority: Optional[str] = Field("medium", description="Task priority: low, medium, high", example="high")
+    session_duration: int = Field(25, description="Planned session duration in minutes", example=25)
+    mood: Optional[str] = Field(None, description="Current mood, for mood suggestions", example="tired")
+    note: Optional[str] = Field(None, description="Mood note, for sentiment and mood suggestions", example="Long day, hard to focus")
+    context: Optional[Dict] = Field(None, description="Coach context including user_message", example={"current_task": "Write report"})
+
+class InsightsResponse(BaseModel):
+    user_id: int = Field(..., description="User ID", example=1)
+    pomodoro: Optional[PomodoroResponse] = Field(None, description="Same as /ml/recommend-pomodoro")
+    distraction: Optional[DistractionResponse] = Field(None, description="Same as /ml/distraction-predict")
+    coach: Optional[CoachResponse] = Field(None, description="Same as /ml/coach")
+    sentiment: Optional[SentimentResponse] = Field(None, description="Sentiment of the note, if one was given")
+    mood_suggestions: Optional[MoodSuggestionsResponse] = Field(None, description="Same as /ml/mood-suggestions, if a mood was given")
+    timings_ms: Dict[str, float] = Field(..., description="Wall time of each part in milliseconds")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Parts that failed, with the error")
+
+async def _timed(name: str, timings: Dict[str, float], fn, *args, **kwargs):
+    """Run a blocking call in the threadpool and record its wall time"""
+    start = time.perf_counter()
+    try:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+def _response(model, result: Optional[Dict]):
+    """The part's response model, built from the service result's matching keys"""
+    if result is None:
+        return None
+    return model(**{name: result[name] for name in model.model_fields})
+
+async def _part(name: str, timings: Dict[str, float], errors: Dict[str, str], model, fn, *args, **kwargs):
+    """
+    Run one part and build its response model, returning (result, model)
+    
+    A failure, including a result that doesn't fit the model, is reported
+    in errors[name] and gives (None, None), so the other parts are still
+    returned.
+    """
+    try:
+        result = await _timed(name, timings, fn, *args, **kwargs)
+        return result, _response(model, result)
+    except Exception as e:
+        logger.error(f"Error in insights part {name}: {e}")
+        errors[name] = str(e)
+        return None, None
+
+@router.post("/insights", response_model=InsightsResponse)
+async def get_insights(request: InsightsRequest):
+    """
+    Get every per-user ML result in one call
+    
+    - **user_id**: User ID
+    - **task_priority**: Priority of the current task (pomodoro recommendation)
+    - **session_duration**: Planned session duration in minutes (distraction prediction)
+    - **mood** / **note**: Optional current mood and note (sentiment and mood suggestions)
+    - **context**: Optional coach context
+    
+    Features (and recent mood notes/history) are fetched once, then the
+    models run concurrently. A failing part is reported in `errors` and
+    the others are still returned.
+    """
+    try:
+        logger.info(f"Insights requested for user {request.user_id}")
+        
+        timings: Dict[str, float] = {}
+        data_loader = get_async_data_loader()
+        start = time.perf_counter()
+        user_features, recent_notes, mood_history = await asyncio.gather(
+            data_loader.get_user_features(request.user_id),
+            data_loader.get_recent_notes(request.user_id, days=1, limit=3),
+            data_loader.get_recent_moods(request.user_id, days=7, limit=5) if request.mood else asyncio.sleep(0, result=[]),
+        )
+        timings["features"] = round((time.perf_counter() - start) * 1000, 2)
+        
+        errors: Dict[str, str] = {}
+        
+        async def mood_parts():
+            # The sentiment is reused by mood suggestions rather than computed twice
+            sentiment_result, sentiment = None, None
+            if request.note:
+                sentiment_result, sentiment = await _part(
+                    "sentiment", timings, errors, SentimentResponse, get_analyzer().analyze, request.note
+                )
+            suggestions = None
+            if request.mood:
+                _, suggestions = await _part(
+                    "mood_suggestions", timings, errors, MoodSuggestionsResponse,
+                    get_mood_suggestions_service().get_mood_suggestions,
+                    user_id=request.user_id, mood=request.mood, note=request.note or "",
+                    user_features=user_features, mood_history=mood_history, sentiment=sentiment_result
+                )
+            return sentiment, suggestions
+        
+        start = time.perf_counter()
+        (_, pomodoro), (_, distraction), (_, coach), (sentiment, mood_suggestions) = await asyncio.gather(
+            _part("pomodoro", timings, errors, PomodoroResponse, get_recommender().recommend,
+                  request.user_id, request.task_priority, user_features=user_features),
+            _part("distraction", timings, errors, DistractionResponse, get_predictor().predict,
+                  request.user_id, request.session_duration, user_features=user_features),
+            _part("coach", timings, errors, CoachResponse, get_coach().get_coaching,
+                  request.user_id, request.context, user_features=user_features, recent_notes=recent_notes),
+            mood_parts(),
+        )
+        timings["total"] = round(timings["features"] + (time.perf_counter() - start) * 1000, 2)
+        
+        return InsightsResponse(
+            user_id=request.user_id,
+            pomodoro=pomodoro,
+            distraction=distraction,
+            coach=coach,
+            sentiment=sentiment,
+            mood_suggestions=mood_suggestions,
+            timings_ms=timings,
+            errors=errors
+        )
+    
+    except Exception as e:
+        logger.error(f"Error in insights: {e}")
+        raise HTTPException(status_code=500, detail=f"Error generating insights: {str(e)}")
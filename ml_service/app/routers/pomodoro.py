@@ -7,11 +7,13 @@ if ml_service_root not in sys.path:
     sys.path.insert(0, ml_service_root)
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Optional
 from loguru import logger
 
 from inference.pomodoro_recommender import PomodoroRecommender
+from utils.async_data_loader import get_async_data_loader
 
 router = APIRouter()
 
@@ -48,7 +50,10 @@ async def recommend_pomodoro(request: PomodoroRequest):
         logger.info(f"Pomodoro recommendation requested for user {request.user_id}")
         
         recommender = get_recommender()
-        result = recommender.recommend(request.user_id, request.task_priority)
+        user_features = await get_async_data_loader().get_user_features(request.user_id)
+        result = await run_in_threadpool(
+            recommender.recommend, request.user_id, request.task_priority, user_features=user_features
+        )
         
         return PomodoroResponse(
             focus_minutes=result["focus_minutes"],
@@ -6,13 +6,16 @@ ml_service_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspat
 if ml_service_root not in sys.path:
     sys.path.insert(0, ml_service_root)
 
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from loguru import logger
 
 from inference.sentiment_analyzer import SentimentAnalyzer
 from inference.mood_suggestions import MoodSuggestionsService
+from utils.async_data_loader import get_async_data_loader
 
 router = APIRouter()
 
@@ -66,7 +69,7 @@ async def analyze_sentiment(request: SentimentRequest):
         logger.info(f"Sentiment analysis requested for text: {request.text[:50]}...")
         
         analyzer = get_analyzer()
-        result = analyzer.analyze(request.text)
+        result = await run_in_threadpool(analyzer.analyze, request.text)
         
         return SentimentResponse(
             sentiment_score=result["sentiment_score"],
@@ -92,10 +95,18 @@ async def get_mood_suggestions(request: MoodSuggestionsRequest):
         logger.info(f"Mood suggestions requested for user {request.user_id}, mood: {request.mood}")
         
         service = get_mood_suggestions_service()
-        result = service.get_mood_suggestions(
+        data_loader = get_async_data_loader()
+        user_features, mood_history = await asyncio.gather(
+            data_loader.get_user_features(request.user_id),
+            data_loader.get_recent_moods(request.user_id, days=7, limit=5),
+        )
+        result = await run_in_threadpool(
+            service.get_mood_suggestions,
             user_id=request.user_id,
             mood=request.mood,
-            note=request.note or ""
+            note=request.note or "",
+            user_features=user_features,
+            mood_history=mood_history
         )
         
         return MoodSuggestionsResponse(
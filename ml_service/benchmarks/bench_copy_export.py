@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark COPY-based bulk export against pd.read_sql_query
+
+Usage:
+    python benchmarks/bench_copy_export.py [--days 90] [--repeat 3]
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import pandas as pd
+
+from utils.data_loaders import DataLoader, COPY_EXPORTS
+
+def time_call(fn, repeat: int):
+    """Return (best seconds, result of last call)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=90, help='Day window for time-based tables')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per method (best is reported)')
+    args = parser.parse_args()
+
+    loader = DataLoader()
+
+    print(f"{'table':<20}{'rows':>10}{'read_sql (s)':>15}{'COPY (s)':>12}{'rows/s COPY':>14}{'speedup':>10}")
+    for table, spec in COPY_EXPORTS.items():
+        select = spec['select']
+        if spec['time_column']:
+            select += f" WHERE {spec['time_column']} >= NOW() - make_interval(days => {int(args.days)})"
+
+        def read_sql():
+            with loader.pool.connection() as conn:
+                return pd.read_sql_query(select, conn)
+
+        sql_time, sql_df = time_call(read_sql, args.repeat)
+        copy_time, copy_df = time_call(lambda: loader.export_table(table, days=args.days), args.repeat)
+
+        if len(sql_df) != len(copy_df):
+            print(f"  ⚠️ row count mismatch for {table}: {len(sql_df)} vs {len(copy_df)}")
+
+        rows = len(copy_df)
+        rate = rows / copy_time if copy_time > 0 else 0
+        speedup = sql_time / copy_time if copy_time > 0 else 0
+        print(f"{table:<20}{rows:>10}{sql_time:>15.3f}{copy_time:>12.3f}{rate:>14.0f}{speedup:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark pandas-free inference featurization against the pandas (legacy) path
+
+Feeds the same synthetic per-user rows to both implementations, so only the
+in-process cost is measured (no database round trips).
+
+Usage:
+    python benchmarks/bench_inference_features.py [--sessions 60] [--tasks 30] [--iterations 2000]
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import pandas as pd
+
+from utils.data_loaders import DataLoader
+from utils.inference_features import features_from_rows
+
+SESSION_COLUMNS = ['id', 'user_id', 'session_type', 'duration', 'completed_at', 'user_id_ref']
+TASK_COLUMNS = ['id', 'user_id', 'title', 'description', 'priority', 'status', 'tag',
+                'due_date', 'created_at', 'updated_at', 'completed_at']
+MOOD_COLUMNS = ['id', 'user_id', 'mood', 'note', 'created_at']
+GAMIFICATION_COLUMNS = ['user_id', 'level', 'points', 'total_points', 'streak', 'last_activity_date']
+
+def synthetic_rows(user_id: int, n_sessions: int, n_tasks: int, now: datetime, seed: int = 7):
+    """Rows shaped like the legacy per-table queries (what read_sql_query receives)"""
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(n_sessions):
+        session_type = rng.choice(['work', 'work', 'shortBreak', 'longBreak'])
+        duration = rng.choice([1500, 1800, 3000]) if session_type == 'work' else rng.choice([300, 900])
+        completed_at = now - timedelta(minutes=rng.randint(0, 7 * 24 * 60 - 1))
+        sessions.append((i, user_id, session_type, duration, completed_at, user_id))
+    sessions.sort(key=lambda row: row[4], reverse=True)
+
+    tasks = []
+    for i in range(n_tasks):
+        status = rng.choice(['pending', 'completed', 'in_progress'])
+        created_at = now - timedelta(minutes=rng.randint(60, 7 * 24 * 60 - 1))
+        updated_at = created_at + timedelta(minutes=rng.randint(5, 600))
+        tasks.append((i, user_id, f"Task {i}", None, rng.choice(['low', 'medium', 'high']), status,
+                      'general', None, created_at, updated_at,
+                      updated_at if status == 'completed' else None))
+    tasks.sort(key=lambda row: row[8], reverse=True)
+
+    moods = [(1, user_id, 'calm', None, now - timedelta(hours=3))]
+    gamification = [(user_id, 3, 120, 480, 4, now.date())]
+
+    daily = {}
+    for _, _, session_type, duration, completed_at, _ in sessions:
+        if session_type == 'work':
+            daily[completed_at.date()] = daily.get(completed_at.date(), 0) + duration
+    daily_focus = sorted(((day, total / 60.0) for day, total in daily.items()), reverse=True)[:7]
+
+    return sessions, tasks, moods, gamification, daily_focus
+
+def pandas_features(user_id, rows, now):
+    """The legacy path: DataFrames per table, then pandas aggregation"""
+    sessions, tasks, moods, gamification, daily_focus = rows
+    return DataLoader._legacy_features_from_frames(
+        user_id,
+        DataLoader._prepare_sessions(pd.DataFrame(sessions, columns=SESSION_COLUMNS)),
+        DataLoader._prepare_tasks(pd.DataFrame(tasks, columns=TASK_COLUMNS)),
+        DataLoader._prepare_moods(pd.DataFrame(moods, columns=MOOD_COLUMNS)),
+        pd.DataFrame(gamification, columns=GAMIFICATION_COLUMNS),
+        DataLoader._prepare_daily_focus(pd.DataFrame(daily_focus, columns=['date', 'total_focus_minutes'])),
+        now,
+    )
+
+def python_features(user_id, rows, now):
+    """The inference path: only the needed columns, reduced in one pass"""
+    sessions, tasks, moods, gamification, _ = rows
+    return features_from_rows(
+        user_id,
+        [(s[2], s[3], s[4]) for s in sessions],
+        [(t[5], t[4], t[8], t[9]) for t in tasks],
+        (moods[0][2],) if moods else None,
+        (gamification[0][4], gamification[0][1]) if gamification else None,
+        now,
+    )
+
+def measure(fn, iterations: int):
+    """Return (mean microseconds per call, peak KiB allocated by one call)"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - start) / iterations * 1e6
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak / 1024
+
+def same(a, b) -> bool:
+    """Feature values match (NaN equals NaN, floats within rounding)"""
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    if math.isnan(a) and math.isnan(b):
+        return True
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=60, help='Sessions in the 7-day window')
+    parser.add_argument('--tasks', type=int, default=30, help='Tasks in the 7-day window')
+    parser.add_argument('--iterations', type=int, default=2000, help='Timed calls per implementation')
+    args = parser.parse_args()
+
+    user_id = 1
+    now = datetime.now()
+    rows = synthetic_rows(user_id, args.sessions, args.tasks, now)
+
+    expected = pandas_features(user_id, rows, now)
+    actual = python_features(user_id, rows, now)
+    mismatched = [key for key in expected if not same(expected[key], actual.get(key))]
+    if mismatched:
+        print(f"WARNING: implementations disagree on {mismatched}")
+
+    pandas_us, pandas_kib = measure(lambda: pandas_features(user_id, rows, now), args.iterations)
+    python_us, python_kib = measure(lambda: python_features(user_id, rows, now), args.iterations)
+
+    print(f"{'path':<10}{'us/request':>14}{'peak KiB':>12}")
+    print(f"{'pandas':<10}{pandas_us:>14.1f}{pandas_kib:>12.1f}")
+    print(f"{'python':<10}{python_us:>14.1f}{python_kib:>12.1f}")
+    print(f"speedup {pandas_us / python_us:.1f}x, {pandas_kib / max(python_kib, 1e-9):.1f}x less peak memory")
+
+if __name__ == "__main__":
+    main()
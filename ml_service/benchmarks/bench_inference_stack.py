@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inference stack on a seeded embedded (SQLite) database
+
+Runs without PostgreSQL: the DataLoader pools are backed by an in-process
+SQLite database filled with synthetic users. Measures feature fetches for
+each FEATURE_QUERY_MODE, then full Pomodoro recommendations (async loader +
+recommender, as the /ml/recommend-pomodoro route runs them) under concurrency.
+
+Usage:
+    python benchmarks/bench_inference_stack.py [--users 500] [--days 30] [--requests 2000] [--concurrency 16]
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before config is imported
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("FEATURE_CACHE_ENABLED", "false")
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config import settings
+from utils.data_loaders import DataLoader
+from utils.async_data_loader import get_async_data_loader
+from utils.db_pool import close_pool, get_pool
+from utils.embedded_db import seed_embedded_database
+from inference.pomodoro_recommender import PomodoroRecommender
+
+def report(label: str, latencies, elapsed: float):
+    """Print throughput and latency percentiles (milliseconds)"""
+    latencies = sorted(latencies)
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{label:<22}{len(latencies) / elapsed:>10.0f}{statistics.mean(latencies) * 1000:>10.2f}"
+          f"{pct(0.5):>10.2f}{pct(0.95):>10.2f}{pct(0.99):>10.2f}")
+
+def bench_features(loader: DataLoader, user_ids, concurrency: int):
+    """Time DataLoader.get_user_features from a thread pool"""
+    def timed(user_id):
+        start = time.perf_counter()
+        loader.get_user_features(user_id)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, user_ids))
+    return latencies, time.perf_counter() - start
+
+async def bench_recommend(user_ids, concurrency: int):
+    """Time feature fetch + recommendation per request, concurrency requests in flight"""
+    recommender = PomodoroRecommender()
+    data_loader = get_async_data_loader()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id):
+        async with semaphore:
+            start = time.perf_counter()
+            features = await data_loader.get_user_features(user_id)
+            await asyncio.to_thread(recommender.recommend, user_id, 'medium', user_features=features)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[one(user_id) for user_id in user_ids])
+    elapsed = time.perf_counter() - start
+    await data_loader.close()
+    return latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500, help='Synthetic users to seed')
+    parser.add_argument('--days', type=int, default=30, help='Days of activity per user')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per measurement')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed for data and request order')
+    args = parser.parse_args()
+
+    if settings.DB_BACKEND != "sqlite":
+        sys.exit("This benchmark needs DB_BACKEND=sqlite")
+
+    seed_embedded_database(get_pool(), users=args.users, days=args.days, seed=args.seed)
+    rng = random.Random(args.seed)
+    user_ids = [rng.randint(1, args.users) for _ in range(args.requests)]
+    loader = DataLoader()
+
+    print(f"{'path':<22}{'req/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for mode in ('aggregated', 'python', 'legacy'):
+        settings.FEATURE_QUERY_MODE = mode
+        report(f"features[{mode}]", *bench_features(loader, user_ids, args.concurrency))
+
+    settings.FEATURE_QUERY_MODE = 'aggregated'
+    report("recommend-pomodoro", *asyncio.run(bench_recommend(user_ids, args.concurrency)))
+    close_pool()
+
+if __name__ == "__main__":
+    main()
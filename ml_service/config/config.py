@@ -34,6 +34,71 @@ class Settings(BaseSettings):
     DB_NAME: str = os.getenv("DB_NAME", "focuswave")
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: Optional[str] = os.getenv("DB_PASSWORD") or "postgres"  # Default to "postgres" if not set
+    DB_CONNECT_TIMEOUT: int = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))  # Seconds
+    
+    # Connection pool shared by all DataLoader instances
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+    # Server-side PREPARE/EXECUTE per pooled connection (disable behind PgBouncer transaction pooling)
+    DB_PREPARED_STATEMENTS: bool = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+    
+    # Optional read replica (libpq DSN) for training and bulk analytics reads
+    DB_REPLICA_DSN: Optional[str] = os.getenv("DB_REPLICA_DSN") or None
+    # Per-user inference reads also use the replica while its lag is within this
+    # many seconds; 0 keeps inference on the primary
+    DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "0"))
+    
+    # "postgres", or "sqlite" to run DataLoader on an embedded database (seeded
+    # with utils/embedded_db.py) for benchmarks and tests without PostgreSQL
+    DB_BACKEND: str = os.getenv("DB_BACKEND", "postgres").lower()
+    # SQLite file for DB_BACKEND=sqlite; ":memory:" is an in-process database
+    EMBEDDED_DB_PATH: str = os.getenv("EMBEDDED_DB_PATH", ":memory:")
+    
+    # Feature extraction: "aggregated" computes inference features in one SQL
+    # round trip, "python" runs one query per table and reduces the raw rows
+    # without pandas, "legacy" runs one query per table and aggregates in pandas
+    FEATURE_QUERY_MODE: str = os.getenv("FEATURE_QUERY_MODE", "aggregated")
+    # Read daily focus trends from the user_daily_focus rollup when it is installed
+    FOCUS_ROLLUP_ENABLED: bool = os.getenv("FOCUS_ROLLUP_ENABLED", "true").lower() == "true"
+    
+    # Latency budget for inference feature fetches: per-statement timeout and a
+    # deadline on the whole fetch (0 disables either). When exceeded, the last
+    # cached features are served marked stale, then defaults.
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "2000"))
+    FEATURE_FETCH_DEADLINE_SECONDS: float = float(os.getenv("FEATURE_FETCH_DEADLINE_SECONDS", "3"))
+    # Concurrent feature requests for the same user share one in-flight fetch
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # DataLoader queries slower than this are logged with their parameters (0
+    # disables), plus their EXPLAIN (ANALYZE, BUFFERS) plan when enabled
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+    
+    # In-process per-user feature cache (invalidated via LISTEN/NOTIFY)
+    FEATURE_CACHE_ENABLED: bool = os.getenv("FEATURE_CACHE_ENABLED", "true").lower() == "true"
+    FEATURE_CACHE_TTL_SECONDS: float = float(os.getenv("FEATURE_CACHE_TTL_SECONDS", "60"))
+    FEATURE_CACHE_MAX_SIZE: int = int(os.getenv("FEATURE_CACHE_MAX_SIZE", "10000"))
+    
+    # Optional in-memory copy of recent activity for all active users; when
+    # loaded, inference features are computed without a database round trip
+    ACTIVITY_STORE_ENABLED: bool = os.getenv("ACTIVITY_STORE_ENABLED", "false").lower() == "true"
+    ACTIVITY_STORE_DAYS: int = int(os.getenv("ACTIVITY_STORE_DAYS", "7"))
+    ACTIVITY_STORE_REFRESH_SECONDS: float = float(os.getenv("ACTIVITY_STORE_REFRESH_SECONDS", "30"))
+    
+    # Bitmap of users with activity in the last ACTIVE_USERS_DAYS; feature
+    # requests for anyone else get cold-start features without a query.
+    # Needs the NOTIFY triggers (schema_bootstrap.install_activity_notify),
+    # otherwise newly active users get cold-start features until the next refresh
+    ACTIVE_USERS_ENABLED: bool = os.getenv("ACTIVE_USERS_ENABLED", "false").lower() == "true"
+    ACTIVE_USERS_DAYS: int = int(os.getenv("ACTIVE_USERS_DAYS", "7"))
+    ACTIVE_USERS_REFRESH_SECONDS: float = float(os.getenv("ACTIVE_USERS_REFRESH_SECONDS", "60"))
+    
+    # Running per-user aggregates fed by activity events (POST /ml/events);
+    # rebuilt from PostgreSQL every ONLINE_FEATURES_RECONCILE_SECONDS
+    ONLINE_FEATURES_ENABLED: bool = os.getenv("ONLINE_FEATURES_ENABLED", "false").lower() == "true"
+    ONLINE_FEATURES_DAYS: int = int(os.getenv("ONLINE_FEATURES_DAYS", "7"))
+    ONLINE_FEATURES_RECONCILE_SECONDS: float = float(os.getenv("ONLINE_FEATURES_RECONCILE_SECONDS", "900"))
     
     # ML Service
     ML_SERVICE_PORT: int = int(os.getenv("ML_SERVICE_PORT", "8001"))
@@ -62,6 +127,15 @@ class Settings(BaseSettings):
     # Retraining
     RETRAIN_INTERVAL_HOURS: int = int(os.getenv("RETRAIN_INTERVAL_HOURS", "24"))
     MIN_SAMPLES_FOR_TRAINING: int = int(os.getenv("MIN_SAMPLES_FOR_TRAINING", "50"))
+    TRAINING_CHUNK_SIZE: int = int(os.getenv("TRAINING_CHUNK_SIZE", "50000"))  # Rows per streamed chunk
+    
+    # Local Parquet snapshot of the training tables, synced by watermark delta
+    TRAINING_SNAPSHOTS_ENABLED: bool = os.getenv("TRAINING_SNAPSHOTS_ENABLED", "true").lower() == "true"
+    TRAINING_SNAPSHOT_SYNC: bool = os.getenv("TRAINING_SNAPSHOT_SYNC", "true").lower() == "true"  # false: train on the snapshot as-is
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", os.path.join(MODEL_DIR, "snapshots"))
+    SNAPSHOT_RETENTION_DAYS: int = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "120"))
+    SNAPSHOT_SYNC_OVERLAP_MINUTES: int = int(os.getenv("SNAPSHOT_SYNC_OVERLAP_MINUTES", "5"))  # Re-read for late commits
+    SNAPSHOT_FULL_SYNC_HOURS: int = int(os.getenv("SNAPSHOT_FULL_SYNC_HOURS", "24"))  # Re-export for deletes and mood edits
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -2,10 +2,11 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from loguru import logger
 from config.config import settings
 from utils.data_loaders import DataLoader
+from utils.user_features import UserFeatures, with_context
 from inference.sentiment_analyzer import SentimentAnalyzer
 
 # Try importing OpenAI
@@ -115,10 +116,15 @@ class CoachService:
             logger.info("Using rule-based coach (no LLM API key provided)")
             self.llm_provider = "rule-based"
     
-    def get_coaching(self, user_id: int, context: Optional[Dict] = None) -> Dict:
+    def get_coaching(self, user_id: int, context: Optional[Dict] = None,
+                     user_features: Optional[UserFeatures] = None, recent_notes: Optional[List[str]] = None) -> Dict:
         """
         Get AI coaching suggestions
         
+        Pass user_features and today's latest mood notes (newest first) when
+        they were already fetched (e.g. by the async data loader) to skip the
+        database lookups.
+        
         Returns:
             {
                 "message": str,
@@ -127,24 +133,24 @@ class CoachService:
         """
         try:
             # Get user context
-            user_features = self.data_loader.get_user_features(user_id)
+            if user_features is None:
+                user_features = self.data_loader.get_user_features(user_id)
             
-            # Get recent mood logs for context
-            moods = self.data_loader.get_user_moods(user_id=user_id, days=1)
-            recent_mood_text = ""
-            if not moods.empty and 'note' in moods.columns:
-                recent_notes = moods['note'].dropna().tolist()
-                if recent_notes:
-                    recent_mood_text = " ".join(recent_notes[-3:])  # Last 3 mood notes
+            # Get today's last 3 mood notes for context
+            if recent_notes is None:
+                recent_notes = self.data_loader.get_recent_notes(user_id, days=1, limit=3)
+            recent_mood_text = " ".join(reversed(recent_notes[:3]))  # Oldest first
             
             # Extract user message from context
             user_message = None
             if context:
                 user_message = context.get('user_message') or context.get('message') or context.get('question')
-                # Merge other context into user_features
-                for key, value in context.items():
-                    if key not in ['user_message', 'message', 'question']:
-                        user_features[key] = value
+            # Merge other context into a plain dict copy of user_features, so
+            # context values aren't coerced to the feature types
+            user_features = with_context(user_features, {
+                key: value for key, value in (context or {}).items()
+                if key not in ['user_message', 'message', 'question']
+            })
             
             # Generate coaching message
             if self.llm_provider == "gemini" and self.gemini_client:
@@ -4,11 +4,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import joblib
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from loguru import logger
 from config.config import settings
-from utils.feature_engineering import FeatureEngineer
+from utils.feature_engineering import FeatureEngineer, DISTRACTION_SPEC
+from utils.feature_spec import FeatureSpecMismatch
 from utils.data_loaders import DataLoader
+from utils.user_features import UserFeatures, feature_columns
 from utils.model_versioning import ModelVersioning
 
 class DistractionPredictor:
@@ -34,6 +36,11 @@ class DistractionPredictor:
             
             if model_path and os.path.exists(model_path):
                 model_data = joblib.load(model_path)
+                # Reject artifacts trained on other columns than serving builds
+                DISTRACTION_SPEC.check_compatible(
+                    model_data.get('feature_spec') or self.versioning.get_feature_spec("distraction_predictor"),
+                    n_features=getattr(model_data.get('scaler'), 'n_features_in_', None)
+                )
                 self.model = model_data.get('model')
                 self.feature_scaler = model_data.get('scaler')
                 self.feature_mean = model_data.get('feature_mean')
@@ -43,14 +50,59 @@ class DistractionPredictor:
                 logger.warning("⚠️ Model not found, using heuristic fallback")
                 self.model = None
                 
+        except FeatureSpecMismatch as e:
+            logger.error(f"❌ Rejected distraction predictor artifact: {e}")
+            self.model = None
+            self.feature_scaler = None
         except Exception as e:
             logger.error(f"❌ Error loading model: {e}")
             self.model = None
     
-    def predict(self, user_id: int, session_duration: int = 25) -> Dict:
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        """Normalize model inputs if a scaler (or saved mean/std) is available"""
+        if self.feature_scaler:
+            features = self.feature_scaler.transform(features)
+        elif hasattr(self, 'feature_mean') and hasattr(self, 'feature_std'):
+            features, _, _ = FeatureEngineer.normalize_features(
+                features, self.feature_mean, self.feature_std
+            )
+        return features
+    
+    def predict_batch(self, user_ids: List[int], session_duration: int = 25,
+                      user_features: Optional[Dict[int, UserFeatures]] = None) -> Dict[int, Dict]:
+        """
+        Predict for many users, featurizing and running the model once for all
+        
+        user_features maps user_id to features (fetched with
+        DataLoader.get_user_features_bulk when not given). Returns user_id ->
+        the dict predict() returns.
+        """
+        if user_features is None:
+            user_features = self.data_loader.get_user_features_bulk(user_ids)
+        rows = [user_features[user_id] for user_id in user_ids]
+        
+        probabilities = [None] * len(rows)
+        if self.model and rows:
+            try:
+                features = FeatureEngineer.prepare_distraction_features_batch(feature_columns(rows), session_duration)
+                probabilities = self.model.predict_proba(self._scale(features))[:, 1]
+            except Exception as e:
+                logger.error(f"Batch distraction prediction failed, predicting per user: {e}")
+        
+        return {
+            user_id: self.predict(user_id, session_duration, user_features=row, probability=probability)
+            for user_id, row, probability in zip(user_ids, rows, probabilities)
+        }
+    
+    def predict(self, user_id: int, session_duration: int = 25, user_features: Optional[UserFeatures] = None,
+                probability: Optional[float] = None) -> Dict:
         """
         Predict distraction probability
         
+        Pass user_features when they were already fetched (e.g. by the async
+        data loader) to skip the database lookup, and the model's probability
+        for them when it was already computed (see predict_batch).
+        
         Returns:
             {
                 "distraction_probability": float (0-1),
@@ -59,22 +111,16 @@ class DistractionPredictor:
         """
         try:
             # Get user features
-            user_features = self.data_loader.get_user_features(user_id)
-            
-            # Prepare features
-            features = FeatureEngineer.prepare_distraction_features(user_features, session_duration)
-            
-            # Normalize if scaler available
-            if self.feature_scaler:
-                features = self.feature_scaler.transform(features)
-            elif hasattr(self, 'feature_mean') and hasattr(self, 'feature_std'):
-                features, _, _ = FeatureEngineer.normalize_features(
-                    features, self.feature_mean, self.feature_std
-                )
+            if user_features is None:
+                user_features = self.data_loader.get_user_features(user_id)
             
             # Predict if model available
             if self.model:
-                probability = self.model.predict_proba(features)[0][1]  # Probability of distraction
+                if probability is None:
+                    features = DISTRACTION_SPEC.build(
+                        user_features, out=DISTRACTION_SPEC.buffer(), session_duration=session_duration
+                    )
+                    probability = self.model.predict_proba(self._scale(features))[0][1]  # Probability of distraction
                 probability = float(np.clip(probability, 0, 1))
             else:
                 # Fallback: heuristic-based prediction
@@ -2,13 +2,14 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import random
 import re
 from datetime import datetime
 from loguru import logger
 from config.config import settings
 from utils.data_loaders import DataLoader
+from utils.user_features import UserFeatures
 from inference.sentiment_analyzer import SentimentAnalyzer
 from inference.coach_service import CoachService
 
@@ -39,10 +40,17 @@ class MoodSuggestionsService:
         self.gemini_client = self.coach_service.gemini_client
         self.llm_provider = self.coach_service.llm_provider
     
-    def get_mood_suggestions(self, user_id: int, mood: str, note: str = "") -> Dict:
+    def get_mood_suggestions(self, user_id: int, mood: str, note: str = "",
+                             user_features: Optional[UserFeatures] = None, mood_history: Optional[List[str]] = None,
+                             sentiment: Optional[Dict] = None) -> Dict:
         """
         Get AI-powered personalized suggestions based on mood and description
         
+        Pass user_features and the last 5 moods of the past 7 days (newest
+        first) when they were already fetched (e.g. by the async data loader)
+        to skip the database lookups, and the note's sentiment if it was
+        already analyzed.
+        
         Returns:
             {
                 "suggestions": List[str],  # List of actionable suggestions
@@ -58,17 +66,19 @@ class MoodSuggestionsService:
                 "sentiment_score": 0.0,
                 "label": "neutral"
             }
-            if note:
+            if sentiment is not None:
+                sentiment_result = sentiment
+            elif note:
                 sentiment_result = self.sentiment_analyzer.analyze(note)
             
             # Get user context for personalized suggestions
-            user_features = self.data_loader.get_user_features(user_id)
+            if user_features is None:
+                user_features = self.data_loader.get_user_features(user_id)
             
             # Get recent mood history for pattern detection
-            moods = self.data_loader.get_user_moods(user_id=user_id, days=7)
-            mood_history = []
-            if not moods.empty:
-                mood_history = moods['mood'].tolist()[:5]  # Last 5 moods
+            if mood_history is None:
+                mood_history = self.data_loader.get_recent_moods(user_id, days=7, limit=5)
+            mood_history = mood_history[:5]  # Last 5 moods
             
             # Generate AI suggestions
             if self.llm_provider == "gemini" and self.gemini_client:
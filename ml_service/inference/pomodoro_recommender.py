@@ -4,11 +4,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import joblib
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from loguru import logger
 from config.config import settings
-from utils.feature_engineering import FeatureEngineer
+from utils.feature_engineering import FeatureEngineer, POMODORO_SPEC
+from utils.feature_spec import FeatureSpecMismatch
 from utils.data_loaders import DataLoader
+from utils.user_features import UserFeatures, feature_columns
 from utils.model_versioning import ModelVersioning
 
 class PomodoroRecommender:
@@ -26,6 +28,11 @@ class PomodoroRecommender:
             
             if model_path and os.path.exists(model_path):
                 model_data = joblib.load(model_path)
+                # Reject artifacts trained on other columns than serving builds
+                POMODORO_SPEC.check_compatible(
+                    model_data.get('feature_spec') or self.versioning.get_feature_spec("pomodoro_recommender"),
+                    n_features=getattr(model_data.get('scaler'), 'n_features_in_', None)
+                )
                 self.model = model_data.get('model')
                 self.feature_scaler = model_data.get('scaler')
                 self.feature_mean = model_data.get('feature_mean')
@@ -35,14 +42,64 @@ class PomodoroRecommender:
                 logger.warning("⚠️ Model not found, using fallback defaults")
                 self.model = None
                 
+        except FeatureSpecMismatch as e:
+            logger.error(f"❌ Rejected Pomodoro model artifact: {e}")
+            self.model = None
+            self.feature_scaler = None
         except Exception as e:
             logger.error(f"❌ Error loading model: {e}")
             self.model = None
     
-    def recommend(self, user_id: int, task_priority: str = 'medium') -> Dict:
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        """Normalize model inputs if a scaler (or saved mean/std) is available"""
+        if self.feature_scaler:
+            features = self.feature_scaler.transform(features)
+        elif hasattr(self, 'feature_mean') and hasattr(self, 'feature_std'):
+            features, _, _ = FeatureEngineer.normalize_features(
+                features, self.feature_mean, self.feature_std
+            )
+        return features
+    
+    def _predict(self, user_features: UserFeatures, task_priority: str) -> np.ndarray:
+        """The model's (focus, break) output for one user"""
+        features = POMODORO_SPEC.build(user_features, out=POMODORO_SPEC.buffer(), task_priority=task_priority)
+        return self.model.predict(self._scale(features))[0]
+    
+    def recommend_batch(self, user_ids: List[int], task_priority: str = 'medium',
+                        user_features: Optional[Dict[int, UserFeatures]] = None) -> Dict[int, Dict]:
+        """
+        Recommend for many users, featurizing and running the model once for all
+        
+        user_features maps user_id to features (fetched with
+        DataLoader.get_user_features_bulk when not given). Returns user_id ->
+        the dict recommend() returns.
+        """
+        if user_features is None:
+            user_features = self.data_loader.get_user_features_bulk(user_ids)
+        rows = [user_features[user_id] for user_id in user_ids]
+        
+        predictions = [None] * len(rows)
+        if self.model and rows:
+            try:
+                features = FeatureEngineer.prepare_pomodoro_features_batch(feature_columns(rows), task_priority)
+                predictions = self.model.predict(self._scale(features))
+            except Exception as e:
+                logger.error(f"Batch pomodoro prediction failed, predicting per user: {e}")
+        
+        return {
+            user_id: self.recommend(user_id, task_priority, user_features=row, prediction=prediction)
+            for user_id, row, prediction in zip(user_ids, rows, predictions)
+        }
+    
+    def recommend(self, user_id: int, task_priority: str = 'medium', user_features: Optional[UserFeatures] = None,
+                  prediction: Optional[np.ndarray] = None) -> Dict:
         """
         Recommend personalized Pomodoro durations based on daily patterns and trends
         
+        Pass user_features when they were already fetched (e.g. by the async
+        data loader) to skip the database lookup, and the model's output for
+        them when it was already computed (see recommend_batch).
+        
         Returns:
             {
                 "focus_minutes": int,
@@ -53,7 +110,8 @@ class PomodoroRecommender:
         """
         try:
             # Get user features
-            user_features = self.data_loader.get_user_features(user_id)
+            if user_features is None:
+                user_features = self.data_loader.get_user_features(user_id)
             
             # Check if we have daily trend data for trend-based prediction
             yesterday_focus = user_features.get('focus_time_yesterday', 0)
@@ -70,20 +128,10 @@ class PomodoroRecommender:
                     yesterday_focus, day_before_focus, daily_trend, avg_focus_3days
                 )
                 
-                # Prepare features for model (for break time and other adjustments)
-                features = FeatureEngineer.prepare_pomodoro_features(user_features, task_priority)
-                
-                # Normalize features if scaler available
-                if self.feature_scaler:
-                    features = self.feature_scaler.transform(features)
-                elif hasattr(self, 'feature_mean') and hasattr(self, 'feature_std'):
-                    features, _, _ = FeatureEngineer.normalize_features(
-                        features, self.feature_mean, self.feature_std
-                    )
-                
                 # Use model for break time prediction, or calculate based on focus time
                 if self.model:
-                    prediction = self.model.predict(features)[0]
+                    if prediction is None:
+                        prediction = self._predict(user_features, task_priority)
                     # Use trend-based focus time, but model's break time
                     focus_minutes = predicted_focus_minutes
                     break_minutes = max(1, min(30, int(round(prediction[1]))))
@@ -100,19 +148,9 @@ class PomodoroRecommender:
                 
             else:
                 # Not enough historical data, use standard model prediction
-                features = FeatureEngineer.prepare_pomodoro_features(user_features, task_priority)
-                
-                # Normalize features if scaler available
-                if self.feature_scaler:
-                    features = self.feature_scaler.transform(features)
-                elif hasattr(self, 'feature_mean') and hasattr(self, 'feature_std'):
-                    features, _, _ = FeatureEngineer.normalize_features(
-                        features, self.feature_mean, self.feature_std
-                    )
-                
-                # Predict if model available
                 if self.model:
-                    prediction = self.model.predict(features)[0]
+                    if prediction is None:
+                        prediction = self._predict(user_features, task_priority)
                     focus_minutes = max(5, min(60, int(round(prediction[0]))))
                     break_minutes = max(1, min(30, int(round(prediction[1]))))
                     confidence = 0.75
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Check that batch featurization matches per-row featurization, that feature specs round-trip, and that request context merges like a dict"""
+import sys
+import os
+import json
+import random
+
+# Set UTF-8 encoding for Windows
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# Add to Python path
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import numpy as np
+
+from utils.feature_engineering import FeatureEngineer, POMODORO_SPEC, DISTRACTION_SPEC
+from utils.feature_spec import FeatureSpec, FeatureSpecMismatch
+from utils.user_features import UserFeatures, feature_columns, with_context
+
+MOODS = ['happy', 'calm', 'neutral', 'tired', 'anxious', 'sad', 'Happy', 'unknown']
+PRIORITIES = ['high', 'medium', 'low', 'HIGH', 'urgent']
+
+def random_row(rng: random.Random) -> dict:
+    """A feature dict like the loaders produce, with some keys missing"""
+    row = {
+        'user_id': rng.randint(1, 10000),
+        'total_sessions': rng.randint(0, 60),
+        'avg_session_duration': rng.uniform(5, 60),
+        'completion_rate': rng.uniform(0, 100),
+        'current_streak': rng.randint(0, 30),
+        'level': rng.randint(1, 20),
+        'recent_mood': rng.choice(MOODS),
+        'hour_of_day': rng.randint(0, 23),
+        'day_of_week': rng.randint(0, 6),
+        'pending_tasks': rng.randint(0, 12),
+        'high_priority_tasks': rng.randint(0, 6),
+        'avg_focus_duration': rng.uniform(10, 60),
+        'avg_break_duration': rng.uniform(2, 15),
+        'sessions_today': rng.randint(0, 10),
+        'focus_time_yesterday': rng.choice([0, rng.uniform(0, 120)]),
+        'focus_time_day_before': rng.choice([0, rng.uniform(0, 120)]),
+        'focus_time_three_days_ago': rng.choice([0, rng.uniform(0, 120)]),
+        'daily_trend': rng.uniform(-60, 60),
+        'avg_focus_last_3_days': rng.uniform(0, 120),
+    }
+    for key in rng.sample(sorted(row), rng.randint(0, 4)):
+        if key not in ('hour_of_day', 'day_of_week'):  # Missing time features mean "now"
+            del row[key]
+    return row
+
+def check_batch_equivalence(rng: random.Random, n: int = 500) -> bool:
+    """Batch matrices must equal the stacked per-row vectors bit for bit"""
+    ok = True
+    rows = [random_row(rng) for _ in range(n)]
+    records = [UserFeatures(row) for row in rows]
+    priorities = np.array([rng.choice(PRIORITIES) for _ in range(n)], dtype=object)
+    durations = np.array([rng.randint(5, 90) for _ in range(n)])
+    
+    per_row = np.vstack([
+        FeatureEngineer.prepare_pomodoro_features(row, task_priority=priority)
+        for row, priority in zip(rows, priorities)
+    ])
+    for name, columns in (('dict rows', {k: [row.get(k) for row in rows] for k in set().union(*rows)}),
+                          ('UserFeatures rows', feature_columns(records))):
+        batch = FeatureEngineer.prepare_pomodoro_features_batch(columns, priorities)
+        same = batch.dtype == per_row.dtype and batch.tobytes() == per_row.tobytes()
+        print(f"Pomodoro batch == per-row ({name}): {same}")
+        ok &= same
+    
+    per_row = np.vstack([
+        FeatureEngineer.prepare_distraction_features(row, int(duration))
+        for row, duration in zip(rows, durations)
+    ])
+    batch = FeatureEngineer.prepare_distraction_features_batch(feature_columns(records), durations)
+    same = batch.dtype == per_row.dtype and batch.tobytes() == per_row.tobytes()
+    print(f"Distraction batch == per-row: {same}")
+    ok &= same
+    
+    # Records must featurize exactly like the dicts they were built from
+    same = all(
+        FeatureEngineer.prepare_pomodoro_features(record).tobytes() == FeatureEngineer.prepare_pomodoro_features(row).tobytes()
+        for record, row in zip(records, rows)
+    )
+    print(f"UserFeatures == dict per-row: {same}")
+    return ok and same
+
+def check_spec_round_trip() -> bool:
+    """to_dict -> JSON -> from_dict keeps the fingerprint; changes are rejected"""
+    ok = True
+    for spec in (POMODORO_SPEC, DISTRACTION_SPEC):
+        stored = json.loads(json.dumps(spec.to_dict()))
+        restored = FeatureSpec.from_dict(stored)
+        same = restored.fingerprint == spec.fingerprint == stored['fingerprint'] and restored.names == spec.names
+        try:
+            spec.check_compatible(stored, n_features=len(spec))
+        except FeatureSpecMismatch:
+            same = False
+        
+        changed = json.loads(json.dumps(stored))
+        changed['columns'][0]['default'] = 'changed'
+        rejected = False
+        try:
+            spec.check_compatible(changed)
+        except FeatureSpecMismatch:
+            rejected = True
+        
+        print(f"{spec.name} spec round-trips: {same}, changed spec rejected: {rejected}")
+        ok &= same and rejected
+    return ok
+
+def check_context_merge(rng: random.Random) -> bool:
+    """Context over a record must equal context over the dict, values as given"""
+    row = random_row(rng)
+    record = UserFeatures(row)
+    context = {'level': 'beginner', 'hour_of_day': '14:30', 'current_streak': 12.7, 'current_task': 'Write report'}
+    merged = with_context(record, context)
+    same = merged == {**record.to_dict(), **context} and type(merged) is dict
+    untouched = record.get('level') == row.get('level') and 'current_task' not in record
+    print(f"Context merge keeps values as given: {same}, record unchanged: {untouched}")
+    return same and untouched
+
+try:
+    rng = random.Random(int(os.getenv("FEATURE_CHECK_SEED", "0")))
+    print("Checking batch featurization...")
+    batch_ok = check_batch_equivalence(rng)
+    print("\nChecking feature spec round-trip...")
+    spec_ok = check_spec_round_trip()
+    print("\nChecking coach context merge...")
+    context_ok = check_context_merge(rng)
+    
+    if not (batch_ok and spec_ok and context_ok):
+        print("\nFeature equivalence check FAILED")
+        sys.exit(1)
+    print("\nAll feature equivalence checks passed!")
+
+except Exception as e:
+    print(f"Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
@@ -0,0 +1,246 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import shutil
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from loguru import logger
+
+from utils.data_loaders import DataLoader, COPY_EXPORTS
+from config.config import settings
+
+# Try importing pyarrow (Parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    logger.warning("pyarrow not available, training snapshots disabled")
+
+# Snapshot layout per table: the column rows are partitioned by day on (None
+# keeps one file that is replaced on every sync) and the row key used to keep
+# only the latest version of a row written by more than one sync.
+SNAPSHOT_TABLES = {
+    'timer_sessions': {'partition': 'completed_at', 'key': 'id'},
+    'tasks': {'partition': 'created_at', 'key': 'id'},
+    'mood_logs': {'partition': 'created_at', 'key': 'id'},
+    'user_gamification': {'partition': None, 'key': 'user_id'},
+}
+
+# Watermarks file entry recording when the last full re-export finished
+FULL_SYNC_KEY = "_full_sync"
+
+class SnapshotStore:
+    """
+    Local Parquet snapshot of the training tables under MODEL_DIR.
+    
+    Layout: <root>/<table>/date=YYYY-MM-DD/part-<sync time>.parquet. sync()
+    appends only rows at or after each table's stored watermark, so a
+    retrain reads a day's delta from Postgres instead of 90 days of every
+    table. Reads are memory-mapped and expose the same iter_*/get_*
+    methods the trainers use on DataLoader.
+    
+    A delta can't see deleted rows (task_deleted, DELETE /mood) or edited
+    moods (mood_logs has no updated_at, so its watermark is created_at).
+    Every SNAPSHOT_FULL_SYNC_HOURS the sync re-exports the whole retention
+    window instead and replaces every day partition, so the snapshot
+    differs from the database by at most that long.
+    """
+    
+    def __init__(self, root: str = None):
+        self.root = Path(root or settings.SNAPSHOT_DIR)
+        self.watermark_file = self.root / "_watermarks.json"
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def close(self):
+        """Nothing to release; present so trainers can treat this like DataLoader"""
+    
+    def _load_watermarks(self) -> Dict[str, str]:
+        if self.watermark_file.exists():
+            with open(self.watermark_file, 'r') as f:
+                return json.load(f)
+        return {}
+    
+    def _save_watermarks(self, watermarks: Dict[str, str]):
+        # Written after the data files, atomically, so a crash re-syncs a delta
+        tmp = self.watermark_file.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp, self.watermark_file)
+    
+    @staticmethod
+    def _full_sync_due(watermarks: Dict[str, str]) -> bool:
+        last = watermarks.get(FULL_SYNC_KEY)
+        if last is None:
+            return True
+        age = datetime.now() - datetime.fromisoformat(last)
+        return age >= timedelta(hours=settings.SNAPSHOT_FULL_SYNC_HOURS)
+    
+    def has_data(self) -> bool:
+        """Whether a previous sync completed"""
+        return bool(self._load_watermarks())
+    
+    def sync(self, data_loader: DataLoader) -> Dict[str, int]:
+        """
+        Append rows written since the stored watermarks (re-reading a small
+        overlap for transactions that committed late) and prune partitions
+        past SNAPSHOT_RETENTION_DAYS. When a full sync is due, re-export the
+        retention window and replace the partitions instead. Returns rows
+        fetched per table.
+        """
+        watermarks = self._load_watermarks()
+        started = datetime.now()
+        stamp = started.strftime("%Y%m%dT%H%M%S%f")
+        full = self._full_sync_due(watermarks)
+        full_complete = full
+        overlap = timedelta(minutes=settings.SNAPSHOT_SYNC_OVERLAP_MINUTES)
+        cutoff = date.today() - timedelta(days=settings.SNAPSHOT_RETENTION_DAYS)
+        fetched = {}
+        
+        for table, layout in SNAPSHOT_TABLES.items():
+            if layout['partition'] is None:
+                # Small, updated in place: refresh the whole table
+                df = data_loader.export_table(table)
+                if not df.empty:
+                    self._write_part(self.root / table, df, "current")
+                fetched[table] = len(df)
+                continue
+            
+            watermark = watermarks.get(table)
+            if watermark and not full:
+                df = data_loader.export_table(table, since=datetime.fromisoformat(watermark) - overlap)
+            else:
+                # One extra day so the oldest kept partition is exported whole
+                df = data_loader.export_table(table, days=settings.SNAPSHOT_RETENTION_DAYS + 1)
+            fetched[table] = len(df)
+            if df.empty:
+                # export_table also returns an empty frame on error: keep the
+                # existing partitions and retry the full sync next time
+                full_complete = False
+                continue
+            
+            partition_dates = df[layout['partition']].dt.date
+            in_window = partition_dates >= cutoff
+            written = set()
+            for day, part in df[in_window].groupby(partition_dates[in_window]):
+                directory = self.root / table / f"date={day.isoformat()}"
+                self._write_part(directory, part, stamp)
+                written.add(day)
+                if full:
+                    self._drop_parts(directory, keep=f"part-{stamp}.parquet")
+            if full:
+                # Days with no rows left in the database
+                for day, directory in self._partitions(table):
+                    if day >= cutoff and day not in written:
+                        shutil.rmtree(directory)
+            
+            watermark_column = COPY_EXPORTS[table]['watermark_column'].split('.')[-1]
+            latest = df[watermark_column].max()
+            if pd.notna(latest):
+                watermarks[table] = latest.to_pydatetime().isoformat()
+        
+        if full_complete:
+            watermarks[FULL_SYNC_KEY] = started.isoformat()
+        self._save_watermarks(watermarks)
+        self._prune(cutoff)
+        logger.info(f"✅ Snapshot synced ({'full' if full else 'delta'}): {fetched}")
+        return fetched
+    
+    @staticmethod
+    def _write_part(directory: Path, df: pd.DataFrame, stamp: str):
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f".part-{stamp}.tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+        os.replace(tmp, directory / f"part-{stamp}.parquet")
+    
+    @staticmethod
+    def _drop_parts(directory: Path, keep: str):
+        """Delete every part in a partition except the one just written"""
+        for part in directory.glob("part-*.parquet"):
+            if part.name != keep:
+                part.unlink()
+    
+    def _prune(self, cutoff: date):
+        """Drop day partitions older than the retention window"""
+        for table, layout in SNAPSHOT_TABLES.items():
+            if layout['partition'] is None:
+                continue
+            for day, directory in self._partitions(table):
+                if day < cutoff:
+                    shutil.rmtree(directory)
+    
+    def _partitions(self, table: str) -> List:
+        """(date, directory) of every day partition of a table, newest first"""
+        table_dir = self.root / table
+        if not table_dir.exists():
+            return []
+        partitions = []
+        for directory in table_dir.iterdir():
+            if directory.is_dir() and directory.name.startswith("date="):
+                partitions.append((date.fromisoformat(directory.name[len("date="):]), directory))
+        return sorted(partitions, reverse=True)
+    
+    @staticmethod
+    def _read_parts(directory: Path, key: str) -> pd.DataFrame:
+        """Memory-map every part in a directory, keeping the latest version of each row"""
+        parts = sorted(directory.glob("part-*.parquet"))
+        if not parts:
+            return pd.DataFrame()
+        frames = [pq.read_table(part, memory_map=True).to_pandas() for part in parts]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return df.drop_duplicates(key, keep='last')
+    
+    def _iter_table(self, table: str, user_id: Optional[int], days: int, chunk_size: Optional[int],
+                    prepare: Callable[[pd.DataFrame], pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Yield a table's rows within the day window, newest first, in chunks"""
+        layout = SNAPSHOT_TABLES[table]
+        column = layout['partition']
+        chunk_size = chunk_size or settings.TRAINING_CHUNK_SIZE
+        since = pd.Timestamp.now() - pd.Timedelta(days=days)
+        total = 0
+        
+        for day, directory in self._partitions(table):
+            if day < since.date():
+                break
+            df = self._read_parts(directory, layout['key'])
+            if df.empty:
+                continue
+            mask = df[column] >= since
+            if user_id:
+                mask &= df['user_id'] == user_id
+            df = df[mask].sort_values(column, ascending=False).reset_index(drop=True)
+            
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size].reset_index(drop=True)
+                total += len(chunk)
+                yield prepare(chunk)
+        
+        logger.info(f"Read {total} rows from {table} snapshot")
+    
+    def iter_user_sessions(self, user_id: Optional[int] = None, days: int = 30,
+                           chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream timer sessions from the snapshot (same columns as DataLoader)"""
+        return self._iter_table('timer_sessions', user_id, days, chunk_size, DataLoader._prepare_sessions)
+    
+    def iter_user_tasks(self, user_id: Optional[int] = None, days: int = 30,
+                        chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream tasks from the snapshot (same columns as DataLoader)"""
+        return self._iter_table('tasks', user_id, days, chunk_size, DataLoader._prepare_tasks)
+    
+    def iter_user_moods(self, user_id: Optional[int] = None, days: int = 30,
+                        chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream mood logs from the snapshot (same columns as DataLoader)"""
+        return self._iter_table('mood_logs', user_id, days, chunk_size, DataLoader._prepare_moods)
+    
+    def get_user_gamification(self, user_id: Optional[int] = None) -> pd.DataFrame:
+        """Load gamification data from the snapshot"""
+        df = self._read_parts(self.root / 'user_gamification', SNAPSHOT_TABLES['user_gamification']['key'])
+        if user_id and not df.empty:
+            df = df[df['user_id'] == user_id].reset_index(drop=True)
+        logger.info(f"Loaded {len(df)} gamification records from snapshot")
+        return df
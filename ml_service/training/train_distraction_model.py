@@ -11,9 +11,11 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 import joblib
 from loguru import logger
 
-from utils.data_loaders import DataLoader
-from utils.feature_engineering import FeatureEngineer
+from utils.feature_engineering import FeatureEngineer, DISTRACTION_SPEC
 from utils.model_versioning import ModelVersioning
+from training.training_data import (
+    collect_activity_stats, collect_session_stats, open_training_source, session_feature_frame
+)
 from config.config import settings
 
 def train_distraction_model():
@@ -21,82 +23,50 @@ def train_distraction_model():
     logger.info("🚀 Starting distraction prediction model training...")
     
     # Load data
-    data_loader = DataLoader()
+    data_loader = open_training_source()
     
     try:
-        # Get sessions data
-        sessions_df = data_loader.get_user_sessions(days=90)
+        # Sessions are streamed in chunks: a first pass collects per-user
+        # stats, a second pass builds the training rows
+        synthetic_df = None
         
-        if len(sessions_df) < settings.MIN_SAMPLES_FOR_TRAINING:
-            logger.warning(f"⚠️ Insufficient data: {len(sessions_df)} samples")
+        def session_chunks():
+            if synthetic_df is not None:
+                return [synthetic_df]
+            return data_loader.iter_user_sessions(days=90, chunk_size=settings.TRAINING_CHUNK_SIZE)
+        
+        session_stats, n_sessions = collect_session_stats(session_chunks())
+        
+        if n_sessions < settings.MIN_SAMPLES_FOR_TRAINING:
+            logger.warning(f"⚠️ Insufficient data: {n_sessions} samples")
             logger.info("Using synthetic data for initial training...")
-            sessions_df = generate_synthetic_distraction_data()
+            synthetic_df = generate_synthetic_distraction_data()
+            session_stats, n_sessions = collect_session_stats(session_chunks())
         
-        # Get additional features
-        tasks_df = data_loader.get_user_tasks(days=90)
-        moods_df = data_loader.get_user_moods(days=90)
-        gamification_df = data_loader.get_user_gamification()
+        # Get additional per-user features (tasks, moods, gamification)
+        activity_stats = collect_activity_stats(data_loader, days=90)
         
-        # Prepare training data
+        # Prepare training data, one feature matrix per chunk
         # For distraction, we'll simulate based on session patterns
-        X = []
-        y = []
-        
-        for _, session in sessions_df.iterrows():
-            user_id = session['user_id']
-            
-            # Get user features
-            user_features = {
-                'user_id': user_id,
-                'avg_focus_duration': 25,
-                'avg_break_duration': 5,
-                'completion_rate': 50,
-                'current_streak': 0,
-                'level': 1,
-                'total_sessions': 0,
-                'sessions_today': 0,
-                'recent_mood': 'neutral',
-                'hour_of_day': session.get('hour', 12),
-                'day_of_week': session.get('day_of_week', 0),
-                'is_weekend': session.get('is_weekend', 0),
-                'pending_tasks': 0,
-                'high_priority_tasks': 0,
-            }
-            
-            # Enhance with actual data
-            user_tasks = tasks_df[tasks_df['user_id'] == user_id] if not tasks_df.empty else pd.DataFrame()
-            if not user_tasks.empty:
-                user_features['completion_rate'] = (user_tasks['is_completed'].mean() * 100) if 'is_completed' in user_tasks.columns else 50
-                user_features['pending_tasks'] = len(user_tasks[user_tasks['status'] == 'pending'])
-                user_features['high_priority_tasks'] = len(user_tasks[user_tasks['priority'] == 'high'])
-            
-            user_moods = moods_df[moods_df['user_id'] == user_id] if not moods_df.empty else pd.DataFrame()
-            if not user_moods.empty:
-                user_features['recent_mood'] = user_moods.iloc[0]['mood'] if 'mood' in user_moods.columns else 'neutral'
-            
-            user_gam = gamification_df[gamification_df['user_id'] == user_id] if not gamification_df.empty else pd.DataFrame()
-            if not user_gam.empty:
-                user_features['current_streak'] = user_gam.iloc[0].get('streak', 0)
-                user_features['level'] = user_gam.iloc[0].get('level', 1)
-            
-            user_sessions = sessions_df[sessions_df['user_id'] == user_id]
-            if not user_sessions.empty:
-                user_features['total_sessions'] = len(user_sessions)
-                user_features['sessions_today'] = len(user_sessions[user_sessions['completed_at'].dt.date == pd.Timestamp.now().date()])
-            
-            # Prepare features
-            session_duration = session['duration']
-            features = FeatureEngineer.prepare_distraction_features(user_features, session_duration)
-            X.append(features[0])
+        X_parts = []
+        y_parts = []
+        
+        for sessions_df in session_chunks():
+            if sessions_df.empty:
+                continue
+            user_features = session_feature_frame(
+                sessions_df, activity_stats, session_stats, ('total_sessions', 'sessions_today')
+            )
+            session_duration = sessions_df['duration'].to_numpy()
+            X_parts.append(FeatureEngineer.prepare_distraction_features_batch(user_features, session_duration))
             
             # Simulate distraction label based on heuristics
             # In real scenario, this would come from interruption data
-            distraction_prob = calculate_distraction_probability(user_features, session_duration)
-            distraction_label = 1 if distraction_prob > 0.5 else 0
-            y.append(distraction_label)
+            distraction_prob = calculate_distraction_probability_batch(user_features, session_duration)
+            y_parts.append((distraction_prob > 0.5).astype(int))
         
-        X = np.array(X)
-        y = np.array(y)
+        X = np.vstack(X_parts) if X_parts else np.empty((0, len(DISTRACTION_SPEC)))
+        y = np.concatenate(y_parts) if y_parts else np.array([], dtype=int)
         
         if len(X) == 0:
             raise ValueError("No training data available")
@@ -133,6 +103,7 @@ def train_distraction_model():
             'scaler': scaler,
             'feature_mean': X.mean(axis=0),
             'feature_std': X.std(axis=0),
+            'feature_spec': DISTRACTION_SPEC.to_dict(),
             'metrics': {
                 'accuracy': float(accuracy),
                 'precision': float(precision),
@@ -150,7 +121,9 @@ def train_distraction_model():
         
         # Register with versioning
         versioning = ModelVersioning()
-        version = versioning.register_model("distraction_predictor", model_path, model_data['metrics'])
+        version = versioning.register_model(
+            "distraction_predictor", model_path, model_data['metrics'], feature_spec=model_data['feature_spec']
+        )
         logger.info(f"✅ Model version {version} registered")
         
         data_loader.close()
@@ -193,6 +166,23 @@ def calculate_distraction_probability(features: dict, session_duration: int) ->
     
     return np.clip(prob, 0, 1)
 
+def calculate_distraction_probability_batch(features: pd.DataFrame, session_duration: np.ndarray) -> np.ndarray:
+    """calculate_distraction_probability for every row of a feature frame"""
+    n = len(features)
+    mood = features['recent_mood'].fillna('neutral').to_numpy() if 'recent_mood' in features else np.full(n, 'neutral')
+    hour = features['hour_of_day'].fillna(12).to_numpy() if 'hour_of_day' in features else np.full(n, 12)
+    pending = features['pending_tasks'].fillna(0).to_numpy() if 'pending_tasks' in features else np.zeros(n)
+    streak = features['current_streak'].fillna(0).to_numpy() if 'current_streak' in features else np.zeros(n)
+    
+    # Same additions in the same order as the per-row version
+    prob = np.full(n, 0.3)
+    prob = prob + np.where(np.isin(mood, ['anxious', 'tired']), 0.2, np.where(mood == 'happy', -0.1, 0.0))
+    prob = prob + np.where((hour >= 22) | (hour < 6), 0.15, np.where((14 <= hour) & (hour <= 16), 0.1, 0.0))
+    prob = prob + np.where(pending > 5, 0.15, 0.0)
+    prob = prob + np.where(streak < 2, 0.1, 0.0)
+    prob = prob + np.where(np.asarray(session_duration) > 30, 0.1, 0.0)
+    return np.clip(prob, 0, 1)
+
 def generate_synthetic_distraction_data():
     """Generate synthetic distraction training data"""
     np.random.seed(42)
@@ -11,9 +11,11 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 from loguru import logger
 
-from utils.data_loaders import DataLoader
-from utils.feature_engineering import FeatureEngineer
+from utils.feature_engineering import FeatureEngineer, POMODORO_SPEC
 from utils.model_versioning import ModelVersioning
+from training.training_data import (
+    collect_activity_stats, collect_session_stats, open_training_source, session_feature_frame
+)
 from config.config import settings
 
 def train_pomodoro_model():
@@ -21,91 +23,52 @@ def train_pomodoro_model():
     logger.info("🚀 Starting Pomodoro model training...")
     
     # Load data
-    data_loader = DataLoader()
+    data_loader = open_training_source()
     
     try:
-        # Get sessions data
-        sessions_df = data_loader.get_user_sessions(days=90)
+        # Sessions are streamed in chunks: a first pass collects per-user
+        # stats, a second pass builds the training rows
+        synthetic_df = None
         
-        if len(sessions_df) < settings.MIN_SAMPLES_FOR_TRAINING:
-            logger.warning(f"⚠️ Insufficient data: {len(sessions_df)} samples (need {settings.MIN_SAMPLES_FOR_TRAINING})")
-            logger.info("Using synthetic data for initial training...")
-            sessions_df = generate_synthetic_data()
-        
-        # Get additional features
-        tasks_df = data_loader.get_user_tasks(days=90)
-        moods_df = data_loader.get_user_moods(days=90)
-        gamification_df = data_loader.get_user_gamification()
+        def session_chunks():
+            if synthetic_df is not None:
+                return [synthetic_df]
+            return data_loader.iter_user_sessions(days=90, chunk_size=settings.TRAINING_CHUNK_SIZE)
         
-        # Prepare training data
-        X = []
-        y_focus = []
-        y_break = []
+        session_stats, n_sessions = collect_session_stats(session_chunks())
         
-        for _, session in sessions_df.iterrows():
-            user_id = session['user_id']
-            
-            # Get user features
-            user_features = {
-                'user_id': user_id,
-                'avg_focus_duration': 25,
-                'avg_break_duration': 5,
-                'completion_rate': 50,
-                'current_streak': 0,
-                'level': 1,
-                'total_sessions': 0,
-                'sessions_today': 0,
-                'recent_mood': 'neutral',
-                'hour_of_day': session.get('hour', 12),
-                'day_of_week': session.get('day_of_week', 0),
-                'is_weekend': session.get('is_weekend', 0),
-                'pending_tasks': 0,
-                'high_priority_tasks': 0,
-            }
-            
-            # Enhance with actual data
-            user_tasks = tasks_df[tasks_df['user_id'] == user_id] if not tasks_df.empty else pd.DataFrame()
-            if not user_tasks.empty:
-                user_features['completion_rate'] = (user_tasks['is_completed'].mean() * 100) if 'is_completed' in user_tasks.columns else 50
-                user_features['pending_tasks'] = len(user_tasks[user_tasks['status'] == 'pending'])
-                user_features['high_priority_tasks'] = len(user_tasks[user_tasks['priority'] == 'high'])
-            
-            user_moods = moods_df[moods_df['user_id'] == user_id] if not moods_df.empty else pd.DataFrame()
-            if not user_moods.empty:
-                user_features['recent_mood'] = user_moods.iloc[0]['mood'] if 'mood' in user_moods.columns else 'neutral'
-            
-            user_gam = gamification_df[gamification_df['user_id'] == user_id] if not gamification_df.empty else pd.DataFrame()
-            if not user_gam.empty:
-                user_features['current_streak'] = user_gam.iloc[0].get('streak', 0)
-                user_features['level'] = user_gam.iloc[0].get('level', 1)
-            
-            # Calculate averages from user's own sessions
-            user_sessions = sessions_df[sessions_df['user_id'] == user_id]
-            if not user_sessions.empty:
-                work_sessions = user_sessions[user_sessions['session_type'] == 'work']
-                break_sessions = user_sessions[user_sessions['session_type'].isin(['shortBreak', 'longBreak'])]
-                
-                if not work_sessions.empty:
-                    user_features['avg_focus_duration'] = work_sessions['duration'].mean()
-                if not break_sessions.empty:
-                    user_features['avg_break_duration'] = break_sessions['duration'].mean()
-                user_features['total_sessions'] = len(user_sessions)
-            
-            # Prepare features
-            features = FeatureEngineer.prepare_pomodoro_features(user_features, 'medium')
-            X.append(features[0])
+        if n_sessions < settings.MIN_SAMPLES_FOR_TRAINING:
+            logger.warning(f"⚠️ Insufficient data: {n_sessions} samples (need {settings.MIN_SAMPLES_FOR_TRAINING})")
+            logger.info("Using synthetic data for initial training...")
+            synthetic_df = generate_synthetic_data()
+            session_stats, n_sessions = collect_session_stats(session_chunks())
+        
+        # Get additional per-user features (tasks, moods, gamification)
+        activity_stats = collect_activity_stats(data_loader, days=90)
+        
+        # Prepare training data, one feature matrix per chunk
+        X_parts = []
+        y_focus_parts = []
+        y_break_parts = []
+        
+        for sessions_df in session_chunks():
+            if sessions_df.empty:
+                continue
+            user_features = session_feature_frame(
+                sessions_df, activity_stats, session_stats,
+                ('avg_focus_duration', 'avg_break_duration', 'total_sessions')
+            )
+            X_parts.append(FeatureEngineer.prepare_pomodoro_features_batch(user_features, 'medium'))
             
             # Target: actual session duration
-            if session['session_type'] == 'work':
-                y_focus.append(session['duration'])
-                y_break.append(5)  # Default break
-            else:
-                y_focus.append(25)  # Default focus
-                y_break.append(session['duration'])
+            is_work = (sessions_df['session_type'] == 'work').to_numpy()
+            duration = sessions_df['duration'].to_numpy()
+            y_focus_parts.append(np.where(is_work, duration, 25))  # Default focus
+            y_break_parts.append(np.where(is_work, 5, duration))  # Default break
         
-        X = np.array(X)
-        y_focus = np.array(y_focus)
-        y_break = np.array(y_break)
+        X = np.vstack(X_parts) if X_parts else np.empty((0, len(POMODORO_SPEC)))
+        y_focus = np.concatenate(y_focus_parts) if y_focus_parts else np.array([])
+        y_break = np.concatenate(y_break_parts) if y_break_parts else np.array([])
         
         if len(X) == 0:
             raise ValueError("No training data available")
@@ -160,6 +123,7 @@ def train_pomodoro_model():
             'scaler': scaler,
             'feature_mean': X.mean(axis=0),
             'feature_std': X.std(axis=0),
+            'feature_spec': POMODORO_SPEC.to_dict(),
             'metrics': {
                 'focus_mae': float(focus_mae),
                 'focus_r2': float(focus_r2),
@@ -176,7 +140,9 @@ def train_pomodoro_model():
         
         # Register with versioning
         versioning = ModelVersioning()
-        version = versioning.register_model("pomodoro_recommender", model_path, model_data['metrics'])
+        version = versioning.register_model(
+            "pomodoro_recommender", model_path, model_data['metrics'], feature_spec=model_data['feature_spec']
+        )
         logger.info(f"✅ Model version {version} registered")
         
         data_loader.close()
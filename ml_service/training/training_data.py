@@ -0,0 +1,158 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Dict, Iterable, Sequence, Tuple
+import pandas as pd
+from loguru import logger
+
+from utils.data_loaders import DataLoader
+from training.snapshot_store import SnapshotStore, PARQUET_AVAILABLE
+from config.config import settings
+
+def open_training_source():
+    """
+    Return what trainers read sessions, tasks, moods and gamification from:
+    the local snapshot store (after a delta sync) when enabled, otherwise
+    the database through DataLoader. Both expose the same iter_*/get_* API.
+    """
+    if not settings.TRAINING_SNAPSHOTS_ENABLED:
+        return DataLoader()
+    if not PARQUET_AVAILABLE:
+        logger.warning("Training snapshots enabled but pyarrow is missing, reading from the database")
+        return DataLoader()
+    
+    store = SnapshotStore()
+    if settings.TRAINING_SNAPSHOT_SYNC:
+        try:
+            data_loader = DataLoader()
+            try:
+                store.sync(data_loader)
+            finally:
+                data_loader.close()
+        except Exception as e:
+            if not store.has_data():
+                raise
+            logger.warning(f"Snapshot sync failed, training on the existing snapshot: {e}")
+    return store
+
+def collect_activity_stats(data_loader: DataLoader, days: int = 90) -> Dict[int, Dict]:
+    """
+    Aggregate per-user task, mood and gamification stats from streamed chunks
+    
+    Returns {user_id: {...}} with the same values the trainers used to derive
+    from full task/mood/gamification DataFrames, in bounded memory. Accepts a
+    DataLoader or a SnapshotStore (see open_training_source).
+    """
+    stats: Dict[int, Dict] = {}
+    
+    # Tasks: counts are additive across chunks
+    for tasks in data_loader.iter_user_tasks(days=days, chunk_size=settings.TRAINING_CHUNK_SIZE):
+        if tasks.empty:
+            continue
+        grouped = tasks.assign(
+            is_pending=(tasks['status'] == 'pending').astype(int),
+            is_high=(tasks['priority'] == 'high').astype(int),
+        ).groupby('user_id').agg(
+            task_count=('id', 'size'),
+            completed=('is_completed', 'sum'),
+            pending=('is_pending', 'sum'),
+            high=('is_high', 'sum'),
+        )
+        for user_id, row in grouped.iterrows():
+            user = stats.setdefault(user_id, {})
+            user['task_count'] = user.get('task_count', 0) + int(row['task_count'])
+            user['completed_tasks'] = user.get('completed_tasks', 0) + int(row['completed'])
+            user['pending_tasks'] = user.get('pending_tasks', 0) + int(row['pending'])
+            user['high_priority_tasks'] = user.get('high_priority_tasks', 0) + int(row['high'])
+    
+    # Moods are streamed newest first, so the first mood seen per user is the latest
+    for moods in data_loader.iter_user_moods(days=days, chunk_size=settings.TRAINING_CHUNK_SIZE):
+        if moods.empty:
+            continue
+        latest = moods.drop_duplicates('user_id', keep='first')
+        for user_id, mood in zip(latest['user_id'], latest['mood']):
+            stats.setdefault(user_id, {}).setdefault('recent_mood', mood)
+    
+    # Gamification is one row per user
+    gamification_df = data_loader.get_user_gamification()
+    if not gamification_df.empty:
+        for _, row in gamification_df.drop_duplicates('user_id', keep='first').iterrows():
+            user = stats.setdefault(row['user_id'], {})
+            user['current_streak'] = row.get('streak', 0)
+            user['level'] = row.get('level', 1)
+    
+    for user in stats.values():
+        if user.get('task_count'):
+            user['completion_rate'] = user['completed_tasks'] / user['task_count'] * 100
+    
+    logger.info(f"Collected activity stats for {len(stats)} users")
+    return stats
+
+def collect_session_stats(session_chunks: Iterable[pd.DataFrame]) -> Tuple[Dict[int, Dict], int]:
+    """
+    Aggregate per-user session stats over session chunks
+    
+    Returns ({user_id: {...}}, total session count).
+    """
+    stats: Dict[int, Dict] = {}
+    total = 0
+    today = pd.Timestamp.now().date()
+    
+    for sessions in session_chunks:
+        if sessions.empty:
+            continue
+        total += len(sessions)
+        
+        is_work = sessions['session_type'] == 'work'
+        is_break = sessions['session_type'].isin(['shortBreak', 'longBreak'])
+        grouped = sessions.assign(
+            work_duration=sessions['duration'].where(is_work, 0),
+            work_count=is_work.astype(int),
+            break_duration=sessions['duration'].where(is_break, 0),
+            break_count=is_break.astype(int),
+            is_today=(sessions['completed_at'].dt.date == today).astype(int),
+        ).groupby('user_id')[['work_duration', 'work_count', 'break_duration', 'break_count', 'is_today']].sum()
+        counts = sessions.groupby('user_id').size()
+        
+        for user_id, row in grouped.iterrows():
+            user = stats.setdefault(user_id, {
+                'total_sessions': 0, 'work_duration': 0, 'work_count': 0,
+                'break_duration': 0, 'break_count': 0, 'sessions_today': 0,
+            })
+            user['total_sessions'] += int(counts[user_id])
+            user['work_duration'] += row['work_duration']
+            user['work_count'] += int(row['work_count'])
+            user['break_duration'] += row['break_duration']
+            user['break_count'] += int(row['break_count'])
+            user['sessions_today'] += int(row['is_today'])
+    
+    for user in stats.values():
+        if user['work_count']:
+            user['avg_focus_duration'] = user['work_duration'] / user['work_count']
+        if user['break_count']:
+            user['avg_break_duration'] = user['break_duration'] / user['break_count']
+    
+    return stats, total
+
+def session_feature_frame(sessions: pd.DataFrame, activity_stats: Dict[int, Dict], session_stats: Dict[int, Dict],
+                          session_keys: Sequence[str]) -> pd.DataFrame:
+    """
+    Columnar user features for each session row, for FeatureEngineer's batch
+    featurizers: the session's hour and weekday, the user's activity stats,
+    and the given keys of the user's session stats. Stats a user lacks are
+    left missing, so the featurizers apply their defaults.
+    """
+    frame = pd.DataFrame({
+        'user_id': sessions['user_id'].to_numpy(),
+        'hour_of_day': sessions['hour'].to_numpy() if 'hour' in sessions else 12,
+        'day_of_week': sessions['day_of_week'].to_numpy() if 'day_of_week' in sessions else 0,
+    })
+    user_ids = frame['user_id']
+    for key in ('completion_rate', 'pending_tasks', 'high_priority_tasks', 'recent_mood', 'current_streak', 'level'):
+        per_user = {user_id: stats[key] for user_id, stats in activity_stats.items() if key in stats}
+        frame[key] = user_ids.map(per_user)
+    for key in session_keys:
+        per_user = {user_id: stats[key] for user_id, stats in session_stats.items() if key in stats}
+        frame[key] = user_ids.map(per_user)
+    return frame
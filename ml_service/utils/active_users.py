@@ -0,0 +1,222 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bisect
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Optional
+
+from loguru import logger
+from config.config import settings
+from utils.db_pool import get_inference_pool
+from utils.feature_cache import on_user_activity
+from utils.inference_features import features_from_rows
+from utils.user_features import UserFeatures
+
+# Users with any activity in the window, plus users whose gamification row
+# isn't the cold-start default (their features differ even with no activity)
+ACTIVE_USERS_QUERY = """
+    SELECT user_id FROM timer_sessions
+    WHERE completed_at >= NOW() - make_interval(days => %(days)s) AND user_id IS NOT NULL
+    UNION
+    SELECT user_id FROM tasks
+    WHERE created_at >= NOW() - make_interval(days => %(days)s) AND user_id IS NOT NULL
+    UNION
+    SELECT user_id FROM mood_logs
+    WHERE created_at >= NOW() - make_interval(days => %(days)s) AND user_id IS NOT NULL
+"""
+
+NON_DEFAULT_GAMIFICATION_QUERY = """
+    SELECT ug.user_id, ug.streak, ug.level
+    FROM user_gamification ug
+    JOIN users u ON ug.user_id = u.id
+    WHERE ug.streak <> 0 OR ug.level <> 1
+    ORDER BY ug.user_id
+"""
+
+class ActiveUserSet:
+    """
+    Bitmap of the users with activity in the last ACTIVE_USERS_DAYS, so
+    feature requests for everyone else return cold-start features without
+    touching the database.
+    
+    Users outside the set get exactly what the feature queries would return
+    for them: defaults, plus their streak/level, kept in compact sorted
+    arrays for the (few) inactive users whose gamification isn't the default.
+    
+    Refreshed by a background thread. Between refreshes, activity
+    notifications (see utils/feature_cache.py) add users as they become
+    active; if notifications may have been missed the set is not trusted
+    until the next refresh.
+    """
+    
+    def __init__(self, days: int = None, refresh_interval: float = None):
+        self.days = days or settings.ACTIVE_USERS_DAYS
+        self.refresh_interval = refresh_interval or settings.ACTIVE_USERS_REFRESH_SECONDS
+        self._bitmap = bytearray()
+        self._gamification_ids = array('q')
+        self._gamification = array('q')
+        self._lock = threading.Lock()
+        # Users seen active while a refresh is running, re-applied to its result
+        self._pending = set()
+        self._refresh_started_at = 0.0
+        self._refreshed_at = 0.0
+        self._untrusted_since = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.active_users = 0
+        self.short_circuits = 0
+    
+    @property
+    def ready(self) -> bool:
+        """Loaded recently, with no missed notifications since that refresh began"""
+        return (self._refreshed_at > 0
+                and self._refresh_started_at > self._untrusted_since
+                and time.monotonic() - self._refreshed_at < max(3 * self.refresh_interval, 60))
+    
+    @staticmethod
+    def _set_bit(bitmap: bytearray, user_id: int):
+        index = user_id >> 3
+        if index >= len(bitmap):
+            bitmap.extend(bytes(index + 1 - len(bitmap)))
+        bitmap[index] |= 1 << (user_id & 7)
+    
+    def is_active(self, user_id: int) -> bool:
+        """Whether the user may have features other than the cold-start ones"""
+        bitmap = self._bitmap
+        index = user_id >> 3
+        return index < len(bitmap) and bool(bitmap[index] >> (user_id & 7) & 1)
+    
+    def mark_active(self, user_id: Optional[int]):
+        """Record new activity for a user (None: notifications may have been missed)"""
+        with self._lock:
+            if user_id is None:
+                self._untrusted_since = time.monotonic()
+                return
+            if user_id < 0:
+                return
+            self._set_bit(self._bitmap, user_id)
+            self._pending.add(user_id)
+    
+    def cold_start_features(self, user_id: int) -> UserFeatures:
+        """Features for a user outside the set, as the feature queries would compute them"""
+        gamification = None
+        with self._lock:
+            i = bisect.bisect_left(self._gamification_ids, user_id)
+            if i < len(self._gamification_ids) and self._gamification_ids[i] == user_id:
+                gamification = (self._gamification[2 * i], self._gamification[2 * i + 1])
+            self.short_circuits += 1
+        return features_from_rows(user_id, [], [], None, gamification, datetime.now())
+    
+    def refresh(self):
+        """Reload the set from the database"""
+        started = time.monotonic()
+        with self._lock:
+            self._pending = set()
+        
+        bitmap = bytearray()
+        active = 0
+        # Not the read replica unless it is fresh: a lagging copy would drop
+        # users whose activity notification already arrived
+        with get_inference_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(ACTIVE_USERS_QUERY, {'days': self.days})
+                for (user_id,) in cur.fetchall():
+                    self._set_bit(bitmap, user_id)
+                    active += 1
+                cur.execute(NON_DEFAULT_GAMIFICATION_QUERY)
+                gamification_rows = cur.fetchall()
+        
+        gamification_ids = array('q')
+        gamification = array('q')
+        for user_id, streak, level in gamification_rows:
+            index = user_id >> 3
+            if index < len(bitmap) and bitmap[index] >> (user_id & 7) & 1:
+                continue
+            gamification_ids.append(user_id)
+            gamification.extend((streak or 0, level or 1))
+        
+        with self._lock:
+            for user_id in self._pending:
+                self._set_bit(bitmap, user_id)
+            self._pending = set()
+            self._bitmap = bitmap
+            self._gamification_ids = gamification_ids
+            self._gamification = gamification
+            self._refresh_started_at = started
+            self._refreshed_at = time.monotonic()
+        self.active_users = active
+        logger.debug(f"Active user set refreshed: {active} active users in {self._refreshed_at - started:.2f}s")
+    
+    def stats(self) -> Dict:
+        """Set size, memory footprint and requests answered without the database"""
+        return {
+            'ready': self.ready,
+            'active_users': self.active_users,
+            'inactive_with_gamification': len(self._gamification_ids),
+            'memory_bytes': len(self._bitmap) + self._gamification_ids.itemsize * (len(self._gamification_ids) + len(self._gamification)),
+            'short_circuits': self.short_circuits,
+        }
+    
+    def start(self):
+        """Load and keep refreshing in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="active-users-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the refresh thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Active user set refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+
+# Process-wide set shared by DataLoader and AsyncDataLoader
+_active_users: Optional[ActiveUserSet] = None
+_active_users_lock = threading.Lock()
+
+def get_active_user_set() -> Optional[ActiveUserSet]:
+    """Return the shared active user set, or None when it is disabled"""
+    global _active_users
+    if not settings.ACTIVE_USERS_ENABLED:
+        return None
+    if _active_users is None:
+        with _active_users_lock:
+            if _active_users is None:
+                _active_users = ActiveUserSet()
+                on_user_activity(_active_users.mark_active)
+    return _active_users
+
+def inactive_user_features(user_id: int, days: int = 7) -> Optional[UserFeatures]:
+    """Cold-start features if the user is known to be inactive over `days`, else None"""
+    active_users = get_active_user_set()
+    if active_users is None or days != active_users.days or not active_users.ready:
+        return None
+    if active_users.is_active(user_id):
+        return None
+    return active_users.cold_start_features(user_id)
+
+def start_active_user_set():
+    """Start background refreshes of the shared set (e.g. on app startup)"""
+    active_users = get_active_user_set()
+    if active_users is not None:
+        active_users.start()
+        logger.info(f"✅ Active user set enabled (last {active_users.days} days, refresh every {active_users.refresh_interval}s)")
+
+def stop_active_user_set():
+    """Stop background refreshes (e.g. on app shutdown)"""
+    if _active_users is not None:
+        _active_users.stop()
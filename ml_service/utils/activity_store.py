@@ -0,0 +1,288 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from config.config import settings
+from utils.db_pool import get_read_pool
+from utils.inference_features import features_from_rows
+from utils.user_features import UserFeatures
+
+# Seconds between full reloads (incremental refreshes can't see deleted rows)
+FULL_RELOAD_SECONDS = 3600
+# Re-read this far behind each watermark for rows that committed late
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+# Tables held in memory: the columns to keep ("int", "cat" = dictionary-encoded
+# string, "time" = datetime64), the column rows are windowed and sorted on, and
+# the expression that advances whenever a row is written (the refresh watermark).
+ACTIVITY_TABLES = {
+    'timer_sessions': {
+        'columns': {'id': 'int', 'user_id': 'int', 'session_type': 'cat', 'duration': 'int', 'completed_at': 'time'},
+        'time_column': 'completed_at',
+        'written_at': 'completed_at',
+    },
+    'tasks': {
+        'columns': {'id': 'int', 'user_id': 'int', 'status': 'cat', 'priority': 'cat',
+                    'created_at': 'time', 'updated_at': 'time'},
+        'time_column': 'created_at',
+        'written_at': 'COALESCE(updated_at, created_at)',
+    },
+    'mood_logs': {
+        'columns': {'id': 'int', 'user_id': 'int', 'mood': 'cat', 'created_at': 'time'},
+        'time_column': 'created_at',
+        'written_at': 'created_at',
+    },
+}
+
+GAMIFICATION_QUERY = """
+    SELECT user_id, streak, level
+    FROM user_gamification
+    WHERE user_id IS NOT NULL
+"""
+
+class ColumnTable:
+    """
+    One table as parallel NumPy columns sorted by (user_id, time), with an
+    offset index (sorted user ids -> [start, stop)) to slice a user's rows
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], time_column: str):
+        self.columns = columns
+        self.time_column = time_column
+        self.users, self.starts, counts = np.unique(columns['user_id'], return_index=True, return_counts=True)
+        self.stops = self.starts + counts
+    
+    def __len__(self) -> int:
+        return len(self.columns['user_id'])
+    
+    def slice(self, user_id: int, since: np.datetime64) -> Dict[str, np.ndarray]:
+        """A user's rows with time >= since (views, not copies)"""
+        i = np.searchsorted(self.users, user_id)
+        if i == len(self.users) or self.users[i] != user_id:
+            return {name: col[:0] for name, col in self.columns.items()}
+        start, stop = int(self.starts[i]), int(self.stops[i])
+        start += int(np.searchsorted(self.columns[self.time_column][start:stop], since, side='left'))
+        return {name: col[start:stop] for name, col in self.columns.items()}
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.columns.values()) + self.users.nbytes + self.starts.nbytes + self.stops.nbytes
+
+class ActivityStore:
+    """
+    In-process copy of the last ACTIVITY_STORE_DAYS of sessions, tasks and
+    moods for every active user (plus gamification), so inference features
+    can be computed with no database round trip.
+    
+    A background thread refreshes it incrementally: only rows written since
+    each table's watermark are fetched and merged. Tables are rebuilt off to
+    the side and swapped in, so readers never see a half-applied refresh.
+    """
+    
+    def __init__(self, days: int = None, refresh_interval: float = None):
+        self.days = days or settings.ACTIVITY_STORE_DAYS
+        self.refresh_interval = refresh_interval or settings.ACTIVITY_STORE_REFRESH_SECONDS
+        self._tables: Dict[str, ColumnTable] = {}
+        self._gamification: Dict[int, Tuple] = {}
+        # Dictionary encoding per "table.column": value -> code and code -> value
+        self._codes: Dict[str, Dict] = {}
+        self._values: Dict[str, List] = {}
+        self._watermarks: Dict[str, datetime] = {}
+        self._refreshed_at = 0.0
+        self._full_reload_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+    
+    @property
+    def ready(self) -> bool:
+        """Loaded, and refreshed recently enough to serve features"""
+        return bool(self._tables) and time.monotonic() - self._refreshed_at < max(3 * self.refresh_interval, 60)
+    
+    def _encode(self, key: str, values) -> np.ndarray:
+        codes = self._codes.setdefault(key, {})
+        vocabulary = self._values.setdefault(key, [])
+        encoded = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(vocabulary)
+                vocabulary.append(value)
+            encoded[i] = code
+        return encoded
+    
+    def _decode(self, key: str, codes: np.ndarray) -> List:
+        vocabulary = self._values.get(key, [])
+        return [vocabulary[code] for code in codes.tolist()]
+    
+    def _to_columns(self, table: str, spec: Dict, rows: List[Tuple]) -> Dict[str, np.ndarray]:
+        columns = {}
+        for i, (name, kind) in enumerate(spec['columns'].items()):
+            values = [row[i] for row in rows]
+            if kind == 'int':
+                columns[name] = np.array(values, dtype=np.int64)
+            elif kind == 'cat':
+                columns[name] = self._encode(f"{table}.{name}", values)
+            else:
+                columns[name] = np.array(values, dtype='datetime64[us]')
+        return columns
+    
+    def _merge(self, table: str, spec: Dict, rows: List[Tuple], window_start: np.datetime64, full: bool) -> ColumnTable:
+        """Fold fetched rows into the table, keeping each row's newest copy inside the window"""
+        new = self._to_columns(table, spec, rows)
+        old = None if full else self._tables.get(table)
+        if old is not None:
+            columns = {name: np.concatenate([old.columns[name], new[name]]) for name in new}
+        else:
+            columns = new
+        
+        # Later copies (the fresh rows) win: unique over the reversed ids
+        ids = columns['id']
+        keep = len(ids) - 1 - np.unique(ids[::-1], return_index=True)[1]
+        time_column = spec['time_column']
+        keep = keep[columns[time_column][keep] >= window_start]
+        order = keep[np.lexsort((columns[time_column][keep], columns['user_id'][keep]))]
+        return ColumnTable({name: col[order] for name, col in columns.items()}, time_column)
+    
+    def refresh(self, full: bool = False):
+        """Fetch rows written since the last refresh (or everything) and swap them in"""
+        with self._refresh_lock:
+            started = time.monotonic()
+            full = full or not self._tables or started - self._full_reload_at > FULL_RELOAD_SECONDS
+            window_start = datetime.now() - timedelta(days=self.days)
+            tables = {}
+            watermarks = dict(self._watermarks)
+            
+            with get_read_pool().connection() as conn:
+                with conn.cursor() as cur:
+                    for table, spec in ACTIVITY_TABLES.items():
+                        query = (
+                            f"SELECT {', '.join(spec['columns'])}, {spec['written_at']} AS written_at "
+                            f"FROM {table} WHERE user_id IS NOT NULL AND {spec['time_column']} >= %(window_start)s"
+                        )
+                        params = {'window_start': window_start}
+                        since = None if full else watermarks.get(table)
+                        if since is not None:
+                            query += f" AND {spec['written_at']} >= %(since)s"
+                            params['since'] = since - REFRESH_OVERLAP
+                        cur.execute(query, params)
+                        rows = cur.fetchall()
+                        
+                        tables[table] = self._merge(table, spec, rows, np.datetime64(window_start, 'us'), full)
+                        written = [row[-1] for row in rows if row[-1] is not None]
+                        if written:
+                            watermarks[table] = max(max(written), since) if since else max(written)
+                    
+                    cur.execute(GAMIFICATION_QUERY)
+                    gamification = {user_id: (streak, level) for user_id, streak, level in cur.fetchall()}
+            
+            self._tables = tables
+            self._gamification = gamification
+            self._watermarks = watermarks
+            self._refreshed_at = time.monotonic()
+            if full:
+                self._full_reload_at = self._refreshed_at
+            self.refreshes += 1
+            self.last_refresh_seconds = self._refreshed_at - started
+            logger.debug(f"Activity store refreshed ({'full' if full else 'incremental'}) in {self.last_refresh_seconds:.2f}s")
+    
+    def get_user_features(self, user_id: int) -> UserFeatures:
+        """Compute inference features for a user from memory"""
+        now = datetime.now()
+        since = np.datetime64(now - timedelta(days=self.days), 'us')
+        tables = self._tables
+        
+        s = tables['timer_sessions'].slice(user_id, since)
+        sessions = list(zip(
+            self._decode('timer_sessions.session_type', s['session_type']),
+            s['duration'].tolist(),
+            s['completed_at'].astype(object),
+        ))
+        
+        t = tables['tasks'].slice(user_id, since)
+        tasks = list(zip(
+            self._decode('tasks.status', t['status']),
+            self._decode('tasks.priority', t['priority']),
+            t['created_at'].astype(object),
+            t['updated_at'].astype(object),
+        ))
+        
+        # Moods are sorted oldest first within the user
+        m = tables['mood_logs'].slice(user_id, since)
+        recent_mood = (self._decode('mood_logs.mood', m['mood'][-1:])[0],) if len(m['mood']) else None
+        
+        return features_from_rows(user_id, sessions, tasks, recent_mood, self._gamification.get(user_id), now)
+    
+    def stats(self) -> Dict:
+        """Row counts, active users and memory footprint"""
+        tables = self._tables
+        active_users = set()
+        for table in tables.values():
+            active_users.update(table.users.tolist())
+        return {
+            'ready': self.ready,
+            'rows': {name: len(table) for name, table in tables.items()},
+            'active_users': len(active_users),
+            'memory_bytes': sum(table.nbytes for table in tables.values()),
+            'refreshes': self.refreshes,
+            'last_refresh_seconds': round(self.last_refresh_seconds, 3),
+        }
+    
+    def start(self):
+        """Load and keep refreshing in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="activity-store-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the refresh thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Activity store refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+
+# Process-wide store shared by DataLoader and AsyncDataLoader
+_activity_store: Optional[ActivityStore] = None
+_activity_store_lock = threading.Lock()
+
+def get_activity_store() -> Optional[ActivityStore]:
+    """Return the shared activity store, or None when it is disabled"""
+    global _activity_store
+    if not settings.ACTIVITY_STORE_ENABLED:
+        return None
+    if _activity_store is None:
+        with _activity_store_lock:
+            if _activity_store is None:
+                _activity_store = ActivityStore()
+    return _activity_store
+
+def start_activity_store():
+    """Start background refreshes of the shared store (e.g. on app startup)"""
+    store = get_activity_store()
+    if store is not None:
+        store.start()
+        logger.info(f"✅ Activity store enabled (last {store.days} days, refresh every {store.refresh_interval}s)")
+
+def stop_activity_store():
+    """Stop background refreshes (e.g. on app shutdown)"""
+    if _activity_store is not None:
+        _activity_store.stop()
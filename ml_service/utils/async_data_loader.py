@@ -0,0 +1,308 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import asyncpg
+import pandas as pd
+from loguru import logger
+from config.config import settings
+from utils.data_loaders import (
+    DataLoader, USER_FEATURES_QUERY, USER_FEATURES_ROLLUP_QUERY,
+    DAILY_FOCUS_QUERY, DAILY_FOCUS_ROLLUP_QUERY, FOCUS_ROLLUP_RECHECK_SECONDS,
+    RECENT_MOODS_QUERY, RECENT_NOTES_QUERY,
+)
+from utils.db_pool import get_connection_params, to_positional_query
+from utils.feature_cache import get_feature_cache
+from utils.activity_store import get_activity_store
+from utils.active_users import inactive_user_features
+from utils.online_features import online_user_features
+from utils.user_features import UserFeatures
+from utils.single_flight import async_feature_flights
+
+# asyncpg uses $n placeholders (and caches prepared statements itself)
+_USER_FEATURES_QUERY, _USER_FEATURES_PARAMS = to_positional_query(USER_FEATURES_QUERY)
+_USER_FEATURES_ROLLUP_QUERY, _USER_FEATURES_ROLLUP_PARAMS = to_positional_query(USER_FEATURES_ROLLUP_QUERY)
+_DAILY_FOCUS_QUERY, _DAILY_FOCUS_PARAMS = to_positional_query(DAILY_FOCUS_QUERY)
+_DAILY_FOCUS_ROLLUP_QUERY, _DAILY_FOCUS_ROLLUP_PARAMS = to_positional_query(DAILY_FOCUS_ROLLUP_QUERY)
+_RECENT_MOODS_QUERY, _RECENT_MOODS_PARAMS = to_positional_query(RECENT_MOODS_QUERY)
+_RECENT_NOTES_QUERY, _RECENT_NOTES_PARAMS = to_positional_query(RECENT_NOTES_QUERY)
+
+class AsyncDataLoader:
+    """
+    asyncio counterpart of DataLoader for the FastAPI routers.
+    
+    Queries run on an asyncpg pool so a slow query only suspends the request
+    that issued it instead of blocking the event loop.
+    """
+    
+    def __init__(self):
+        self.pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+        self._focus_rollup: Optional[bool] = None
+        self._focus_rollup_checked_at = 0.0
+    
+    async def connect(self) -> asyncpg.Pool:
+        """Create the asyncpg pool on first use"""
+        if self.pool is not None:
+            return self.pool
+        
+        async with self._pool_lock:
+            if self.pool is None:
+                params = get_connection_params()
+                server_settings = {}
+                if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+                    # Every query on this pool is a latency-sensitive inference read
+                    server_settings['statement_timeout'] = str(int(settings.DB_STATEMENT_TIMEOUT_MS))
+                try:
+                    self.pool = await asyncpg.create_pool(
+                        host=params['host'],
+                        port=params['port'],
+                        database=params['database'],
+                        user=params['user'],
+                        password=params.get('password'),
+                        timeout=params['connect_timeout'],
+                        min_size=settings.DB_POOL_MIN_SIZE,
+                        max_size=settings.DB_POOL_MAX_SIZE,
+                        server_settings=server_settings,
+                    )
+                    logger.info(f"✅ Connected to database (async pool size {settings.DB_POOL_MIN_SIZE}-{settings.DB_POOL_MAX_SIZE})")
+                except Exception as e:
+                    logger.error(f"❌ Async database connection failed: {e}")
+                    raise
+        return self.pool
+    
+    async def close(self):
+        """Close the asyncpg pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Async database pool closed")
+    
+    async def _focus_rollup_ready(self) -> bool:
+        """Check (and cache) whether the user_daily_focus rollup is installed"""
+        if not settings.FOCUS_ROLLUP_ENABLED:
+            return False
+        
+        if self._focus_rollup or (self._focus_rollup is False
+                                  and time.monotonic() - self._focus_rollup_checked_at < FOCUS_ROLLUP_RECHECK_SECONDS):
+            return self._focus_rollup
+        
+        try:
+            pool = await self.connect()
+            self._focus_rollup = bool(await pool.fetchval("SELECT to_regclass('user_daily_focus') IS NOT NULL"))
+        except Exception as e:
+            logger.warning(f"Could not check for user_daily_focus rollup: {e}")
+            self._focus_rollup = False
+        self._focus_rollup_checked_at = time.monotonic()
+        return self._focus_rollup
+    
+    async def get_user_moods(self, user_id: int, days: int = 30) -> pd.DataFrame:
+        """Load mood logs for a user"""
+        try:
+            query = """
+                SELECT
+                    ml.id,
+                    ml.user_id,
+                    ml.mood,
+                    ml.note,
+                    ml.created_at
+                FROM mood_logs ml
+                JOIN users u ON ml.user_id = u.id
+                WHERE ml.created_at >= NOW() - make_interval(days => $2)
+                    AND ml.user_id = $1
+                ORDER BY ml.created_at DESC
+            """
+            
+            pool = await self.connect()
+            rows = await pool.fetch(query, user_id, days)
+            
+            df = pd.DataFrame([dict(r) for r in rows], columns=['id', 'user_id', 'mood', 'note', 'created_at'])
+            if not df.empty:
+                df['created_at'] = pd.to_datetime(df['created_at'])
+            
+            logger.info(f"Loaded {len(df)} mood logs")
+            return df
+        
+        except Exception as e:
+            logger.error(f"Error loading moods: {e}")
+            return pd.DataFrame()
+    
+    async def _fetch_column(self, query: str, names: List[str], values: Dict) -> List:
+        """Run a single-column query and return its values"""
+        pool = await self.connect()
+        rows = await pool.fetch(query, *[values[name] for name in names])
+        return [row[0] for row in rows]
+    
+    async def get_recent_moods(self, user_id: int, days: int = 7, limit: int = 5) -> List[str]:
+        """The user's latest `limit` moods within the window, newest first"""
+        try:
+            return await self._fetch_column(_RECENT_MOODS_QUERY, _RECENT_MOODS_PARAMS,
+                                            {'user_id': user_id, 'days': days, 'limit': limit})
+        except Exception as e:
+            logger.error(f"Error loading recent moods: {e}")
+            return []
+    
+    async def get_recent_notes(self, user_id: int, days: int = 1, limit: int = 3) -> List[str]:
+        """The user's latest `limit` non-empty mood notes within the window, newest first"""
+        try:
+            return await self._fetch_column(_RECENT_NOTES_QUERY, _RECENT_NOTES_PARAMS,
+                                            {'user_id': user_id, 'days': days, 'limit': limit})
+        except Exception as e:
+            logger.error(f"Error loading recent notes: {e}")
+            return []
+    
+    async def get_daily_focus_time(self, user_id: int, days: int = 7) -> pd.DataFrame:
+        """Get daily total focus time for trend analysis"""
+        try:
+            if await self._focus_rollup_ready():
+                query, names = _DAILY_FOCUS_ROLLUP_QUERY, _DAILY_FOCUS_ROLLUP_PARAMS
+            else:
+                query, names = _DAILY_FOCUS_QUERY, _DAILY_FOCUS_PARAMS
+            values = {'user_id': user_id, 'days': days, 'limit': days}
+            
+            pool = await self.connect()
+            rows = await pool.fetch(query, *[values[name] for name in names])
+            
+            df = pd.DataFrame(
+                [(r['date'], float(r['total_focus_minutes'] or 0)) for r in rows],
+                columns=['date', 'total_focus_minutes'],
+            )
+            if not df.empty:
+                df['date'] = pd.to_datetime(df['date'])
+                df = df.sort_values('date')
+            
+            logger.info(f"Loaded daily focus time for user {user_id}: {len(df)} days")
+            return df
+        
+        except Exception as e:
+            logger.error(f"Error loading daily focus time: {e}")
+            return pd.DataFrame(columns=['date', 'total_focus_minutes'])
+    
+    async def get_user_features(self, user_id: int, days: int = 7) -> UserFeatures:
+        """
+        Get comprehensive user features for inference (single round trip)
+        
+        The fetch is bounded by FEATURE_FETCH_DEADLINE_SECONDS; on timeout or
+        error the last cached features are served marked stale.
+        """
+        store = get_activity_store()
+        if store is not None and store.ready and days == store.days:
+            try:
+                return store.get_user_features(user_id)
+            except Exception as e:
+                logger.warning(f"Activity store lookup failed, querying the database: {e}")
+        
+        try:
+            features = online_user_features(user_id, days)
+            if features is not None:
+                return features
+        except Exception as e:
+            logger.warning(f"Online feature lookup failed, querying the database: {e}")
+        
+        # No activity in the window: cold-start features, no queries
+        features = inactive_user_features(user_id, days)
+        if features is not None:
+            return features
+        
+        # Cached entries use the 7-day window DataLoader.get_user_features uses
+        cache = get_feature_cache() if days == 7 else None
+        if cache is not None:
+            cached = cache.get(user_id)
+            if cached is not None:
+                return cached
+        
+        if settings.SINGLE_FLIGHT_ENABLED:
+            # Concurrent requests for this user share one fetch
+            return await async_feature_flights.do((days, user_id), self._load_user_features, user_id, days, cache)
+        return await self._load_user_features(user_id, days, cache)
+    
+    async def _load_user_features(self, user_id: int, days: int, cache) -> UserFeatures:
+        """Fetch features within the deadline and cache them, or fall back"""
+        try:
+            features = await asyncio.wait_for(
+                self._fetch_user_features(user_id, days),
+                timeout=settings.FEATURE_FETCH_DEADLINE_SECONDS or None,
+            )
+        
+        except asyncio.TimeoutError:
+            logger.warning(f"Feature fetch for user {user_id} exceeded {settings.FEATURE_FETCH_DEADLINE_SECONDS}s")
+            return DataLoader._fallback_features(user_id)
+        except Exception as e:
+            logger.error(f"Error getting user features: {e}")
+            return DataLoader._fallback_features(user_id)
+        
+        if cache is not None:
+            cache.set(user_id, features)
+        return features
+    
+    async def _fetch_user_features(self, user_id: int, days: int) -> UserFeatures:
+        """Run the aggregated feature query"""
+        now = datetime.now()
+        values = DataLoader._feature_params(user_id, days, now.date())
+        
+        if await self._focus_rollup_ready():
+            query, names = _USER_FEATURES_ROLLUP_QUERY, _USER_FEATURES_ROLLUP_PARAMS
+        else:
+            query, names = _USER_FEATURES_QUERY, _USER_FEATURES_PARAMS
+        
+        pool = await self.connect()
+        row = await pool.fetchrow(query, *[values[name] for name in names])
+        
+        return DataLoader._features_from_row(user_id, row, now)
+
+class EmbeddedAsyncDataLoader(AsyncDataLoader):
+    """
+    AsyncDataLoader for DB_BACKEND=sqlite: there is no asyncpg pool, so the
+    sync DataLoader (on the embedded database) runs in worker threads. The
+    activity store, cache and deadline in get_user_features still apply.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._data_loader: Optional[DataLoader] = None
+    
+    def _loader(self) -> DataLoader:
+        if self._data_loader is None:
+            self._data_loader = DataLoader()
+        return self._data_loader
+    
+    async def connect(self):
+        return None
+    
+    async def close(self):
+        self._data_loader = None
+    
+    async def get_user_moods(self, user_id: int, days: int = 30) -> pd.DataFrame:
+        return await asyncio.to_thread(self._loader().get_user_moods, user_id, days)
+    
+    async def get_recent_moods(self, user_id: int, days: int = 7, limit: int = 5) -> List[str]:
+        return await asyncio.to_thread(self._loader().get_recent_moods, user_id, days, limit)
+    
+    async def get_recent_notes(self, user_id: int, days: int = 1, limit: int = 3) -> List[str]:
+        return await asyncio.to_thread(self._loader().get_recent_notes, user_id, days, limit)
+    
+    async def get_daily_focus_time(self, user_id: int, days: int = 7) -> pd.DataFrame:
+        return await asyncio.to_thread(self._loader().get_daily_focus_time, user_id, days)
+    
+    async def _fetch_user_features(self, user_id: int, days: int) -> UserFeatures:
+        return await asyncio.to_thread(self._loader()._get_user_features_aggregated, user_id, days)
+
+# Process-wide async loader shared by all routers
+_async_data_loader: Optional[AsyncDataLoader] = None
+
+def get_async_data_loader() -> AsyncDataLoader:
+    """Return the shared AsyncDataLoader"""
+    global _async_data_loader
+    if _async_data_loader is None:
+        _async_data_loader = EmbeddedAsyncDataLoader() if settings.DB_BACKEND == "sqlite" else AsyncDataLoader()
+    return _async_data_loader
+
+async def close_async_data_loader():
+    """Close the shared AsyncDataLoader's pool"""
+    if _async_data_loader is not None:
+        await _async_data_loader.close()
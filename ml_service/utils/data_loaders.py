@@ -2,166 +2,754 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Optional
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Tuple
 import pandas as pd
 from datetime import datetime, timedelta
 from config.config import settings
+from utils.feature_cache import get_feature_cache
+from utils.activity_store import get_activity_store
+from utils.active_users import inactive_user_features
+from utils.online_features import online_user_features
+from utils.inference_features import (
+    INFERENCE_SESSIONS_QUERY, INFERENCE_TASKS_QUERY, INFERENCE_RECENT_MOOD_QUERY,
+    INFERENCE_GAMIFICATION_QUERY, features_from_rows, trend_features,
+)
+from utils.db_pool import PreparingConnection, get_inference_pool, get_pool, get_read_pool
+from utils.query_stats import estimate_bytes, query_stats
+from utils.single_flight import feature_flights
+from utils.user_features import UserFeatures
 from loguru import logger
 
+# Daily work minutes for the trend features, from raw sessions or from the
+# user_daily_focus rollup installed by utils/schema_bootstrap.py
+DAILY_FOCUS_RAW_CTE = """
+    daily_focus AS (
+        SELECT
+            DATE(completed_at) AS date,
+            SUM(duration) / 60.0 AS total_focus_minutes
+        FROM timer_sessions
+        WHERE user_id = %(user_id)s
+            AND session_type = 'work'
+            AND completed_at >= NOW() - make_interval(days => %(days)s)
+        GROUP BY DATE(completed_at)
+    )
+"""
+
+DAILY_FOCUS_ROLLUP_CTE = """
+    daily_focus AS (
+        SELECT
+            date,
+            total_duration / 60.0 AS total_focus_minutes
+        FROM user_daily_focus
+        WHERE user_id = %(user_id)s
+            AND date BETWEEN %(three_days_ago)s AND %(yesterday)s
+            AND session_count > 0
+    )
+"""
+
+BULK_DAILY_FOCUS_RAW_CTE = """
+    daily_focus AS (
+        SELECT
+            user_id,
+            SUM(duration) FILTER (WHERE DATE(completed_at) = %(yesterday)s) / 60.0 AS focus_time_yesterday,
+            SUM(duration) FILTER (WHERE DATE(completed_at) = %(day_before)s) / 60.0 AS focus_time_day_before,
+            SUM(duration) FILTER (WHERE DATE(completed_at) = %(three_days_ago)s) / 60.0 AS focus_time_three_days_ago
+        FROM timer_sessions
+        WHERE user_id = ANY(%(user_ids)s)
+            AND session_type = 'work'
+            AND completed_at >= NOW() - make_interval(days => %(days)s)
+        GROUP BY user_id
+    )
+"""
+
+BULK_DAILY_FOCUS_ROLLUP_CTE = """
+    daily_focus AS (
+        SELECT
+            user_id,
+            SUM(total_duration) FILTER (WHERE date = %(yesterday)s) / 60.0 AS focus_time_yesterday,
+            SUM(total_duration) FILTER (WHERE date = %(day_before)s) / 60.0 AS focus_time_day_before,
+            SUM(total_duration) FILTER (WHERE date = %(three_days_ago)s) / 60.0 AS focus_time_three_days_ago
+        FROM user_daily_focus
+        WHERE user_id = ANY(%(user_ids)s)
+            AND date BETWEEN %(three_days_ago)s AND %(yesterday)s
+        GROUP BY user_id
+    )
+"""
+
+# All inference features for one user in a single round trip. Mirrors the
+# per-table queries used by DataLoader._get_user_features_legacy.
+USER_FEATURES_QUERY_TEMPLATE = """
+    WITH sessions AS (
+        SELECT ts.session_type, ts.duration, ts.completed_at
+        FROM timer_sessions ts
+        JOIN users u ON ts.user_id = u.id
+        WHERE ts.user_id = %(user_id)s
+            AND ts.completed_at >= NOW() - make_interval(days => %(days)s)
+    ),
+    session_stats AS (
+        SELECT
+            COUNT(*) AS total_sessions,
+            AVG(duration) AS avg_session_duration,
+            AVG(duration) FILTER (WHERE session_type = 'work') AS avg_focus_duration,
+            AVG(duration) FILTER (WHERE session_type = 'shortBreak') AS avg_break_duration,
+            COUNT(*) FILTER (WHERE DATE(completed_at) = %(today)s) AS sessions_today
+        FROM sessions
+    ),
+    task_stats AS (
+        SELECT
+            COUNT(*) AS total_tasks,
+            AVG(CASE WHEN t.status = 'completed' THEN 1.0 ELSE 0.0 END) * 100 AS completion_rate,
+            COUNT(*) FILTER (WHERE t.status = 'pending') AS pending_tasks,
+            COUNT(*) FILTER (WHERE t.priority = 'high') AS high_priority_tasks,
+            AVG(EXTRACT(EPOCH FROM (t.updated_at - t.created_at)) / 60.0)
+                FILTER (WHERE t.status = 'completed') AS avg_task_completion_time
+        FROM tasks t
+        JOIN users u ON t.user_id = u.id
+        WHERE t.user_id = %(user_id)s
+            AND t.created_at >= NOW() - make_interval(days => %(days)s)
+    ),
+    latest_mood AS (
+        SELECT ml.mood
+        FROM mood_logs ml
+        JOIN users u ON ml.user_id = u.id
+        WHERE ml.user_id = %(user_id)s
+            AND ml.created_at >= NOW() - make_interval(days => %(days)s)
+        ORDER BY ml.created_at DESC
+        LIMIT 1
+    ),
+    gamification AS (
+        SELECT ug.streak, ug.level
+        FROM user_gamification ug
+        JOIN users u ON ug.user_id = u.id
+        WHERE ug.user_id = %(user_id)s
+        LIMIT 1
+    ),
+    {daily_focus_cte}
+    SELECT
+        ss.*,
+        tks.*,
+        (SELECT mood FROM latest_mood) AS recent_mood,
+        EXISTS (SELECT 1 FROM gamification) AS has_gamification,
+        (SELECT streak FROM gamification) AS current_streak,
+        (SELECT level FROM gamification) AS level,
+        (SELECT total_focus_minutes FROM daily_focus WHERE date = %(yesterday)s) AS focus_time_yesterday,
+        (SELECT total_focus_minutes FROM daily_focus WHERE date = %(day_before)s) AS focus_time_day_before,
+        (SELECT total_focus_minutes FROM daily_focus WHERE date = %(three_days_ago)s) AS focus_time_three_days_ago
+    FROM session_stats ss
+    CROSS JOIN task_stats tks
+"""
+
+USER_FEATURES_QUERY = USER_FEATURES_QUERY_TEMPLATE.format(daily_focus_cte=DAILY_FOCUS_RAW_CTE.strip())
+USER_FEATURES_ROLLUP_QUERY = USER_FEATURES_QUERY_TEMPLATE.format(daily_focus_cte=DAILY_FOCUS_ROLLUP_CTE.strip())
+
+# Same aggregates as USER_FEATURES_QUERY for many users at once, one row per
+# requested user (users without activity get NULL/zero aggregates).
+USER_FEATURES_BULK_QUERY_TEMPLATE = """
+    WITH requested AS (
+        SELECT DISTINCT unnest(%(user_ids)s::int[]) AS user_id
+    ),
+    session_stats AS (
+        SELECT
+            ts.user_id,
+            COUNT(*) AS total_sessions,
+            AVG(ts.duration) AS avg_session_duration,
+            AVG(ts.duration) FILTER (WHERE ts.session_type = 'work') AS avg_focus_duration,
+            AVG(ts.duration) FILTER (WHERE ts.session_type = 'shortBreak') AS avg_break_duration,
+            COUNT(*) FILTER (WHERE DATE(ts.completed_at) = %(today)s) AS sessions_today
+        FROM timer_sessions ts
+        JOIN users u ON ts.user_id = u.id
+        WHERE ts.user_id = ANY(%(user_ids)s)
+            AND ts.completed_at >= NOW() - make_interval(days => %(days)s)
+        GROUP BY ts.user_id
+    ),
+    task_stats AS (
+        SELECT
+            t.user_id,
+            COUNT(*) AS total_tasks,
+            AVG(CASE WHEN t.status = 'completed' THEN 1.0 ELSE 0.0 END) * 100 AS completion_rate,
+            COUNT(*) FILTER (WHERE t.status = 'pending') AS pending_tasks,
+            COUNT(*) FILTER (WHERE t.priority = 'high') AS high_priority_tasks,
+            AVG(EXTRACT(EPOCH FROM (t.updated_at - t.created_at)) / 60.0)
+                FILTER (WHERE t.status = 'completed') AS avg_task_completion_time
+        FROM tasks t
+        JOIN users u ON t.user_id = u.id
+        WHERE t.user_id = ANY(%(user_ids)s)
+            AND t.created_at >= NOW() - make_interval(days => %(days)s)
+        GROUP BY t.user_id
+    ),
+    latest_mood AS (
+        SELECT DISTINCT ON (ml.user_id) ml.user_id, ml.mood
+        FROM mood_logs ml
+        JOIN users u ON ml.user_id = u.id
+        WHERE ml.user_id = ANY(%(user_ids)s)
+            AND ml.created_at >= NOW() - make_interval(days => %(days)s)
+        ORDER BY ml.user_id, ml.created_at DESC
+    ),
+    gamification AS (
+        SELECT DISTINCT ON (ug.user_id) ug.user_id, ug.streak, ug.level
+        FROM user_gamification ug
+        JOIN users u ON ug.user_id = u.id
+        WHERE ug.user_id = ANY(%(user_ids)s)
+        ORDER BY ug.user_id
+    ),
+    {daily_focus_cte}
+    SELECT
+        r.user_id,
+        COALESCE(ss.total_sessions, 0) AS total_sessions,
+        ss.avg_session_duration,
+        ss.avg_focus_duration,
+        ss.avg_break_duration,
+        COALESCE(ss.sessions_today, 0) AS sessions_today,
+        COALESCE(tks.total_tasks, 0) AS total_tasks,
+        tks.completion_rate,
+        COALESCE(tks.pending_tasks, 0) AS pending_tasks,
+        COALESCE(tks.high_priority_tasks, 0) AS high_priority_tasks,
+        tks.avg_task_completion_time,
+        lm.mood AS recent_mood,
+        g.user_id IS NOT NULL AS has_gamification,
+        g.streak AS current_streak,
+        g.level,
+        df.focus_time_yesterday,
+        df.focus_time_day_before,
+        df.focus_time_three_days_ago
+    FROM requested r
+    LEFT JOIN session_stats ss ON ss.user_id = r.user_id
+    LEFT JOIN task_stats tks ON tks.user_id = r.user_id
+    LEFT JOIN latest_mood lm ON lm.user_id = r.user_id
+    LEFT JOIN gamification g ON g.user_id = r.user_id
+    LEFT JOIN daily_focus df ON df.user_id = r.user_id
+"""
+
+USER_FEATURES_BULK_QUERY = USER_FEATURES_BULK_QUERY_TEMPLATE.format(daily_focus_cte=BULK_DAILY_FOCUS_RAW_CTE.strip())
+USER_FEATURES_BULK_ROLLUP_QUERY = USER_FEATURES_BULK_QUERY_TEMPLATE.format(daily_focus_cte=BULK_DAILY_FOCUS_ROLLUP_CTE.strip())
+
+DAILY_FOCUS_QUERY = """
+    SELECT 
+        DATE(completed_at) as date,
+        SUM(duration) / 60.0 as total_focus_minutes
+    FROM timer_sessions
+    WHERE user_id = %(user_id)s 
+        AND session_type = 'work' 
+        AND completed_at >= NOW() - make_interval(days => %(days)s)
+    GROUP BY DATE(completed_at)
+    ORDER BY date DESC
+    LIMIT %(limit)s
+"""
+
+DAILY_FOCUS_ROLLUP_QUERY = """
+    SELECT 
+        date,
+        total_duration / 60.0 as total_focus_minutes
+    FROM user_daily_focus
+    WHERE user_id = %(user_id)s 
+        AND session_count > 0
+        AND date >= DATE(NOW() - make_interval(days => %(days)s))
+    ORDER BY date DESC
+    LIMIT %(limit)s
+"""
+
+# Latest-N lookups: the limit is applied in SQL and only the one column the
+# caller uses is read (served by idx_ml_mood_logs_user_created)
+RECENT_MOODS_QUERY = """
+    SELECT mood
+    FROM mood_logs
+    WHERE user_id = %(user_id)s
+        AND created_at >= NOW() - make_interval(days => %(days)s)
+    ORDER BY created_at DESC
+    LIMIT %(limit)s
+"""
+
+RECENT_NOTES_QUERY = """
+    SELECT note
+    FROM mood_logs
+    WHERE user_id = %(user_id)s
+        AND created_at >= NOW() - make_interval(days => %(days)s)
+        AND note IS NOT NULL
+        AND note <> ''
+    ORDER BY created_at DESC
+    LIMIT %(limit)s
+"""
+
+# Seconds to wait before re-checking for the rollup table when it's missing
+FOCUS_ROLLUP_RECHECK_SECONDS = 300
+
+# COPY-based bulk export specs: the SELECT to stream, the optional time
+# column used for the day window, the column that advances whenever a row is
+# written (for incremental exports), and the pandas dtypes to parse into.
+COPY_EXPORTS = {
+    'timer_sessions': {
+        'select': """
+            SELECT ts.id, ts.user_id, ts.session_type, ts.duration, ts.completed_at
+            FROM timer_sessions ts
+            JOIN users u ON ts.user_id = u.id
+        """,
+        'time_column': 'ts.completed_at',
+        'watermark_column': 'ts.completed_at',
+        'dtypes': {'id': 'int64', 'user_id': 'int64', 'session_type': 'category', 'duration': 'int64'},
+        'dates': ['completed_at'],
+    },
+    'tasks': {
+        'select': """
+            SELECT
+                t.id, t.user_id, t.title, t.description, t.priority, t.status, t.tag,
+                t.due_date, t.created_at, t.updated_at,
+                CASE WHEN t.status = 'completed' THEN t.updated_at ELSE NULL END AS completed_at
+            FROM tasks t
+            JOIN users u ON t.user_id = u.id
+        """,
+        'time_column': 't.created_at',
+        'watermark_column': 't.updated_at',
+        'dtypes': {'id': 'int64', 'user_id': 'int64', 'title': 'object', 'description': 'object',
+                   'priority': 'category', 'status': 'category', 'tag': 'category'},
+        'dates': ['due_date', 'created_at', 'updated_at', 'completed_at'],
+    },
+    'mood_logs': {
+        'select': """
+            SELECT ml.id, ml.user_id, ml.mood, ml.note, ml.created_at
+            FROM mood_logs ml
+            JOIN users u ON ml.user_id = u.id
+        """,
+        'time_column': 'ml.created_at',
+        'watermark_column': 'ml.created_at',
+        'dtypes': {'id': 'int64', 'user_id': 'int64', 'mood': 'category', 'note': 'object'},
+        'dates': ['created_at'],
+    },
+    'user_gamification': {
+        'select': """
+            SELECT ug.user_id, ug.level, ug.points, ug.total_points, ug.streak, ug.last_activity_date
+            FROM user_gamification ug
+            JOIN users u ON ug.user_id = u.id
+        """,
+        'time_column': None,
+        'watermark_column': 'ug.updated_at',
+        'dtypes': {'user_id': 'int64', 'level': 'Int64', 'points': 'Int64', 'total_points': 'Int64', 'streak': 'Int64'},
+        'dates': ['last_activity_date'],
+    },
+}
+
+# Runs feature fetches so get_user_features can stop waiting at its deadline
+_feature_executor = ThreadPoolExecutor(max_workers=settings.DB_POOL_MAX_SIZE, thread_name_prefix="feature-fetch")
+
 class DataLoader:
+    # Whether the user_daily_focus rollup exists, and when that was last checked
+    _focus_rollup: Optional[bool] = None
+    _focus_rollup_checked_at: float = 0.0
+    _focus_rollup_lock = threading.Lock()
+    
     def __init__(self):
-        self.conn = None
+        # All loaders borrow connections from one process-wide pool (the
+        # primary); read-only traffic may be routed to the replica per query
+        self.pool = get_pool()
         self.connect()
     
     def connect(self):
-        """Establish database connection"""
-        try:
-            # Get password from settings, default to "postgres" if not set
-            password = settings.DB_PASSWORD
-            if not password or password == '':
-                password = "postgres"  # Default PostgreSQL password
-            
-            # Build connection parameters
-            conn_params = {
-                'host': settings.DB_HOST,
-                'port': settings.DB_PORT,
-                'database': settings.DB_NAME,
-                'user': settings.DB_USER,
-            }
-            
-            # Only add password if it's not None
-            if password:
-                conn_params['password'] = password
-            
-            self.conn = psycopg2.connect(**conn_params)
-            logger.info("✅ Connected to database")
-        except Exception as e:
-            logger.error(f"❌ Database connection failed: {e}")
-            logger.error(f"   Trying to connect to: {settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME} as {settings.DB_USER}")
-            raise
+        """Make sure the shared connection pool is reachable"""
+        with self.pool.connection():
+            pass
     
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+        """Release this loader; the shared pool stays open for other services"""
+        logger.debug("DataLoader released (shared pool remains open)")
+    
+    def _focus_rollup_ready(self, cur=None) -> bool:
+        """
+        Check (and cache) whether the user_daily_focus rollup is installed
+        
+        Pass the cursor of a connection already held to run the check on it
+        (the server the query will run on) instead of borrowing a second
+        connection, which could exhaust the pool. One caller rechecks at a
+        time; the others use the last known answer meanwhile.
+        """
+        if not settings.FOCUS_ROLLUP_ENABLED:
+            return False
+        
+        cls = DataLoader
+        if cls._focus_rollup_known():
+            return cls._focus_rollup
+        if not cls._focus_rollup_lock.acquire(blocking=False):
+            return bool(cls._focus_rollup)
+        
+        try:
+            if cls._focus_rollup_known():
+                return cls._focus_rollup
+            try:
+                if cur is not None:
+                    cls._focus_rollup = self._check_focus_rollup(cur)
+                else:
+                    with self.pool.connection() as conn:
+                        with conn.cursor() as own_cur:
+                            cls._focus_rollup = self._check_focus_rollup(own_cur)
+            except Exception as e:
+                logger.warning(f"Could not check for user_daily_focus rollup: {e}")
+                cls._focus_rollup = False
+            cls._focus_rollup_checked_at = time.monotonic()
+        finally:
+            cls._focus_rollup_lock.release()
+        
+        if not cls._focus_rollup:
+            logger.info("user_daily_focus rollup not installed, reading daily focus from timer_sessions")
+        return cls._focus_rollup
+    
+    @staticmethod
+    def _focus_rollup_known() -> bool:
+        """Installed, or found missing within the last FOCUS_ROLLUP_RECHECK_SECONDS"""
+        cls = DataLoader
+        return bool(cls._focus_rollup) or (
+            cls._focus_rollup is False
+            and time.monotonic() - cls._focus_rollup_checked_at < FOCUS_ROLLUP_RECHECK_SECONDS
+        )
+    
+    def _check_focus_rollup(self, cur) -> bool:
+        row = self._fetch(cur, 'focus_rollup_check', "SELECT to_regclass('user_daily_focus') IS NOT NULL AS ready", {}, one=True)
+        # Tuple or RealDictCursor row
+        return bool(row['ready'] if isinstance(row, dict) else row[0])
+    
+    @staticmethod
+    @contextmanager
+    def _inference_connection():
+        """
+        Borrow a connection for latency-sensitive per-user reads: primary
+        (unless the replica is fresh enough), with DB_STATEMENT_TIMEOUT_MS
+        applied to this transaction only
+        """
+        with get_inference_pool().connection() as conn:
+            if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+                with conn.cursor() as cur:
+                    cur.execute(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+            yield conn
+    
+    def _connection(self, user_id: Optional[int]):
+        """
+        Per-user reads serve inference (see _inference_connection); all-user
+        reads are training/bulk and go to the read replica when configured
+        """
+        if user_id:
+            return self._inference_connection()
+        return get_read_pool().connection()
     
-    def get_user_sessions(self, user_id: Optional[int] = None, days: int = 30) -> pd.DataFrame:
+    @staticmethod
+    def _prepared_statement(conn, query: str, params: Dict) -> Tuple[str, object]:
+        """
+        Route a parameterized query through the connection's prepared-statement
+        cache (PREPARE once, then EXECUTE) when enabled
+        """
+        if settings.DB_PREPARED_STATEMENTS and isinstance(conn, PreparingConnection):
+            return conn.prepare(query, params)
+        return query, params
+    
+    def _read_sql(self, conn, name: str, query: str, params: Dict) -> pd.DataFrame:
+        """Run a parameterized query into a DataFrame, recorded in query_stats as name"""
+        sql, args = self._prepared_statement(conn, query, params)
+        with query_stats.timed(name, query, params) as record:
+            df = pd.read_sql_query(sql, conn, params=args)
+            record.rows = len(df)
+            record.bytes = int(df.memory_usage(index=False).sum())
+        return df
+    
+    def _fetch(self, cur, name: str, query: str, params: Dict, one: bool = False):
+        """
+        Run a parameterized query on a cursor and return all rows (or the
+        first row when one=True), recorded in query_stats as name
+        """
+        sql, args = self._prepared_statement(cur.connection, query, params)
+        with query_stats.timed(name, query, params) as record:
+            cur.execute(sql, args)
+            rows = cur.fetchall()
+            record.rows = len(rows)
+            record.bytes = estimate_bytes(rows)
+        if one:
+            return rows[0] if rows else None
+        return rows
+    
+    @staticmethod
+    def _sessions_query(user_id: Optional[int], days: int) -> Tuple[str, Dict]:
+        """Build the timer sessions query"""
+        query = """
+            SELECT 
+                ts.id,
+                ts.user_id,
+                ts.session_type,
+                ts.duration,
+                ts.completed_at,
+                u.id as user_id_ref
+            FROM timer_sessions ts
+            JOIN users u ON ts.user_id = u.id
+            WHERE ts.completed_at >= NOW() - make_interval(days => %(days)s)
+        """
+        params = {'days': days}
+        
+        if user_id:
+            query += " AND ts.user_id = %(user_id)s"
+            params['user_id'] = user_id
+        
+        query += " ORDER BY ts.completed_at DESC"
+        return query, params
+    
+    @staticmethod
+    def _prepare_sessions(df: pd.DataFrame) -> pd.DataFrame:
+        """Add derived time columns to a sessions frame"""
+        if not df.empty:
+            df['completed_at'] = pd.to_datetime(df['completed_at'])
+            df['hour'] = df['completed_at'].dt.hour
+            df['day_of_week'] = df['completed_at'].dt.dayofweek
+            df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+        return df
+    
+    @staticmethod
+    def _tasks_query(user_id: Optional[int], days: int) -> Tuple[str, Dict]:
+        """Build the tasks query"""
+        query = """
+            SELECT 
+                t.id,
+                t.user_id,
+                t.title,
+                t.description,
+                t.priority,
+                t.status,
+                t.tag,
+                t.due_date,
+                t.created_at,
+                t.updated_at,
+                CASE 
+                    WHEN t.status = 'completed' THEN t.updated_at 
+                    ELSE NULL 
+                END as completed_at
+            FROM tasks t
+            JOIN users u ON t.user_id = u.id
+            WHERE t.created_at >= NOW() - make_interval(days => %(days)s)
+        """
+        params = {'days': days}
+        
+        if user_id:
+            query += " AND t.user_id = %(user_id)s"
+            params['user_id'] = user_id
+        
+        query += " ORDER BY t.created_at DESC"
+        return query, params
+    
+    @staticmethod
+    def _prepare_tasks(df: pd.DataFrame) -> pd.DataFrame:
+        """Add completion columns to a tasks frame"""
+        if not df.empty:
+            df['created_at'] = pd.to_datetime(df['created_at'])
+            df['updated_at'] = pd.to_datetime(df['updated_at'])
+            df['completed_at'] = pd.to_datetime(df['completed_at'], errors='coerce')
+            df['completion_time'] = (df['completed_at'] - df['created_at']).dt.total_seconds() / 60
+            df['is_completed'] = (df['status'] == 'completed').astype(int)
+        return df
+    
+    @staticmethod
+    def _moods_query(user_id: Optional[int], days: int) -> Tuple[str, Dict]:
+        """Build the mood logs query"""
+        query = """
+            SELECT 
+                ml.id,
+                ml.user_id,
+                ml.mood,
+                ml.note,
+                ml.created_at
+            FROM mood_logs ml
+            JOIN users u ON ml.user_id = u.id
+            WHERE ml.created_at >= NOW() - make_interval(days => %(days)s)
+        """
+        params = {'days': days}
+        
+        if user_id:
+            query += " AND ml.user_id = %(user_id)s"
+            params['user_id'] = user_id
+        
+        query += " ORDER BY ml.created_at DESC"
+        return query, params
+    
+    @staticmethod
+    def _prepare_moods(df: pd.DataFrame) -> pd.DataFrame:
+        """Parse timestamps in a mood logs frame"""
+        if not df.empty:
+            df['created_at'] = pd.to_datetime(df['created_at'])
+        return df
+    
+    def get_user_sessions(self, user_id: Optional[int] = None, days: int = 30, raise_errors: bool = False) -> pd.DataFrame:
         """Load timer sessions for training"""
         try:
-            query = """
-                SELECT 
-                    ts.id,
-                    ts.user_id,
-                    ts.session_type,
-                    ts.duration,
-                    ts.completed_at,
-                    u.id as user_id_ref
-                FROM timer_sessions ts
-                JOIN users u ON ts.user_id = u.id
-                WHERE ts.completed_at >= NOW() - INTERVAL '%s days'
-            """ % days
-            
-            if user_id:
-                query += " AND ts.user_id = %s" % user_id
-            
-            query += " ORDER BY ts.completed_at DESC"
+            with self._connection(user_id) as conn:
+                df = self._read_sql(conn, 'sessions', *self._sessions_query(user_id, days))
             
-            df = pd.read_sql_query(query, self.conn)
-            
-            if not df.empty:
-                df['completed_at'] = pd.to_datetime(df['completed_at'])
-                df['hour'] = df['completed_at'].dt.hour
-                df['day_of_week'] = df['completed_at'].dt.dayofweek
-                df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+            df = self._prepare_sessions(df)
             
             logger.info(f"Loaded {len(df)} timer sessions")
             return df
             
         except Exception as e:
             logger.error(f"Error loading sessions: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
     
-    def get_user_tasks(self, user_id: Optional[int] = None, days: int = 30) -> pd.DataFrame:
+    def get_user_tasks(self, user_id: Optional[int] = None, days: int = 30, raise_errors: bool = False) -> pd.DataFrame:
         """Load tasks for training"""
         try:
-            query = """
-                SELECT 
-                    t.id,
-                    t.user_id,
-                    t.title,
-                    t.description,
-                    t.priority,
-                    t.status,
-                    t.tag,
-                    t.due_date,
-                    t.created_at,
-                    t.updated_at,
-                    CASE 
-                        WHEN t.status = 'completed' THEN t.updated_at 
-                        ELSE NULL 
-                    END as completed_at
-                FROM tasks t
-                JOIN users u ON t.user_id = u.id
-                WHERE t.created_at >= NOW() - INTERVAL '%s days'
-            """ % days
-            
-            if user_id:
-                query += " AND t.user_id = %s" % user_id
-            
-            query += " ORDER BY t.created_at DESC"
-            
-            df = pd.read_sql_query(query, self.conn)
+            with self._connection(user_id) as conn:
+                df = self._read_sql(conn, 'tasks', *self._tasks_query(user_id, days))
             
-            if not df.empty:
-                df['created_at'] = pd.to_datetime(df['created_at'])
-                df['updated_at'] = pd.to_datetime(df['updated_at'])
-                df['completed_at'] = pd.to_datetime(df['completed_at'], errors='coerce')
-                df['completion_time'] = (df['completed_at'] - df['created_at']).dt.total_seconds() / 60
-                df['is_completed'] = (df['status'] == 'completed').astype(int)
+            df = self._prepare_tasks(df)
             
             logger.info(f"Loaded {len(df)} tasks")
             return df
             
         except Exception as e:
             logger.error(f"Error loading tasks: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
     
     def get_user_moods(self, user_id: Optional[int] = None, days: int = 30) -> pd.DataFrame:
         """Load mood logs for training"""
         try:
-            query = """
-                SELECT 
-                    ml.id,
-                    ml.user_id,
-                    ml.mood,
-                    ml.note,
-                    ml.created_at
-                FROM mood_logs ml
-                JOIN users u ON ml.user_id = u.id
-                WHERE ml.created_at >= NOW() - INTERVAL '%s days'
-            """ % days
+            with self._connection(user_id) as conn:
+                df = self._read_sql(conn, 'moods', *self._moods_query(user_id, days))
             
-            if user_id:
-                query += " AND ml.user_id = %s" % user_id
+            df = self._prepare_moods(df)
             
-            query += " ORDER BY ml.created_at DESC"
+            logger.info(f"Loaded {len(df)} mood logs")
+            return df
             
-            df = pd.read_sql_query(query, self.conn)
+        except Exception as e:
+            logger.error(f"Error loading moods: {e}")
+            return pd.DataFrame()
+    
+    def get_recent_moods(self, user_id: int, days: int = 7, limit: int = 5, raise_errors: bool = False) -> List[str]:
+        """The user's latest `limit` moods within the window, newest first"""
+        try:
+            with self._inference_connection() as conn:
+                with conn.cursor() as cur:
+                    rows = self._fetch(cur, 'recent_moods', RECENT_MOODS_QUERY,
+                                       {'user_id': user_id, 'days': days, 'limit': limit})
+            return [row[0] for row in rows]
             
-            if not df.empty:
-                df['created_at'] = pd.to_datetime(df['created_at'])
+        except Exception as e:
+            logger.error(f"Error loading recent moods: {e}")
+            if raise_errors:
+                raise
+            return []
+    
+    def get_recent_notes(self, user_id: int, days: int = 1, limit: int = 3) -> List[str]:
+        """The user's latest `limit` non-empty mood notes within the window, newest first"""
+        try:
+            with self._inference_connection() as conn:
+                with conn.cursor() as cur:
+                    rows = self._fetch(cur, 'recent_notes', RECENT_NOTES_QUERY,
+                                       {'user_id': user_id, 'days': days, 'limit': limit})
+            return [row[0] for row in rows]
             
-            logger.info(f"Loaded {len(df)} mood logs")
+        except Exception as e:
+            logger.error(f"Error loading recent notes: {e}")
+            return []
+    
+    def _stream_query(self, name: str, query: str, params: Dict, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Run a query through a named (server-side) cursor and yield DataFrames
+        of at most chunk_size rows, so the full result never sits in memory
+        """
+        total = 0
+        nbytes = 0
+        # Only time spent in the database counts, not the consumer's work between chunks
+        elapsed = 0.0
+        with get_read_pool().connection() as conn:
+            with conn.cursor(name=f"stream_{name}_{uuid.uuid4().hex[:8]}") as cur:
+                cur.itersize = chunk_size
+                started = time.perf_counter()
+                cur.execute(query, params)
+                
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    elapsed += time.perf_counter() - started
+                    if not rows:
+                        break
+                    total += len(rows)
+                    nbytes += estimate_bytes(rows)
+                    yield pd.DataFrame(rows, columns=[col[0] for col in cur.description])
+                    started = time.perf_counter()
+        
+        query_stats.record(f"stream_{name}", elapsed * 1000, total, nbytes, query=query, params=params)
+        logger.info(f"Streamed {total} rows from {name}")
+    
+    def iter_user_sessions(self, user_id: Optional[int] = None, days: int = 30,
+                           chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream timer sessions in fixed-size chunks (same columns as get_user_sessions)"""
+        chunk_size = chunk_size or settings.TRAINING_CHUNK_SIZE
+        for chunk in self._stream_query("timer_sessions", *self._sessions_query(user_id, days), chunk_size):
+            yield self._prepare_sessions(chunk)
+    
+    def iter_user_tasks(self, user_id: Optional[int] = None, days: int = 30,
+                        chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream tasks in fixed-size chunks (same columns as get_user_tasks)"""
+        chunk_size = chunk_size or settings.TRAINING_CHUNK_SIZE
+        for chunk in self._stream_query("tasks", *self._tasks_query(user_id, days), chunk_size):
+            yield self._prepare_tasks(chunk)
+    
+    def iter_user_moods(self, user_id: Optional[int] = None, days: int = 30,
+                        chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream mood logs in fixed-size chunks (same columns as get_user_moods)"""
+        chunk_size = chunk_size or settings.TRAINING_CHUNK_SIZE
+        for chunk in self._stream_query("mood_logs", *self._moods_query(user_id, days), chunk_size):
+            yield self._prepare_moods(chunk)
+    
+    def export_table(self, table: str, days: Optional[int] = None, since: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Bulk-load a table with COPY ... TO STDOUT (CSV) into typed pandas columns
+        
+        Much faster than read_sql_query for large extracts because rows are
+        never turned into Python objects one at a time. The CSV stream is
+        spooled to disk once it outgrows memory. Pass since to export only
+        rows written at or after that time (by the table's watermark column).
+        """
+        spec = COPY_EXPORTS[table]
+        try:
+            with get_read_pool().connection() as conn, query_stats.timed(f"export_{table}") as record:
+                with conn.cursor() as cur:
+                    conditions = []
+                    if days is not None and spec['time_column']:
+                        conditions.append(cur.mogrify(
+                            f"{spec['time_column']} >= NOW() - make_interval(days => %s)", (days,)
+                        ).decode())
+                    if since is not None:
+                        conditions.append(cur.mogrify(f"{spec['watermark_column']} >= %s", (since,)).decode())
+                    
+                    select = spec['select']
+                    if conditions:
+                        select += " WHERE " + " AND ".join(conditions)
+                    
+                    buffer = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024, mode='w+b')
+                    cur.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+                    # COPY reports its row count in the command tag
+                    record.rows = max(cur.rowcount, 0)
+                    record.bytes = buffer.tell()
+            
+            buffer.seek(0)
+            with buffer:
+                df = pd.read_csv(
+                    buffer,
+                    dtype=spec['dtypes'],
+                    parse_dates=spec['dates'],
+                    keep_default_na=False,
+                    na_values=[''],
+                )
+            
+            logger.info(f"Exported {len(df)} rows from {table} via COPY")
             return df
             
         except Exception as e:
-            logger.error(f"Error loading moods: {e}")
+            logger.error(f"Error exporting {table}: {e}")
             return pd.DataFrame()
     
-    def get_user_gamification(self, user_id: Optional[int] = None) -> pd.DataFrame:
+    def get_user_gamification(self, user_id: Optional[int] = None, raise_errors: bool = False) -> pd.DataFrame:
         """Load gamification data"""
         try:
             query = """
@@ -175,157 +763,362 @@ class DataLoader:
                 FROM user_gamification ug
                 JOIN users u ON ug.user_id = u.id
             """
+            params = {}
             
             if user_id:
-                query += " WHERE ug.user_id = %s" % user_id
+                query += " WHERE ug.user_id = %(user_id)s"
+                params['user_id'] = user_id
             
-            df = pd.read_sql_query(query, self.conn)
+            with self._connection(user_id) as conn:
+                df = self._read_sql(conn, 'gamification', query, params)
             
             logger.info(f"Loaded {len(df)} gamification records")
             return df
             
         except Exception as e:
             logger.error(f"Error loading gamification: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
     
-    def get_daily_focus_time(self, user_id: int, days: int = 7) -> pd.DataFrame:
+    @staticmethod
+    def _prepare_daily_focus(df: pd.DataFrame) -> pd.DataFrame:
+        """Parse and order a daily focus frame"""
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'])
+            df = df.sort_values('date')
+            df['total_focus_minutes'] = df['total_focus_minutes'].fillna(0)
+        return df
+    
+    def get_daily_focus_time(self, user_id: int, days: int = 7, raise_errors: bool = False) -> pd.DataFrame:
         """Get daily total focus time for trend analysis"""
         try:
-            # Use parameterized query - days is safe as it's always an integer from code
-            # PostgreSQL INTERVAL can be constructed using make_interval
-            query = """
-                SELECT 
-                    DATE(completed_at) as date,
-                    SUM(duration) / 60.0 as total_focus_minutes
-                FROM timer_sessions
-                WHERE user_id = %s 
-                    AND session_type = 'work' 
-                    AND completed_at >= NOW() - make_interval(days => %s)
-                GROUP BY DATE(completed_at)
-                ORDER BY date DESC
-                LIMIT %s
-            """
+            query = DAILY_FOCUS_ROLLUP_QUERY if self._focus_rollup_ready() else DAILY_FOCUS_QUERY
             
-            df = pd.read_sql_query(query, self.conn, params=[user_id, days, days])
+            with self._inference_connection() as conn:
+                df = self._read_sql(conn, 'daily_focus', query, {'user_id': user_id, 'days': days, 'limit': days})
             
-            if not df.empty:
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.sort_values('date')
-                df['total_focus_minutes'] = df['total_focus_minutes'].fillna(0)
+            df = self._prepare_daily_focus(df)
             
             logger.info(f"Loaded daily focus time for user {user_id}: {len(df)} days")
             return df
             
         except Exception as e:
             logger.error(f"Error loading daily focus time: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame(columns=['date', 'total_focus_minutes'])
     
-    def get_user_features(self, user_id: int) -> Dict:
-        """Get comprehensive user features for inference"""
+    def get_user_features(self, user_id: int) -> UserFeatures:
+        """
+        Get comprehensive user features for inference
+        
+        The fetch is bounded by FEATURE_FETCH_DEADLINE_SECONDS; on timeout or
+        error the last cached features are served marked stale.
+        """
+        # The store only answers for the 7-day window the database path uses
+        store = get_activity_store()
+        if store is not None and store.ready and store.days == 7:
+            try:
+                return store.get_user_features(user_id)
+            except Exception as e:
+                logger.warning(f"Activity store lookup failed, querying the database: {e}")
+        
         try:
-            # Get recent data
-            sessions = self.get_user_sessions(user_id=user_id, days=7)
-            tasks = self.get_user_tasks(user_id=user_id, days=7)
-            moods = self.get_user_moods(user_id=user_id, days=7)
-            gamification = self.get_user_gamification(user_id=user_id)
-            
-            # Get daily focus time patterns for trend analysis
-            daily_focus = self.get_daily_focus_time(user_id=user_id, days=7)
-            
-            features = {
-                'user_id': user_id,
-                'total_sessions': len(sessions),
-                'avg_session_duration': sessions['duration'].mean() if not sessions.empty else 25,
-                'completion_rate': (tasks['is_completed'].mean() * 100) if not tasks.empty and 'is_completed' in tasks.columns else 50,
-                'current_streak': gamification['streak'].iloc[0] if not gamification.empty else 0,
-                'level': gamification['level'].iloc[0] if not gamification.empty else 1,
-                'recent_mood': moods['mood'].iloc[0] if not moods.empty else 'neutral',
-                'hour_of_day': datetime.now().hour,
-                'day_of_week': datetime.now().weekday(),
-                'is_weekend': 1 if datetime.now().weekday() >= 5 else 0,
-            }
-            
-            # Task-related features
-            if not tasks.empty:
-                features['pending_tasks'] = len(tasks[tasks['status'] == 'pending'])
-                features['high_priority_tasks'] = len(tasks[tasks['priority'] == 'high'])
-                features['avg_task_completion_time'] = tasks['completion_time'].mean() if 'completion_time' in tasks.columns else 0
+            features = online_user_features(user_id)
+            if features is not None:
+                return features
+        except Exception as e:
+            logger.warning(f"Online feature lookup failed, querying the database: {e}")
+        
+        # No activity in the window: cold-start features, no queries
+        features = inactive_user_features(user_id)
+        if features is not None:
+            return features
+        
+        cache = get_feature_cache()
+        if cache is not None:
+            cached = cache.get(user_id)
+            if cached is not None:
+                return cached
+        
+        if settings.SINGLE_FLIGHT_ENABLED:
+            # Concurrent requests for this user share one fetch
+            return feature_flights.do((settings.FEATURE_QUERY_MODE, user_id), self._load_user_features, user_id, cache)
+        return self._load_user_features(user_id, cache)
+    
+    def _load_user_features(self, user_id: int, cache) -> UserFeatures:
+        """Fetch features within the deadline and cache them, or fall back"""
+        fetch = {
+            'legacy': self._get_user_features_legacy,
+            'python': self._get_user_features_python,
+        }.get(settings.FEATURE_QUERY_MODE, self._get_user_features_aggregated)
+        try:
+            if settings.FEATURE_FETCH_DEADLINE_SECONDS > 0:
+                # The worker keeps running after a timeout, but statement_timeout bounds it
+                features = _feature_executor.submit(fetch, user_id).result(timeout=settings.FEATURE_FETCH_DEADLINE_SECONDS)
             else:
-                features['pending_tasks'] = 0
-                features['high_priority_tasks'] = 0
-                features['avg_task_completion_time'] = 0
+                features = fetch(user_id)
             
-            # Session-related features
-            if not sessions.empty:
-                features['avg_focus_duration'] = sessions[sessions['session_type'] == 'work']['duration'].mean() if 'work' in sessions['session_type'].values else 25
-                features['avg_break_duration'] = sessions[sessions['session_type'] == 'shortBreak']['duration'].mean() if 'shortBreak' in sessions['session_type'].values else 5
-                features['sessions_today'] = len(sessions[sessions['completed_at'].dt.date == datetime.now().date()])
-            else:
-                features['avg_focus_duration'] = 25
-                features['avg_break_duration'] = 5
-                features['sessions_today'] = 0
+        except FutureTimeoutError:
+            logger.warning(f"Feature fetch for user {user_id} exceeded {settings.FEATURE_FETCH_DEADLINE_SECONDS}s")
+            return self._fallback_features(user_id)
+        except Exception as e:
+            logger.error(f"Error getting user features: {e}")
+            return self._fallback_features(user_id)
+        
+        if cache is not None:
+            cache.set(user_id, features)
+        return features
+    
+    @staticmethod
+    def _fallback_features(user_id: int) -> UserFeatures:
+        """Last known good features marked stale, or defaults if none are cached"""
+        cache = get_feature_cache()
+        cached = cache.get_stale(user_id) if cache is not None else None
+        if cached is None:
+            return DataLoader._default_features(user_id)
+        
+        features, age = cached
+        now = datetime.now()
+        features.update({
+            'hour_of_day': now.hour,
+            'day_of_week': now.weekday(),
+            'is_weekend': 1 if now.weekday() >= 5 else 0,
+            'stale': True,
+            'stale_age_seconds': round(age, 1),
+        })
+        logger.info(f"Serving stale features for user {user_id} ({age:.0f}s old)")
+        return features
+    
+    def get_user_features_bulk(self, user_ids: List[int], days: int = 7) -> Dict[int, UserFeatures]:
+        """
+        Get inference features for many users with one set-based query
+        
+        Returns a mapping of user_id to the same features get_user_features
+        would produce for that user.
+        """
+        requested = list(dict.fromkeys(int(uid) for uid in user_ids))
+        # Users with no activity in the window get cold-start features without a query
+        features = {}
+        for uid in requested:
+            cold_start = inactive_user_features(uid, days)
+            if cold_start is not None:
+                features[uid] = cold_start
+        user_ids = [uid for uid in requested if uid not in features]
+        if not user_ids:
+            return features
+        
+        try:
+            now = datetime.now()
+            today = now.date()
+            params = {
+                'user_ids': user_ids,
+                'days': days,
+                'today': today,
+                'yesterday': today - timedelta(days=1),
+                'day_before': today - timedelta(days=2),
+                'three_days_ago': today - timedelta(days=3),
+            }
             
-            # Daily focus time trend features
-            if not daily_focus.empty and len(daily_focus) >= 1:
-                # Get last 3 days of focus time (excluding today)
-                today = datetime.now().date()
-                daily_focus['date_only'] = daily_focus['date'].dt.date
-                
-                # Get yesterday's focus time
-                yesterday = today - timedelta(days=1)
-                yesterday_data = daily_focus[daily_focus['date_only'] == yesterday]
-                features['focus_time_yesterday'] = yesterday_data['total_focus_minutes'].iloc[0] if not yesterday_data.empty else 0
-                
-                # Get day before yesterday's focus time
-                day_before = today - timedelta(days=2)
-                day_before_data = daily_focus[daily_focus['date_only'] == day_before]
-                features['focus_time_day_before'] = day_before_data['total_focus_minutes'].iloc[0] if not day_before_data.empty else 0
-                
-                # Get 3 days ago focus time
-                three_days_ago = today - timedelta(days=3)
-                three_days_ago_data = daily_focus[daily_focus['date_only'] == three_days_ago]
-                features['focus_time_three_days_ago'] = three_days_ago_data['total_focus_minutes'].iloc[0] if not three_days_ago_data.empty else 0
-                
-                # Calculate trend (positive if increasing, negative if decreasing)
-                if features['focus_time_yesterday'] > 0 and features['focus_time_day_before'] > 0:
-                    features['daily_trend'] = features['focus_time_yesterday'] - features['focus_time_day_before']
-                elif features['focus_time_yesterday'] > 0:
-                    features['daily_trend'] = features['focus_time_yesterday']  # New pattern starting
-                else:
-                    features['daily_trend'] = 0
-                
-                # Average of last 3 days (for baseline)
-                last_3_days = [features['focus_time_yesterday'], features['focus_time_day_before'], features['focus_time_three_days_ago']]
-                last_3_days = [x for x in last_3_days if x > 0]
-                features['avg_focus_last_3_days'] = sum(last_3_days) / len(last_3_days) if last_3_days else 25
-            else:
-                # No historical data
-                features['focus_time_yesterday'] = 0
-                features['focus_time_day_before'] = 0
-                features['focus_time_three_days_ago'] = 0
-                features['daily_trend'] = 0
-                features['avg_focus_last_3_days'] = 25
+            with get_read_pool().connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    query = USER_FEATURES_BULK_ROLLUP_QUERY if self._focus_rollup_ready(cur) else USER_FEATURES_BULK_QUERY
+                    rows = self._fetch(cur, 'user_features_bulk', query, params)
             
-            return features
+            for row in rows:
+                features[row['user_id']] = self._features_from_row(row['user_id'], row, now)
+            logger.info(f"Loaded features for {len(rows)} users")
             
         except Exception as e:
-            logger.error(f"Error getting user features: {e}")
-            return {
-                'user_id': user_id,
-                'avg_focus_duration': 25,
-                'avg_break_duration': 5,
-                'completion_rate': 50,
-                'current_streak': 0,
-                'level': 1,
-                'hour_of_day': datetime.now().hour,
-                'day_of_week': datetime.now().weekday(),
-                'is_weekend': 0,
-                'pending_tasks': 0,
-                'high_priority_tasks': 0,
-                'focus_time_yesterday': 0,
-                'focus_time_day_before': 0,
-                'focus_time_three_days_ago': 0,
-                'daily_trend': 0,
-                'avg_focus_last_3_days': 25,
-            }
-
+            logger.error(f"Error getting bulk user features: {e}")
+            for uid in user_ids:
+                features[uid] = self._default_features(uid)
+        
+        return {uid: features[uid] for uid in requested}
+    
+    def _get_user_features_aggregated(self, user_id: int, days: int = 7) -> UserFeatures:
+        """Compute user features server-side in a single round trip"""
+        now = datetime.now()
+        params = self._feature_params(user_id, days, now.date())
+        
+        with self._inference_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                query = USER_FEATURES_ROLLUP_QUERY if self._focus_rollup_ready(cur) else USER_FEATURES_QUERY
+                row = self._fetch(cur, 'user_features', query, params, one=True)
+        
+        return self._features_from_row(user_id, row, now)
+    
+    @staticmethod
+    def _feature_params(user_id: int, days: int, today) -> Dict:
+        """Parameters for USER_FEATURES_QUERY; dates come from Python to match pandas"""
+        return {
+            'user_id': user_id,
+            'days': days,
+            'today': today,
+            'yesterday': today - timedelta(days=1),
+            'day_before': today - timedelta(days=2),
+            'three_days_ago': today - timedelta(days=3),
+        }
+    
+    @staticmethod
+    def _features_from_row(user_id: int, row: Dict, now: datetime) -> UserFeatures:
+        """Turn one aggregated feature row into inference features"""
+        total_sessions = int(row['total_sessions'])
+        total_tasks = int(row['total_tasks'])
+        
+        features = UserFeatures({
+            'user_id': user_id,
+            'total_sessions': total_sessions,
+            'avg_session_duration': float(row['avg_session_duration']) if total_sessions else 25,
+            'completion_rate': float(row['completion_rate']) if total_tasks else 50,
+            'current_streak': row['current_streak'] if row['has_gamification'] else 0,
+            'level': row['level'] if row['has_gamification'] else 1,
+            'recent_mood': row['recent_mood'] if row['recent_mood'] is not None else 'neutral',
+            'hour_of_day': now.hour,
+            'day_of_week': now.weekday(),
+            'is_weekend': 1 if now.weekday() >= 5 else 0,
+        })
+        
+        # Task-related features
+        if total_tasks:
+            features['pending_tasks'] = int(row['pending_tasks'])
+            features['high_priority_tasks'] = int(row['high_priority_tasks'])
+            # NaN (not 0) when tasks exist but none are completed, as pandas' mean() would give
+            completion_time = row['avg_task_completion_time']
+            features['avg_task_completion_time'] = float(completion_time) if completion_time is not None else float('nan')
+        else:
+            features['pending_tasks'] = 0
+            features['high_priority_tasks'] = 0
+            features['avg_task_completion_time'] = 0
+        
+        # Session-related features
+        if total_sessions:
+            features['avg_focus_duration'] = float(row['avg_focus_duration']) if row['avg_focus_duration'] is not None else 25
+            features['avg_break_duration'] = float(row['avg_break_duration']) if row['avg_break_duration'] is not None else 5
+            features['sessions_today'] = int(row['sessions_today'])
+        else:
+            features['avg_focus_duration'] = 25
+            features['avg_break_duration'] = 5
+            features['sessions_today'] = 0
+        
+        # Daily focus time trend features
+        features.update(trend_features(
+            float(row['focus_time_yesterday'] or 0),
+            float(row['focus_time_day_before'] or 0),
+            float(row['focus_time_three_days_ago'] or 0),
+        ))
+        
+        return features
+    
+    def _get_user_features_python(self, user_id: int, days: int = 7) -> UserFeatures:
+        """
+        Get user features with one query per table read as plain tuples and
+        reduced in Python (no DataFrames or datetime conversions)
+        """
+        now = datetime.now()
+        params = {'user_id': user_id, 'days': days}
+        
+        with self._inference_connection() as conn:
+            with conn.cursor() as cur:
+                sessions = self._fetch(cur, 'inference_sessions', INFERENCE_SESSIONS_QUERY, params)
+                tasks = self._fetch(cur, 'inference_tasks', INFERENCE_TASKS_QUERY, params)
+                recent_mood = self._fetch(cur, 'inference_recent_mood', INFERENCE_RECENT_MOOD_QUERY, params, one=True)
+                gamification = self._fetch(cur, 'inference_gamification', INFERENCE_GAMIFICATION_QUERY,
+                                           {'user_id': user_id}, one=True)
+        
+        return features_from_rows(user_id, sessions, tasks, recent_mood, gamification, now)
+    
+    def _get_user_features_legacy(self, user_id: int) -> UserFeatures:
+        """
+        Get user features with one query per table, aggregated in pandas
+        
+        Query errors (e.g. a statement_timeout cancellation) are raised rather
+        than read as an empty table, so the caller falls back instead of
+        caching zero-activity features.
+        """
+        # Get recent data
+        sessions = self.get_user_sessions(user_id=user_id, days=7, raise_errors=True)
+        tasks = self.get_user_tasks(user_id=user_id, days=7, raise_errors=True)
+        # Only the latest mood is used
+        moods = pd.DataFrame({'mood': self.get_recent_moods(user_id, days=7, limit=1, raise_errors=True)})
+        gamification = self.get_user_gamification(user_id=user_id, raise_errors=True)
+        
+        # Get daily focus time patterns for trend analysis
+        daily_focus = self.get_daily_focus_time(user_id=user_id, days=7, raise_errors=True)
+        
+        return self._legacy_features_from_frames(user_id, sessions, tasks, moods, gamification, daily_focus, datetime.now())
+    
+    @staticmethod
+    def _legacy_features_from_frames(user_id: int, sessions: pd.DataFrame, tasks: pd.DataFrame,
+                                     moods: pd.DataFrame, gamification: pd.DataFrame,
+                                     daily_focus: pd.DataFrame, now: datetime) -> UserFeatures:
+        """Aggregate per-table frames into inference features"""
+        features = UserFeatures({
+            'user_id': user_id,
+            'total_sessions': len(sessions),
+            'avg_session_duration': sessions['duration'].mean() if not sessions.empty else 25,
+            'completion_rate': (tasks['is_completed'].mean() * 100) if not tasks.empty and 'is_completed' in tasks.columns else 50,
+            'current_streak': gamification['streak'].iloc[0] if not gamification.empty else 0,
+            'level': gamification['level'].iloc[0] if not gamification.empty else 1,
+            'recent_mood': moods['mood'].iloc[0] if not moods.empty else 'neutral',
+            'hour_of_day': now.hour,
+            'day_of_week': now.weekday(),
+            'is_weekend': 1 if now.weekday() >= 5 else 0,
+        })
+        
+        # Task-related features
+        if not tasks.empty:
+            features['pending_tasks'] = len(tasks[tasks['status'] == 'pending'])
+            features['high_priority_tasks'] = len(tasks[tasks['priority'] == 'high'])
+            features['avg_task_completion_time'] = tasks['completion_time'].mean() if 'completion_time' in tasks.columns else 0
+        else:
+            features['pending_tasks'] = 0
+            features['high_priority_tasks'] = 0
+            features['avg_task_completion_time'] = 0
+        
+        # Session-related features
+        if not sessions.empty:
+            features['avg_focus_duration'] = sessions[sessions['session_type'] == 'work']['duration'].mean() if 'work' in sessions['session_type'].values else 25
+            features['avg_break_duration'] = sessions[sessions['session_type'] == 'shortBreak']['duration'].mean() if 'shortBreak' in sessions['session_type'].values else 5
+            features['sessions_today'] = len(sessions[sessions['completed_at'].dt.date == now.date()])
+        else:
+            features['avg_focus_duration'] = 25
+            features['avg_break_duration'] = 5
+            features['sessions_today'] = 0
+        
+        # Daily focus time trend features (last 3 days, excluding today)
+        focus_by_day = [0, 0, 0]
+        if not daily_focus.empty:
+            today = now.date()
+            daily_focus['date_only'] = daily_focus['date'].dt.date
+            for offset in range(3):
+                day_data = daily_focus[daily_focus['date_only'] == today - timedelta(days=offset + 1)]
+                if not day_data.empty:
+                    focus_by_day[offset] = day_data['total_focus_minutes'].iloc[0]
+        
+        features.update(trend_features(*focus_by_day))
+        
+        return features
+    
+    @staticmethod
+    def _default_features(user_id: int) -> UserFeatures:
+        """Fallback features used when the database can't be queried"""
+        return UserFeatures({
+            'user_id': user_id,
+            'avg_focus_duration': 25,
+            'avg_break_duration': 5,
+            'completion_rate': 50,
+            'current_streak': 0,
+            'level': 1,
+            'hour_of_day': datetime.now().hour,
+            'day_of_week': datetime.now().weekday(),
+            'is_weekend': 0,
+            'pending_tasks': 0,
+            'high_priority_tasks': 0,
+            'focus_time_yesterday': 0,
+            'focus_time_day_before': 0,
+            'focus_time_three_days_ago': 0,
+            'daily_trend': 0,
+            'avg_focus_last_3_days': 25,
+        })
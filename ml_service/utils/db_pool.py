@@ -0,0 +1,308 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extensions import connection as pg_connection
+from loguru import logger
+from config.config import settings
+from utils.embedded_db import EmbeddedPool
+
+def to_positional_query(query: str) -> Tuple[str, List[str]]:
+    """
+    Convert a pyformat query (%(name)s) to PostgreSQL's positional ($n) style.
+    
+    Returns the rewritten query and the parameter names in positional order.
+    Used for server-side PREPARE and for asyncpg, so one SQL text can be
+    shared by every execution path.
+    """
+    names: List[str] = []
+    
+    def replace(match):
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+    
+    return re.sub(r"%\((\w+)\)s", replace, query), names
+
+class PreparingConnection(pg_connection):
+    """
+    psycopg2 connection with a per-connection prepared-statement cache.
+    
+    The first execution of a query text PREPAREs it on the server; later
+    executions on the same connection run EXECUTE, skipping parse and plan.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, Tuple[str, List[str]]] = {}
+    
+    def prepare(self, query: str, params: Dict) -> Tuple[str, List]:
+        """Return (EXECUTE statement, positional args) for a pyformat query"""
+        entry = self.prepared.get(query)
+        if entry is None:
+            positional, names = to_positional_query(query)
+            name = f"ml_stmt_{len(self.prepared) + 1}"
+            with self.cursor() as cur:
+                cur.execute(f"PREPARE {name} AS {positional}")
+            entry = (name, names)
+            self.prepared[query] = entry
+        
+        name, names = entry
+        if not names:
+            return f"EXECUTE {name}", []
+        placeholders = ", ".join(["%s"] * len(names))
+        return f"EXECUTE {name}({placeholders})", [params[n] for n in names]
+
+def get_connection_params() -> Dict:
+    """Build psycopg2 connection parameters from settings"""
+    # Get password from settings, default to "postgres" if not set
+    password = settings.DB_PASSWORD
+    if not password or password == '':
+        password = "postgres"  # Default PostgreSQL password
+    
+    conn_params = {
+        'host': settings.DB_HOST,
+        'port': settings.DB_PORT,
+        'database': settings.DB_NAME,
+        'user': settings.DB_USER,
+        'connect_timeout': settings.DB_CONNECT_TIMEOUT,
+    }
+    
+    # Only add password if it's not None
+    if password:
+        conn_params['password'] = password
+    
+    return conn_params
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool shared by every DataLoader.
+    
+    Wraps psycopg2's ThreadedConnectionPool with:
+    - a semaphore so callers wait for a free connection instead of failing
+    - a health check on checkout that replaces dead connections
+    - lazy (re)creation of the underlying pool if the database was down
+    """
+    
+    def __init__(self, minconn: int = None, maxconn: int = None, name: str = "primary", **conn_params):
+        self.name = name
+        self.minconn = minconn if minconn is not None else settings.DB_POOL_MIN_SIZE
+        self.maxconn = maxconn if maxconn is not None else settings.DB_POOL_MAX_SIZE
+        self.conn_params = conn_params or get_connection_params()
+        self.conn_params.setdefault('connection_factory', PreparingConnection)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+    
+    def _ensure_pool(self):
+        """Create the underlying pool on first use or after it was torn down"""
+        if self._pool is not None and not self._pool.closed:
+            return self._pool
+        
+        with self._lock:
+            if self._pool is None or self._pool.closed:
+                try:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.minconn, self.maxconn, **self.conn_params
+                    )
+                    logger.info(f"✅ Connected to {self.name} database (pool size {self.minconn}-{self.maxconn})")
+                except Exception as e:
+                    logger.error(f"❌ Database connection failed ({self.name}): {e}")
+                    if 'dsn' not in self.conn_params:
+                        logger.error(f"   Trying to connect to: {settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME} as {settings.DB_USER}")
+                    raise
+        return self._pool
+    
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """Check that a pooled connection is still usable"""
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def getconn(self):
+        """Borrow a healthy connection, waiting for a free slot if needed"""
+        if not self._slots.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            raise pg_pool.PoolError(f"Timed out after {settings.DB_POOL_TIMEOUT}s waiting for a database connection")
+        
+        try:
+            db_pool = self._ensure_pool()
+            conn = db_pool.getconn()
+            
+            if not self._is_healthy(conn):
+                logger.warning("Discarding dead database connection, reconnecting")
+                db_pool.putconn(conn, close=True)
+                conn = db_pool.getconn()
+            
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection to the pool, closing it if it is broken"""
+        try:
+            if self._pool is None or self._pool.closed:
+                conn.close()
+                return
+            
+            if not discard and not conn.closed:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            
+            self._pool.putconn(conn, close=discard or bool(conn.closed))
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection for the duration of a block"""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except psycopg2.InterfaceError:
+            # Connection-level failure: don't hand this connection out again
+            discard = True
+            raise
+        # Other errors (including OperationalError such as QueryCanceledError
+        # from statement_timeout) leave the connection usable: putconn rolls it
+        # back, and closes it only if it is closed or the rollback fails
+        finally:
+            self.putconn(conn, discard=discard)
+    
+    def replication_lag(self) -> float:
+        """
+        Seconds this server is behind its primary (0 for a primary or a
+        standby that has replayed everything it received)
+        """
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT CASE
+                        WHEN NOT pg_is_in_recovery() THEN 0
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8,
+                                      'Infinity'::float8)
+                    END
+                """)
+                return float(cur.fetchone()[0])
+    
+    def close(self):
+        """Close every connection in the pool"""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+                logger.info(f"Database connection pool closed ({self.name})")
+            self._pool = None
+
+# Process-wide pools shared by all DataLoader instances
+_shared_pool: Optional[ConnectionPool] = None
+_replica_pool: Optional[ConnectionPool] = None
+_shared_pool_lock = threading.Lock()
+
+# How long a replica lag measurement is trusted before measuring again
+REPLICA_LAG_RECHECK_SECONDS = 5.0
+_replica_fresh = False
+_replica_checked_at = 0.0
+# How long bulk reads skip an unreachable replica before trying it again
+REPLICA_RETRY_SECONDS = 30.0
+_replica_failed_at: Optional[float] = None
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                if settings.DB_BACKEND == "sqlite":
+                    _shared_pool = EmbeddedPool()
+                else:
+                    _shared_pool = ConnectionPool()
+    return _shared_pool
+
+def get_replica_pool() -> Optional[ConnectionPool]:
+    """Return the read-replica pool, or None when no replica is configured"""
+    global _replica_pool
+    if not settings.DB_REPLICA_DSN or settings.DB_BACKEND == "sqlite":
+        return None
+    if _replica_pool is None:
+        with _shared_pool_lock:
+            if _replica_pool is None:
+                _replica_pool = ConnectionPool(
+                    name="replica",
+                    dsn=settings.DB_REPLICA_DSN,
+                    connect_timeout=settings.DB_CONNECT_TIMEOUT,
+                )
+    return _replica_pool
+
+def get_read_pool() -> ConnectionPool:
+    """
+    Pool for bulk and training reads: the replica when configured and
+    reachable, otherwise the primary. After a failed connect the replica is
+    skipped for REPLICA_RETRY_SECONDS rather than retried on every read.
+    """
+    global _replica_failed_at
+    replica = get_replica_pool()
+    if replica is None:
+        return get_pool()
+    if _replica_failed_at is not None and time.monotonic() - _replica_failed_at < REPLICA_RETRY_SECONDS:
+        return get_pool()
+    try:
+        replica._ensure_pool()
+        _replica_failed_at = None
+        return replica
+    except Exception as e:
+        logger.warning(f"Read replica unavailable, using primary for {REPLICA_RETRY_SECONDS:.0f}s: {e}")
+        _replica_failed_at = time.monotonic()
+        return get_pool()
+
+def get_inference_pool() -> ConnectionPool:
+    """
+    Pool for latency-sensitive per-user reads: the primary, unless a replica
+    is configured and lags by at most DB_REPLICA_MAX_LAG_SECONDS
+    """
+    global _replica_fresh, _replica_checked_at
+    replica = get_replica_pool()
+    if replica is None or settings.DB_REPLICA_MAX_LAG_SECONDS <= 0:
+        return get_pool()
+    
+    if time.monotonic() - _replica_checked_at >= REPLICA_LAG_RECHECK_SECONDS:
+        try:
+            lag = replica.replication_lag()
+            _replica_fresh = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            if not _replica_fresh:
+                logger.warning(f"Read replica lag {lag:.1f}s exceeds {settings.DB_REPLICA_MAX_LAG_SECONDS}s, using primary")
+        except Exception as e:
+            logger.warning(f"Could not check read replica lag, using primary: {e}")
+            _replica_fresh = False
+        _replica_checked_at = time.monotonic()
+    
+    return replica if _replica_fresh else get_pool()
+
+def close_pool():
+    """Close the process-wide connection pools (e.g. on application shutdown)"""
+    global _shared_pool, _replica_pool
+    with _shared_pool_lock:
+        for db_pool in (_shared_pool, _replica_pool):
+            if db_pool is not None:
+                db_pool.close()
+        _shared_pool = None
+        _replica_pool = None
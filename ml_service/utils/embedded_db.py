@@ -0,0 +1,400 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from config.config import settings
+
+# The tables DataLoader reads, as in backend/src/migrate.js (SQLite types)
+EMBEDDED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT,
+    tag TEXT DEFAULT 'general',
+    priority TEXT DEFAULT 'medium',
+    status TEXT DEFAULT 'pending',
+    due_date TIMESTAMP,
+    task_order INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS timer_sessions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    session_type TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS mood_logs (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    mood TEXT NOT NULL,
+    note TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_gamification (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+    level INTEGER DEFAULT 1,
+    points INTEGER DEFAULT 0,
+    total_points INTEGER DEFAULT 0,
+    streak INTEGER DEFAULT 0,
+    last_activity_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_timer_sessions_user_completed ON timer_sessions(user_id, completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_created ON mood_logs(user_id, created_at);
+"""
+
+# Timestamps are stored as ISO text, which compares in time order
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+
+# PostgreSQL -> SQLite rewrites, applied in order
+_NOW_MINUS_DAYS = re.compile(r"NOW\(\)\s*-\s*make_interval\(days\s*=>\s*(:\w+|\?|\d+)\)", re.IGNORECASE)
+_EPOCH_DIFF = re.compile(r"EXTRACT\(EPOCH FROM \(([\w.]+) - ([\w.]+)\)\)", re.IGNORECASE)
+_ANY = re.compile(r"=\s*ANY\((:\w+)\)", re.IGNORECASE)
+_UNNEST = re.compile(r"SELECT DISTINCT unnest\((:\w+)\) AS (\w+)", re.IGNORECASE)
+_CAST = re.compile(r"::\w+(\[\])?")
+_TO_REGCLASS = re.compile(r"to_regclass\('(\w+)'\) IS NOT NULL", re.IGNORECASE)
+_DISTINCT_ON = re.compile(
+    r"SELECT DISTINCT ON \(([\w.]+)\) ([^\n]+)\n(.*?)ORDER BY ([^\n]+)",
+    re.IGNORECASE | re.DOTALL,
+)
+_PYFORMAT = re.compile(r"%\((\w+)\)s")
+
+def _distinct_on(match) -> str:
+    """DISTINCT ON (key) ... ORDER BY key, rest  ->  first row per key via ROW_NUMBER()"""
+    key, columns, body, order = match.groups()
+    rest = [part.strip() for part in order.split(',') if part.strip() != key]
+    names = ', '.join(column.strip().split('.')[-1] for column in columns.split(','))
+    return (
+        f"SELECT {names} FROM (SELECT {columns}, ROW_NUMBER() OVER "
+        f"(PARTITION BY {key} ORDER BY {', '.join(rest) or key}) AS _row_number\n"
+        f"{body.rstrip()}) WHERE _row_number = 1\n"
+    )
+
+def translate_query(query: str) -> str:
+    """Rewrite a DataLoader query (psycopg2 pyformat, PostgreSQL dialect) for SQLite"""
+    query = _PYFORMAT.sub(r":\1", query).replace("%s", "?").replace("%%", "%")
+    query = _CAST.sub("", query)
+    query = _NOW_MINUS_DAYS.sub(r"datetime('now', 'localtime', '-' || \1 || ' days')", query)
+    query = _EPOCH_DIFF.sub(r"((julianday(\1) - julianday(\2)) * 86400)", query)
+    query = _UNNEST.sub(r"SELECT DISTINCT CAST(value AS INTEGER) AS \2 FROM json_each(\1)", query)
+    query = _ANY.sub(r"IN (SELECT value FROM json_each(\1))", query)
+    query = _TO_REGCLASS.sub(r"EXISTS (SELECT 1 FROM sqlite_master WHERE name = '\1')", query)
+    query = _DISTINCT_ON.sub(_distinct_on, query)
+    return query
+
+def _bind(params):
+    """Lists (e.g. user_ids for ANY) are bound as JSON arrays for json_each"""
+    if isinstance(params, dict):
+        return {key: json.dumps(list(value)) if isinstance(value, (list, tuple)) else value
+                for key, value in params.items()}
+    return params or ()
+
+def _literal(value) -> str:
+    """Render a value as a SQL literal (for mogrify)"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        value = value.isoformat(" ")
+    elif isinstance(value, date):
+        value = value.isoformat()
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _csv_value(value):
+    """Render a value the way PostgreSQL's CSV COPY does (NULL as empty)"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+class EmbeddedCursor:
+    """
+    psycopg2-style cursor over sqlite3: translates queries, returns dict
+    rows when opened with a cursor_factory, and emulates COPY ... TO STDOUT
+    """
+    
+    _COPY = re.compile(r"COPY \((.*)\) TO STDOUT WITH \(FORMAT csv, HEADER true\)", re.IGNORECASE | re.DOTALL)
+    
+    def __init__(self, connection: 'EmbeddedConnection', dict_rows: bool = False):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dict_rows = dict_rows
+        self._copied: Optional[int] = None
+        self.itersize = 2000
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @property
+    def description(self):
+        return self._cursor.description
+    
+    @property
+    def rowcount(self) -> int:
+        # Like PostgreSQL's COPY command tag, a COPY reports the rows it wrote
+        return self._copied if self._copied is not None else self._cursor.rowcount
+    
+    def execute(self, query: str, params=None):
+        # Session settings (e.g. SET LOCAL statement_timeout) have no SQLite equivalent
+        if query.lstrip().upper().startswith("SET "):
+            return
+        self._copied = None
+        self._cursor.execute(translate_query(query), _bind(params))
+    
+    def mogrify(self, query: str, params=None) -> bytes:
+        if isinstance(params, dict):
+            query = _PYFORMAT.sub(lambda m: _literal(params[m.group(1)]), query)
+        else:
+            values = iter(params or ())
+            query = re.sub(r"%s", lambda m: _literal(next(values)), query)
+        return query.encode()
+    
+    def copy_expert(self, sql: str, file):
+        match = self._COPY.search(sql)
+        if match is None:
+            raise sqlite3.NotSupportedError(f"Unsupported COPY statement: {sql[:80]}")
+        self._cursor.execute(translate_query(match.group(1)))
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerow([column[0] for column in self._cursor.description])
+        count = 0
+        while True:
+            rows = self._cursor.fetchmany(self.itersize)
+            if not rows:
+                break
+            writer.writerows([[_csv_value(value) for value in row] for row in rows])
+            file.write(text.getvalue().encode())
+            text.seek(0)
+            text.truncate()
+            count += len(rows)
+        file.write(text.getvalue().encode())
+        self._copied = count
+    
+    def _shape(self, rows: List[Tuple]) -> List:
+        if not self._dict_rows:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+    
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._shape([row])[0] if row is not None else None
+    
+    def fetchmany(self, size: int = None) -> List:
+        return self._shape(self._cursor.fetchmany(size or self.itersize))
+    
+    def fetchall(self) -> List:
+        return self._shape(self._cursor.fetchall())
+    
+    def close(self):
+        self._cursor.close()
+
+class EmbeddedConnection:
+    """Wraps a sqlite3 connection with the psycopg2 connection surface DataLoader uses"""
+    
+    def __init__(self, raw: sqlite3.Connection):
+        self.raw = raw
+    
+    @property
+    def closed(self) -> bool:
+        return False
+    
+    def cursor(self, name: Optional[str] = None, cursor_factory=None) -> EmbeddedCursor:
+        # Named (server-side) cursors need nothing special: sqlite3 steps rows lazily
+        return EmbeddedCursor(self, dict_rows=cursor_factory is not None)
+    
+    def commit(self):
+        self.raw.commit()
+    
+    def rollback(self):
+        self.raw.rollback()
+    
+    def close(self):
+        self.raw.close()
+
+class EmbeddedPool:
+    """
+    Drop-in for ConnectionPool backed by an embedded SQLite database, so the
+    feature pipeline can be benchmarked and tested without PostgreSQL.
+    
+    ":memory:" is a process-wide shared in-memory database kept alive by the
+    pool; any other path is a database file. The schema is created on open.
+    """
+    
+    def __init__(self, path: str = None, maxconn: int = None, name: str = "embedded"):
+        self.name = name
+        self.path = path or settings.EMBEDDED_DB_PATH
+        self.maxconn = maxconn if maxconn is not None else settings.DB_POOL_MAX_SIZE
+        self._idle: List[EmbeddedConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        # Holds a shared in-memory database open for as long as the pool lives
+        self._keeper = self._connect()
+        self._keeper.raw.executescript(EMBEDDED_SCHEMA)
+        logger.info(f"✅ Opened embedded database {self.path} (pool size {self.maxconn})")
+    
+    def _connect(self) -> EmbeddedConnection:
+        if self.path == ":memory:":
+            raw = sqlite3.connect(f"file:ml_service_{id(self)}?mode=memory&cache=shared", uri=True,
+                                  detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        else:
+            raw = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        return EmbeddedConnection(raw)
+    
+    def _ensure_pool(self):
+        return self
+    
+    def getconn(self) -> EmbeddedConnection:
+        """Borrow a connection, waiting for a free slot if needed"""
+        if not self._slots.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            raise sqlite3.OperationalError(f"Timed out after {settings.DB_POOL_TIMEOUT}s waiting for a database connection")
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def putconn(self, conn: EmbeddedConnection, discard: bool = False):
+        """Return a connection to the pool"""
+        try:
+            if discard:
+                conn.close()
+                return
+            conn.rollback()
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection for the duration of a block"""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except sqlite3.OperationalError:
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+    
+    def replication_lag(self) -> float:
+        return 0.0
+    
+    def close(self):
+        """Close every connection, dropping a shared in-memory database"""
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+        self._keeper.close()
+        logger.info(f"Embedded database closed ({self.path})")
+
+def seed_embedded_database(pool: EmbeddedPool, users: int = 100, days: int = 30, sessions_per_day: int = 6,
+                           tasks_per_day: int = 3, seed: int = 7) -> Dict[str, int]:
+    """
+    Fill an embedded database with synthetic activity for users 1..users over
+    the last `days` days. Deterministic for a given seed. Returns row counts.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    moods = ['happy', 'calm', 'neutral', 'tired', 'stressed', 'sad']
+    rows = {'users': [], 'timer_sessions': [], 'tasks': [], 'mood_logs': [], 'user_gamification': []}
+    
+    for user_id in range(1, users + 1):
+        rows['users'].append((user_id, f"user{user_id}@example.com", "x", f"User {user_id}", now - timedelta(days=days)))
+        for day in range(days):
+            day_start = now - timedelta(days=day)
+            for _ in range(rng.randint(0, 2 * sessions_per_day)):
+                session_type = rng.choice(['work', 'work', 'shortBreak', 'longBreak'])
+                duration = rng.choice([1500, 1800, 3000]) if session_type == 'work' else rng.choice([300, 900])
+                completed_at = day_start - timedelta(minutes=rng.randint(0, 24 * 60 - 1))
+                rows['timer_sessions'].append((user_id, session_type, duration, completed_at))
+            for _ in range(rng.randint(0, 2 * tasks_per_day)):
+                status = rng.choice(['pending', 'in_progress', 'completed', 'completed'])
+                created_at = day_start - timedelta(minutes=rng.randint(60, 24 * 60 - 1))
+                updated_at = created_at + timedelta(minutes=rng.randint(5, 600))
+                rows['tasks'].append((user_id, f"Task {len(rows['tasks']) + 1}", rng.choice(['low', 'medium', 'high']),
+                                      status, 'general', created_at, min(updated_at, now)))
+            if rng.random() < 0.5:
+                rows['mood_logs'].append((user_id, rng.choice(moods), None,
+                                          day_start - timedelta(minutes=rng.randint(0, 24 * 60 - 1))))
+        points = rng.randint(0, 5000)
+        rows['user_gamification'].append((user_id, points // 500 + 1, points % 500, points, rng.randint(0, 30), now.date()))
+    
+    with pool.connection() as conn:
+        raw = conn.raw
+        raw.executemany("INSERT INTO users (id, email, password_hash, name, created_at) VALUES (?, ?, ?, ?, ?)", rows['users'])
+        raw.executemany("INSERT INTO timer_sessions (user_id, session_type, duration, completed_at) VALUES (?, ?, ?, ?)",
+                        rows['timer_sessions'])
+        raw.executemany("INSERT INTO tasks (user_id, title, priority, status, tag, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows['tasks'])
+        raw.executemany("INSERT INTO mood_logs (user_id, mood, note, created_at) VALUES (?, ?, ?, ?)", rows['mood_logs'])
+        raw.executemany("INSERT INTO user_gamification (user_id, level, points, total_points, streak, last_activity_date) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", rows['user_gamification'])
+        raw.execute("ANALYZE")
+        raw.commit()
+    
+    counts = {table: len(table_rows) for table, table_rows in rows.items()}
+    logger.info(f"✅ Seeded embedded database: {counts}")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and seed an embedded (SQLite) database for DB_BACKEND=sqlite")
+    parser.add_argument('path', help='SQLite database file to create')
+    parser.add_argument('--users', type=int, default=100, help='Number of synthetic users')
+    parser.add_argument('--days', type=int, default=30, help='Days of activity per user')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    args = parser.parse_args()
+    
+    embedded_pool = EmbeddedPool(args.path)
+    seed_embedded_database(embedded_pool, users=args.users, days=args.days, seed=args.seed)
+    embedded_pool.close()
@@ -0,0 +1,228 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from loguru import logger
+from config.config import settings
+from utils.db_pool import get_connection_params
+from utils.user_features import UserFeatures
+
+# Channel the ml_notify_user_activity trigger publishes user ids on
+# (installed by utils/schema_bootstrap.py)
+ACTIVITY_CHANNEL = "ml_user_activity"
+
+class FeatureCache:
+    """
+    Size-bounded LRU cache of inference features (UserFeatures records)
+    keyed by user_id.
+    
+    Entries expire after a TTL and are invalidated early when a NOTIFY
+    reports new activity for the user. Expired and invalidated entries stay
+    (until LRU eviction) as the last known good value, served marked stale
+    when a fresh fetch misses its latency budget. Thread-safe; shared by the
+    sync and async loaders so one page load computes a user's features once.
+    """
+    
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = max_size if max_size is not None else settings.FEATURE_CACHE_MAX_SIZE
+        self.ttl = ttl if ttl is not None else settings.FEATURE_CACHE_TTL_SECONDS
+        # user_id -> [stored_at, features, valid]
+        self._entries: "OrderedDict[int, List]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, user_id: int) -> Optional[UserFeatures]:
+        """Return a copy of the cached features, or None if missing, expired or invalidated"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or not entry[2] or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1].copy()
+    
+    def get_stale(self, user_id: int) -> Optional[Tuple[UserFeatures, float]]:
+        """Return (copy of the last known features, age in seconds) regardless of freshness"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return entry[1].copy(), time.monotonic() - entry[0]
+    
+    def set(self, user_id: int, features: UserFeatures):
+        """Store features for a user, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[user_id] = [time.monotonic(), features.copy(), True]
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, user_id: int):
+        """Mark a user's entry out of date (their activity changed)"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[2]:
+                entry[2] = False
+                self.invalidations += 1
+    
+    def invalidate_all(self):
+        """Mark every entry out of date, keeping them as stale fallbacks"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry[2] = False
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'stale_hits': self.stale_hits,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+class InvalidationListener:
+    """
+    Background thread that LISTENs on ACTIVITY_CHANNEL and invalidates the
+    cache entry of every user id it receives (then tells the on_user_activity
+    subscribers, with None when notifications may have been missed).
+    
+    Uses its own connection (LISTEN needs one that stays open, outside the
+    pool). If the connection drops, notifications may have been missed, so
+    every entry is invalidated before listening again.
+    """
+    
+    def __init__(self, cache: Optional[FeatureCache], poll_interval: float = 5.0, retry_interval: float = 10.0):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start listening in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feature-cache-listener", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the listener thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+    
+    def _publish(self, user_id: Optional[int]):
+        """Invalidate the user (or everyone, for None) and notify subscribers"""
+        if self.cache is not None:
+            if user_id is None:
+                self.cache.invalidate_all()
+            else:
+                self.cache.invalidate(user_id)
+        for callback in list(_activity_callbacks):
+            try:
+                callback(user_id)
+            except Exception as e:
+                logger.warning(f"User activity subscriber failed: {e}")
+    
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**get_connection_params())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {ACTIVITY_CHANNEL}")
+                self._publish(None)
+                logger.info(f"✅ Feature cache listening on {ACTIVITY_CHANNEL}")
+                
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            user_id = int(notify.payload)
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed {ACTIVITY_CHANNEL} payload: {notify.payload!r}")
+                            continue
+                        self._publish(user_id)
+            
+            except Exception as e:
+                logger.warning(f"Feature cache listener error, retrying in {self.retry_interval}s: {e}")
+                self._publish(None)
+                self._stop.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+# Process-wide cache shared by DataLoader and AsyncDataLoader
+_feature_cache: Optional[FeatureCache] = None
+_listener: Optional[InvalidationListener] = None
+_feature_cache_lock = threading.Lock()
+# Called with each user id the listener receives (None: may have missed some)
+_activity_callbacks: List[Callable[[Optional[int]], None]] = []
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """Return the shared feature cache, or None when caching is disabled"""
+    global _feature_cache
+    if not settings.FEATURE_CACHE_ENABLED:
+        return None
+    if _feature_cache is None:
+        with _feature_cache_lock:
+            if _feature_cache is None:
+                _feature_cache = FeatureCache()
+    return _feature_cache
+
+def on_user_activity(callback: Callable[[Optional[int]], None]):
+    """Subscribe to activity notifications (register before start_invalidation_listener)"""
+    _activity_callbacks.append(callback)
+
+def start_invalidation_listener():
+    """Start LISTEN/NOTIFY invalidation for the shared cache (e.g. on app startup)"""
+    global _listener
+    cache = get_feature_cache()
+    # The embedded (sqlite) backend has no LISTEN/NOTIFY; entries just expire
+    if (cache is None and not _activity_callbacks) or settings.DB_BACKEND == "sqlite":
+        return
+    with _feature_cache_lock:
+        if _listener is None:
+            _listener = InvalidationListener(cache)
+        _listener.start()
+
+def stop_invalidation_listener():
+    """Stop the invalidation listener (e.g. on app shutdown)"""
+    global _listener
+    with _feature_cache_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -1,31 +1,35 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Union
 from datetime import datetime
 
+from utils.feature_spec import FeatureColumn, FeatureSpec
+
 class FeatureEngineer:
+    MOOD_ENCODING = {
+        'happy': 2,
+        'calm': 1,
+        'neutral': 0,
+        'tired': -1,
+        'anxious': -2,
+        'sad': -2
+    }
+    
+    PRIORITY_ENCODING = {
+        'high': 3,
+        'medium': 2,
+        'low': 1
+    }
+    
     @staticmethod
     def encode_mood(mood: str) -> int:
         """Encode mood to numeric value"""
-        mood_map = {
-            'happy': 2,
-            'calm': 1,
-            'neutral': 0,
-            'tired': -1,
-            'anxious': -2,
-            'sad': -2
-        }
-        return mood_map.get(mood.lower(), 0)
+        return FeatureEngineer.MOOD_ENCODING.get(mood.lower(), 0)
     
     @staticmethod
     def encode_priority(priority: str) -> int:
         """Encode priority to numeric value"""
-        priority_map = {
-            'high': 3,
-            'medium': 2,
-            'low': 1
-        }
-        return priority_map.get(priority.lower(), 2)
+        return FeatureEngineer.PRIORITY_ENCODING.get(priority.lower(), 2)
     
     @staticmethod
     def encode_session_type(session_type: str) -> int:
@@ -52,99 +56,117 @@ class FeatureEngineer:
     
     @staticmethod
     def prepare_pomodoro_features(user_features: Dict, task_priority: str = 'medium') -> np.ndarray:
-        """Prepare features for Pomodoro recommendation model"""
-        features = []
-        
-        # User stats
-        features.append(user_features.get('avg_focus_duration', 25))
-        features.append(user_features.get('avg_break_duration', 5))
-        features.append(user_features.get('completion_rate', 50))
-        features.append(user_features.get('current_streak', 0))
-        features.append(user_features.get('level', 1))
-        features.append(user_features.get('total_sessions', 0))
-        features.append(user_features.get('sessions_today', 0))
-        
-        # Daily trend features (NEW - for learning from daily patterns)
-        features.append(user_features.get('focus_time_yesterday', 0))
-        features.append(user_features.get('focus_time_day_before', 0))
-        features.append(user_features.get('focus_time_three_days_ago', 0))
-        features.append(user_features.get('daily_trend', 0))  # Positive = increasing, negative = decreasing
-        features.append(user_features.get('avg_focus_last_3_days', 25))
-        
-        # Mood encoding
-        mood = user_features.get('recent_mood', 'neutral')
-        features.append(FeatureEngineer.encode_mood(mood))
-        
-        # Time features
-        hour = user_features.get('hour_of_day', datetime.now().hour)
-        day_of_week = user_features.get('day_of_week', datetime.now().weekday())
-        time_feats = FeatureEngineer.get_time_features(hour, day_of_week)
-        features.extend([
-            time_feats['hour'],
-            time_feats['day_of_week'],
-            time_feats['is_weekend'],
-            time_feats['is_morning'],
-            time_feats['is_afternoon'],
-            time_feats['is_evening'],
-        ])
-        
-        # Task features
-        features.append(user_features.get('pending_tasks', 0))
-        features.append(user_features.get('high_priority_tasks', 0))
-        features.append(FeatureEngineer.encode_priority(task_priority))
-        
-        # Productivity score (composite)
-        productivity_score = (
-            user_features.get('completion_rate', 50) * 0.4 +
-            user_features.get('current_streak', 0) * 2 * 0.3 +
-            (user_features.get('level', 1) / 10) * 0.3
-        )
-        features.append(productivity_score)
-        
-        return np.array(features).reshape(1, -1)
+        """Prepare features for Pomodoro recommendation model (columns: POMODORO_SPEC)"""
+        return POMODORO_SPEC.build(user_features, task_priority=task_priority)
     
     @staticmethod
     def prepare_distraction_features(user_features: Dict, session_duration: int) -> np.ndarray:
-        """Prepare features for distraction prediction"""
-        features = []
-        
-        # Session features
-        features.append(session_duration)
-        features.append(user_features.get('sessions_today', 0))
-        features.append(user_features.get('avg_session_duration', 25))
-        
-        # User state
-        features.append(user_features.get('current_streak', 0))
-        features.append(user_features.get('level', 1))
-        features.append(user_features.get('completion_rate', 50))
-        
-        # Mood
-        mood = user_features.get('recent_mood', 'neutral')
-        features.append(FeatureEngineer.encode_mood(mood))
-        
-        # Time features
-        hour = user_features.get('hour_of_day', datetime.now().hour)
-        day_of_week = user_features.get('day_of_week', datetime.now().weekday())
-        time_feats = FeatureEngineer.get_time_features(hour, day_of_week)
-        features.extend([
-            time_feats['hour'],
-            time_feats['is_weekend'],
-            time_feats['is_afternoon'],  # Afternoon distraction is common
-        ])
+        """Prepare features for distraction prediction (columns: DISTRACTION_SPEC)"""
+        return DISTRACTION_SPEC.build(user_features, session_duration=session_duration)
+    
+    @staticmethod
+    def _batch_size(columns: Union[pd.DataFrame, Dict]) -> int:
+        if isinstance(columns, pd.DataFrame):
+            return len(columns)
+        return len(next(iter(columns.values()))) if columns else 0
+    
+    @staticmethod
+    def _column(columns: Union[pd.DataFrame, Dict], name: str, default, n: int) -> np.ndarray:
+        """A column as an array, missing values (or a missing column) taking the default"""
+        if name not in columns:
+            return np.full(n, default, dtype=object if isinstance(default, str) else None)
+        values = pd.Series(columns[name], copy=False)
+        if values.isna().any():
+            values = values.fillna(default)
+        return values.to_numpy()
+    
+    @staticmethod
+    def encode_mood_batch(moods: np.ndarray) -> np.ndarray:
+        """Vectorized encode_mood"""
+        return pd.Series(moods, dtype=object).str.lower().map(FeatureEngineer.MOOD_ENCODING).fillna(0).to_numpy(dtype=np.float64)
+    
+    @staticmethod
+    def encode_priority_batch(priorities: Union[str, np.ndarray], n: int) -> np.ndarray:
+        """Vectorized encode_priority, for one priority or one per row"""
+        if isinstance(priorities, str):
+            return np.full(n, FeatureEngineer.encode_priority(priorities), dtype=np.float64)
+        return pd.Series(priorities, dtype=object).str.lower().map(FeatureEngineer.PRIORITY_ENCODING).fillna(2).to_numpy(dtype=np.float64)
+    
+    @staticmethod
+    def get_time_features_batch(hour: np.ndarray, day_of_week: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized get_time_features"""
+        return {
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'is_weekend': (day_of_week >= 5).astype(np.int64),
+            'is_morning': ((6 <= hour) & (hour < 12)).astype(np.int64),
+            'is_afternoon': ((12 <= hour) & (hour < 18)).astype(np.int64),
+            'is_evening': ((18 <= hour) & (hour < 22)).astype(np.int64),
+            'is_night': ((hour >= 22) | (hour < 6)).astype(np.int64),
+        }
+    
+    @staticmethod
+    def _time_columns(columns: Union[pd.DataFrame, Dict], n: int) -> Dict[str, np.ndarray]:
+        now = datetime.now()
+        hour = FeatureEngineer._column(columns, 'hour_of_day', now.hour, n).astype(np.float64)
+        day_of_week = FeatureEngineer._column(columns, 'day_of_week', now.weekday(), n).astype(np.float64)
+        return FeatureEngineer.get_time_features_batch(hour, day_of_week)
+    
+    @staticmethod
+    def _build_batch(spec: FeatureSpec, user_features: Union[pd.DataFrame, Dict], inputs: Dict) -> np.ndarray:
+        """Vectorized FeatureSpec.build: one column of the matrix per spec column"""
+        n = FeatureEngineer._batch_size(user_features)
+        mood = FeatureEngineer._column(user_features, 'recent_mood', 'neutral', n)
+        values = lambda name, default: FeatureEngineer._column(user_features, name, default, n).astype(np.float64)
+        encoded = FeatureEngineer._time_columns(user_features, n)
+        encoded['mood'] = FeatureEngineer.encode_mood_batch(mood)
+        if 'task_priority' in inputs:
+            encoded['priority'] = FeatureEngineer.encode_priority_batch(inputs['task_priority'], n)
+        if 'productivity_score' in spec.index:
+            encoded['productivity_score'] = (
+                values('completion_rate', 50) * 0.4 +
+                values('current_streak', 0) * 2 * 0.3 +
+                (values('level', 1) / 10) * 0.3
+            )
+        if 'stress_score' in spec.index:
+            encoded['stress_score'] = (
+                np.isin(mood, ['anxious', 'tired']) * 0.5 +
+                (values('high_priority_tasks', 0) > 3) * 0.3 +
+                (values('pending_tasks', 0) > 5) * 0.2
+            )
         
-        # Task load
-        features.append(user_features.get('pending_tasks', 0))
-        features.append(user_features.get('high_priority_tasks', 0))
+        out = np.empty((n, len(spec)), dtype=spec.dtype)
+        for i, column in enumerate(spec.columns):
+            if column.encoder is not None:
+                out[:, i] = encoded[column.encoder]
+            elif column.per_request:
+                out[:, i] = np.asarray(inputs.get(column.source, column.default), dtype=np.float64)
+            else:
+                out[:, i] = values(column.source, column.default)
+        return out
+    
+    @staticmethod
+    def prepare_pomodoro_features_batch(user_features: Union[pd.DataFrame, Dict],
+                                        task_priority: Union[str, np.ndarray] = 'medium') -> np.ndarray:
+        """
+        prepare_pomodoro_features for many users at once
         
-        # Stress indicator
-        stress_score = (
-            (1 if mood in ['anxious', 'tired'] else 0) * 0.5 +
-            (user_features.get('high_priority_tasks', 0) > 3) * 0.3 +
-            (user_features.get('pending_tasks', 0) > 5) * 0.2
-        )
-        features.append(stress_score)
+        Takes user features as columns (a DataFrame, or a dict of equal-length
+        arrays) and returns the (n, k) matrix whose rows equal the per-row
+        function's output. Missing columns or values take its defaults.
+        """
+        return FeatureEngineer._build_batch(POMODORO_SPEC, user_features, {'task_priority': task_priority})
+    
+    @staticmethod
+    def prepare_distraction_features_batch(user_features: Union[pd.DataFrame, Dict],
+                                           session_duration: Union[int, np.ndarray]) -> np.ndarray:
+        """
+        prepare_distraction_features for many users at once
         
-        return np.array(features).reshape(1, -1)
+        Same input conventions as prepare_pomodoro_features_batch;
+        session_duration is one value or one per row.
+        """
+        return FeatureEngineer._build_batch(DISTRACTION_SPEC, user_features, {'session_duration': session_duration})
     
     @staticmethod
     def normalize_features(features: np.ndarray, mean: np.ndarray = None, std: np.ndarray = None) -> np.ndarray:
@@ -156,3 +178,92 @@ class FeatureEngineer:
         normalized = (features - mean) / std
         return normalized, mean, std
 
+def _hour(value) -> int:
+    return value if value is not None else datetime.now().hour
+
+def _day_of_week(value) -> int:
+    return value if value is not None else datetime.now().weekday()
+
+def _productivity_score(user_features: Dict) -> float:
+    return (
+        user_features.get('completion_rate', 50) * 0.4 +
+        user_features.get('current_streak', 0) * 2 * 0.3 +
+        (user_features.get('level', 1) / 10) * 0.3
+    )
+
+def _stress_score(user_features: Dict) -> float:
+    mood = user_features.get('recent_mood', 'neutral')
+    return (
+        (1 if mood in ['anxious', 'tired'] else 0) * 0.5 +
+        (user_features.get('high_priority_tasks', 0) > 3) * 0.3 +
+        (user_features.get('pending_tasks', 0) > 5) * 0.2
+    )
+
+# Encoders referenced by name from the feature specs (names are stored with
+# each model, so renaming one invalidates trained artifacts)
+ENCODERS = {
+    'mood': FeatureEngineer.encode_mood,
+    'priority': FeatureEngineer.encode_priority,
+    'hour': _hour,
+    'day_of_week': _day_of_week,
+    'is_weekend': lambda value: 1 if _day_of_week(value) >= 5 else 0,
+    'is_morning': lambda value: 1 if 6 <= _hour(value) < 12 else 0,
+    'is_afternoon': lambda value: 1 if 12 <= _hour(value) < 18 else 0,
+    'is_evening': lambda value: 1 if 18 <= _hour(value) < 22 else 0,
+    'productivity_score': _productivity_score,
+    'stress_score': _stress_score,
+}
+
+POMODORO_SPEC = FeatureSpec('pomodoro', [
+    # User stats
+    FeatureColumn.value('avg_focus_duration', 25),
+    FeatureColumn.value('avg_break_duration', 5),
+    FeatureColumn.value('completion_rate', 50),
+    FeatureColumn.value('current_streak', 0),
+    FeatureColumn.value('level', 1),
+    FeatureColumn.value('total_sessions', 0),
+    FeatureColumn.value('sessions_today', 0),
+    # Daily trend features (for learning from daily patterns)
+    FeatureColumn.value('focus_time_yesterday', 0),
+    FeatureColumn.value('focus_time_day_before', 0),
+    FeatureColumn.value('focus_time_three_days_ago', 0),
+    FeatureColumn.value('daily_trend', 0),  # Positive = increasing, negative = decreasing
+    FeatureColumn.value('avg_focus_last_3_days', 25),
+    # Mood encoding
+    FeatureColumn('mood_encoded', source='recent_mood', default='neutral', encoder='mood'),
+    # Time features (the current time when missing)
+    FeatureColumn('hour', source='hour_of_day', encoder='hour'),
+    FeatureColumn('day_of_week', source='day_of_week', encoder='day_of_week'),
+    FeatureColumn('is_weekend', source='day_of_week', encoder='is_weekend'),
+    FeatureColumn('is_morning', source='hour_of_day', encoder='is_morning'),
+    FeatureColumn('is_afternoon', source='hour_of_day', encoder='is_afternoon'),
+    FeatureColumn('is_evening', source='hour_of_day', encoder='is_evening'),
+    # Task features
+    FeatureColumn.value('pending_tasks', 0),
+    FeatureColumn.value('high_priority_tasks', 0),
+    FeatureColumn('priority_encoded', source='task_priority', default='medium', encoder='priority', per_request=True),
+    # Productivity score (composite)
+    FeatureColumn('productivity_score', encoder='productivity_score'),
+], encoders=ENCODERS)
+
+DISTRACTION_SPEC = FeatureSpec('distraction', [
+    # Session features
+    FeatureColumn('session_duration', source='session_duration', per_request=True),
+    FeatureColumn.value('sessions_today', 0),
+    FeatureColumn.value('avg_session_duration', 25),
+    # User state
+    FeatureColumn.value('current_streak', 0),
+    FeatureColumn.value('level', 1),
+    FeatureColumn.value('completion_rate', 50),
+    # Mood
+    FeatureColumn('mood_encoded', source='recent_mood', default='neutral', encoder='mood'),
+    # Time features
+    FeatureColumn('hour', source='hour_of_day', encoder='hour'),
+    FeatureColumn('is_weekend', source='day_of_week', encoder='is_weekend'),
+    FeatureColumn('is_afternoon', source='hour_of_day', encoder='is_afternoon'),  # Afternoon distraction is common
+    # Task load
+    FeatureColumn.value('pending_tasks', 0),
+    FeatureColumn.value('high_priority_tasks', 0),
+    # Stress indicator
+    FeatureColumn('stress_score', encoder='stress_score'),
+], encoders=ENCODERS)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+class FeatureSpecMismatch(ValueError):
+    """A model artifact was trained on different features than serving builds"""
+
+class FeatureColumn:
+    """
+    One model input column
+    
+    The value is read from `source` in the user features (or, for
+    per_request columns, from the request's inputs such as task_priority), falling
+    back to `default`, then passed through the named encoder if any. An
+    encoder with no source receives the whole feature dict (composite scores).
+    """
+    
+    __slots__ = ('name', 'source', 'default', 'encoder', 'dtype', 'per_request')
+    
+    def __init__(self, name: str, source: Optional[str] = None, default=None, encoder: Optional[str] = None,
+                 dtype: str = 'float64', per_request: bool = False):
+        self.name = name
+        self.source = source
+        self.default = default
+        self.encoder = encoder
+        self.dtype = dtype
+        self.per_request = per_request
+    
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def value(cls, name: str, default) -> 'FeatureColumn':
+        """A column copied from the user feature of the same name"""
+        return cls(name, source=name, default=default)
+
+class FeatureSpec:
+    """
+    Names, dtypes, defaults, encoders and order of a model's input columns
+    
+    Compiled once into a list of (column index, fill function), so a feature
+    vector is written straight into a preallocated buffer. The spec is saved
+    with each trained model (see ModelVersioning.register_model); at load time
+    the stored spec must match the serving one (check_compatible), otherwise
+    the model would be fed columns it was not trained on.
+    """
+    
+    def __init__(self, name: str, columns: Sequence[FeatureColumn],
+                 encoders: Optional[Dict[str, Callable]] = None, dtype: str = 'float64'):
+        self.name = name
+        self.columns: List[FeatureColumn] = list(columns)
+        self.dtype = dtype
+        self.index: Dict[str, int] = {column.name: i for i, column in enumerate(self.columns)}
+        if len(self.index) != len(self.columns):
+            raise ValueError(f"Duplicate column names in feature spec {name}")
+        self._encoders = encoders
+        self._program = self._compile(encoders) if encoders is not None else None
+        self._local = threading.local()
+    
+    def __len__(self) -> int:
+        return len(self.columns)
+    
+    @property
+    def names(self) -> List[str]:
+        return [column.name for column in self.columns]
+    
+    def _compile(self, encoders: Dict[str, Callable]) -> List:
+        program = []
+        for i, column in enumerate(self.columns):
+            encoder = None
+            if column.encoder is not None:
+                if column.encoder not in encoders:
+                    raise ValueError(f"Unknown encoder {column.encoder} for column {column.name}")
+                encoder = encoders[column.encoder]
+            program.append((i, column.per_request, column.source, column.default, encoder))
+        return program
+    
+    def build(self, user_features: Dict, out: Optional[np.ndarray] = None, **inputs) -> np.ndarray:
+        """
+        Write one feature vector into `out` (shape (1, n); a new array by
+        default) and return it. `inputs` are per-request values such as
+        task_priority or session_duration.
+        """
+        if self._program is None:
+            raise ValueError(f"Feature spec {self.name} was loaded without encoders and can't build vectors")
+        if out is None:
+            out = np.empty((1, len(self.columns)), dtype=self.dtype)
+        row = out[0]
+        for i, is_input, source, default, encoder in self._program:
+            if source is None:
+                value = user_features
+            elif is_input:
+                value = inputs.get(source, default)
+            else:
+                value = user_features.get(source, default)
+            row[i] = encoder(value) if encoder is not None else value
+        return out
+    
+    def buffer(self) -> np.ndarray:
+        """A (1, n) buffer owned by the calling thread, reused across calls"""
+        buf = getattr(self._local, 'buffer', None)
+        if buf is None:
+            buf = self._local.buffer = np.empty((1, len(self.columns)), dtype=self.dtype)
+        return buf
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable description, stored with each trained model"""
+        return {
+            'name': self.name,
+            'dtype': self.dtype,
+            'columns': [dict(column.to_dict(), index=i) for i, column in enumerate(self.columns)],
+            'fingerprint': self.fingerprint,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict, encoders: Optional[Dict[str, Callable]] = None) -> 'FeatureSpec':
+        columns = [
+            FeatureColumn(**{name: column.get(name) for name in FeatureColumn.__slots__ if name in column})
+            for column in sorted(data['columns'], key=lambda column: column['index'])
+        ]
+        return cls(data['name'], columns, encoders=encoders, dtype=data.get('dtype', 'float64'))
+    
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the column definitions (order included)"""
+        payload = json.dumps([column.to_dict() for column in self.columns], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+    
+    def check_compatible(self, stored: Optional[Dict], n_features: Optional[int] = None):
+        """
+        Raise FeatureSpecMismatch unless a model trained with `stored` (a
+        to_dict() result) can be fed this spec's vectors. Artifacts from before
+        specs were saved only have their input width (n_features) to check.
+        """
+        if stored is None:
+            if n_features is not None and n_features != len(self.columns):
+                raise FeatureSpecMismatch(
+                    f"{self.name}: model expects {n_features} features, serving builds {len(self.columns)}"
+                )
+            return
+        other = FeatureSpec.from_dict(stored)
+        if other.fingerprint == self.fingerprint:
+            return
+        if other.names != self.names:
+            missing = [name for name in other.names if name not in self.index]
+            extra = [name for name in self.names if name not in other.index]
+            raise FeatureSpecMismatch(
+                f"{self.name}: model was trained on columns {other.names} "
+                f"(missing from serving: {missing}, new in serving: {extra})"
+            )
+        changed = [a.name for a, b in zip(other.columns, self.columns) if a.to_dict() != b.to_dict()]
+        raise FeatureSpecMismatch(f"{self.name}: defaults or encoders changed for columns {changed}")
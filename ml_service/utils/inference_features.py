@@ -0,0 +1,183 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+from utils.user_features import UserFeatures
+
+# Inference-mode per-table queries: only the columns the features need, read
+# as cursor tuples. Nothing on this path imports pandas.
+INFERENCE_SESSIONS_QUERY = """
+    SELECT session_type, duration, completed_at
+    FROM timer_sessions
+    WHERE user_id = %(user_id)s
+        AND completed_at >= NOW() - make_interval(days => %(days)s)
+"""
+
+INFERENCE_TASKS_QUERY = """
+    SELECT status, priority, created_at, updated_at
+    FROM tasks
+    WHERE user_id = %(user_id)s
+        AND created_at >= NOW() - make_interval(days => %(days)s)
+"""
+
+INFERENCE_RECENT_MOOD_QUERY = """
+    SELECT mood
+    FROM mood_logs
+    WHERE user_id = %(user_id)s
+        AND created_at >= NOW() - make_interval(days => %(days)s)
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+INFERENCE_GAMIFICATION_QUERY = """
+    SELECT streak, level
+    FROM user_gamification
+    WHERE user_id = %(user_id)s
+    LIMIT 1
+"""
+
+def trend_features(yesterday: float, day_before: float, three_days_ago: float) -> Dict:
+    """Derive daily focus trend features from the last three days of focus time"""
+    # Calculate trend (positive if increasing, negative if decreasing)
+    if yesterday > 0 and day_before > 0:
+        daily_trend = yesterday - day_before
+    elif yesterday > 0:
+        daily_trend = yesterday  # New pattern starting
+    else:
+        daily_trend = 0
+    
+    # Average of last 3 days (for baseline)
+    last_3_days = [x for x in [yesterday, day_before, three_days_ago] if x > 0]
+    
+    return {
+        'focus_time_yesterday': yesterday,
+        'focus_time_day_before': day_before,
+        'focus_time_three_days_ago': three_days_ago,
+        'daily_trend': daily_trend,
+        'avg_focus_last_3_days': sum(last_3_days) / len(last_3_days) if last_3_days else 25,
+    }
+
+def features_from_totals(user_id: int, totals: Dict, recent_mood: Optional[str],
+                         gamification: Optional[Tuple], now: datetime) -> UserFeatures:
+    """
+    Build the inference features from per-window totals
+    
+    totals holds session counts and duration sums (all, 'work',
+    'shortBreak'), sessions_today, focus_by_day (work seconds yesterday, the
+    day before and three days ago), and task counts plus the sum and count
+    of completion minutes. Shared by features_from_rows and the online
+    feature store so both produce identical values.
+    """
+    total_sessions = totals['sessions']
+    total_tasks = totals['tasks']
+    
+    features = UserFeatures({
+        'user_id': user_id,
+        'total_sessions': total_sessions,
+        'avg_session_duration': totals['duration_sum'] / total_sessions if total_sessions else 25,
+        'completion_rate': totals['completed'] / total_tasks * 100 if total_tasks else 50,
+        'current_streak': gamification[0] if gamification is not None else 0,
+        'level': gamification[1] if gamification is not None else 1,
+        'recent_mood': recent_mood if recent_mood is not None else 'neutral',
+        'hour_of_day': now.hour,
+        'day_of_week': now.weekday(),
+        'is_weekend': 1 if now.weekday() >= 5 else 0,
+    })
+    
+    # Task-related features
+    if total_tasks:
+        features['pending_tasks'] = totals['pending']
+        features['high_priority_tasks'] = totals['high']
+        # NaN (not 0) when tasks exist but none are completed, as pandas' mean() would give
+        completion_count = totals['completion_count']
+        features['avg_task_completion_time'] = (
+            totals['completion_sum'] / completion_count if completion_count else float('nan')
+        )
+    else:
+        features['pending_tasks'] = 0
+        features['high_priority_tasks'] = 0
+        features['avg_task_completion_time'] = 0
+    
+    # Session-related features
+    features['avg_focus_duration'] = totals['work_sum'] / totals['work_count'] if totals['work_count'] else 25
+    features['avg_break_duration'] = totals['break_sum'] / totals['break_count'] if totals['break_count'] else 5
+    features['sessions_today'] = totals['sessions_today']
+    
+    # Daily focus time trend features (last 3 days, excluding today)
+    features.update(trend_features(*[seconds / 60.0 if seconds else 0 for seconds in totals['focus_by_day']]))
+    
+    return features
+
+def features_from_rows(user_id: int,
+                       sessions: Sequence[Tuple],
+                       tasks: Sequence[Tuple],
+                       recent_mood: Optional[Tuple],
+                       gamification: Optional[Tuple],
+                       now: datetime) -> UserFeatures:
+    """
+    Compute the inference features from raw cursor rows in one pass
+    
+    Rows are shaped like the INFERENCE_* queries. Produces the same values as
+    DataLoader's pandas-based legacy path, with the daily focus trend taken
+    from the session rows instead of a separate query.
+    """
+    today = now.date()
+    trend_offsets = {today - timedelta(days=offset + 1): offset for offset in range(3)}
+    
+    # Sessions
+    duration_sum = 0
+    work_sum = work_count = 0
+    break_sum = break_count = 0
+    sessions_today = 0
+    focus_by_day = [0, 0, 0]
+    for session_type, duration, completed_at in sessions:
+        duration_sum += duration
+        day = completed_at.date()
+        if day == today:
+            sessions_today += 1
+        if session_type == 'work':
+            work_sum += duration
+            work_count += 1
+            offset = trend_offsets.get(day)
+            if offset is not None:
+                focus_by_day[offset] += duration
+        elif session_type == 'shortBreak':
+            break_sum += duration
+            break_count += 1
+    
+    # Tasks
+    completed = pending = high = 0
+    completion_sum = 0
+    completion_count = 0
+    for status, priority, created_at, updated_at in tasks:
+        if status == 'completed':
+            completed += 1
+            if created_at is not None and updated_at is not None:
+                completion_sum += (updated_at - created_at).total_seconds() / 60
+                completion_count += 1
+        elif status == 'pending':
+            pending += 1
+        if priority == 'high':
+            high += 1
+    
+    totals = {
+        'sessions': len(sessions),
+        'duration_sum': duration_sum,
+        'work_count': work_count,
+        'work_sum': work_sum,
+        'break_count': break_count,
+        'break_sum': break_sum,
+        'sessions_today': sessions_today,
+        'focus_by_day': focus_by_day,
+        'tasks': len(tasks),
+        'completed': completed,
+        'pending': pending,
+        'high': high,
+        'completion_sum': completion_sum,
+        'completion_count': completion_count,
+    }
+    return features_from_totals(user_id, totals, recent_mood[0] if recent_mood is not None else None,
+                                gamification, now)
@@ -28,8 +28,9 @@ class ModelVersioning:
         with open(self.version_file, 'w') as f:
             json.dump(self.versions, f, indent=2)
     
-    def register_model(self, model_name: str, model_path: str, metrics: Dict = None) -> str:
-        """Register a new model version"""
+    def register_model(self, model_name: str, model_path: str, metrics: Dict = None,
+                       feature_spec: Dict = None) -> str:
+        """Register a new model version, with the feature spec it was trained on (FeatureSpec.to_dict())"""
         version = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if model_name not in self.versions:
@@ -39,6 +40,7 @@ class ModelVersioning:
             'path': model_path,
             'created_at': datetime.now().isoformat(),
             'metrics': metrics or {},
+            'feature_spec': feature_spec,
             'is_current': False
         }
         
@@ -83,6 +85,16 @@ class ModelVersioning:
         
         return None
     
+    def get_feature_spec(self, model_name: str, version: str = None) -> Optional[Dict]:
+        """Feature spec a model version was trained on (None for versions registered before specs)"""
+        if version is None:
+            version = self.get_current_version(model_name)
+        
+        if version and version in self.versions.get(model_name, {}):
+            return self.versions[model_name][version].get('feature_spec')
+        
+        return None
+    
     def list_versions(self, model_name: str) -> Dict:
         """List all versions of a model"""
         return self.versions.get(model_name, {})
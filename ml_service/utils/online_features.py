@@ -0,0 +1,398 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from config.config import settings
+from utils.db_pool import get_inference_pool
+from utils.inference_features import features_from_totals
+from utils.user_features import UserFeatures
+
+# Reconciliation reads: every row inside the store's day window
+RECONCILE_QUERIES = {
+    'session': """
+        SELECT id, user_id, session_type, duration, completed_at
+        FROM timer_sessions
+        WHERE completed_at >= %(window_start)s AND user_id IS NOT NULL
+    """,
+    'task': """
+        SELECT id, user_id, status, priority, created_at, updated_at
+        FROM tasks
+        WHERE created_at >= %(window_start)s AND user_id IS NOT NULL
+    """,
+    'mood': """
+        SELECT id, user_id, mood, created_at
+        FROM mood_logs
+        WHERE created_at >= %(window_start)s AND user_id IS NOT NULL
+    """,
+    'gamification': """
+        SELECT ug.user_id, ug.streak, ug.level
+        FROM user_gamification ug
+        JOIN users u ON ug.user_id = u.id
+    """,
+}
+
+EVENT_TYPES = ('session', 'task', 'task_deleted', 'mood', 'mood_deleted', 'gamification')
+
+class DayBucket:
+    """One user's running totals for one calendar day"""
+    
+    __slots__ = ('sessions', 'duration_sum', 'work_count', 'work_sum', 'break_count', 'break_sum',
+                 'tasks', 'completed', 'pending', 'high', 'completion_sum', 'completion_count', 'session_ids')
+    
+    def __init__(self):
+        self.sessions = self.duration_sum = 0
+        self.work_count = self.work_sum = 0
+        self.break_count = self.break_sum = 0
+        self.tasks = self.completed = self.pending = self.high = 0
+        self.completion_sum = 0
+        self.completion_count = 0
+        # Makes session events idempotent (the backend may retry)
+        self.session_ids = set()
+
+class UserAggregates:
+    """Per-day buckets plus the state needed to apply updates and deletes as deltas"""
+    
+    __slots__ = ('buckets', 'tasks', 'moods', 'latest_mood', 'gamification')
+    
+    def __init__(self):
+        self.buckets: Dict[date, DayBucket] = {}
+        # task id -> (created day, status, priority, completion minutes or None)
+        self.tasks: Dict[int, Tuple] = {}
+        # mood id -> (created_at, mood), and the newest of them
+        self.moods: Dict[int, Tuple] = {}
+        self.latest_mood: Optional[Tuple] = None
+        self.gamification: Optional[Tuple] = None
+    
+    def bucket(self, day: date) -> DayBucket:
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = DayBucket()
+        return bucket
+    
+    def add_session(self, session_id: Optional[int], session_type: str, duration: int, completed_at: datetime):
+        bucket = self.bucket(completed_at.date())
+        if session_id is not None:
+            if session_id in bucket.session_ids:
+                return
+            bucket.session_ids.add(session_id)
+        bucket.sessions += 1
+        bucket.duration_sum += duration
+        if session_type == 'work':
+            bucket.work_count += 1
+            bucket.work_sum += duration
+        elif session_type == 'shortBreak':
+            bucket.break_count += 1
+            bucket.break_sum += duration
+    
+    def _count_task(self, state: Tuple, sign: int):
+        day, status, priority, completion_minutes = state
+        bucket = self.bucket(day)
+        bucket.tasks += sign
+        if status == 'completed':
+            bucket.completed += sign
+            if completion_minutes is not None:
+                bucket.completion_sum += sign * completion_minutes
+                bucket.completion_count += sign
+        elif status == 'pending':
+            bucket.pending += sign
+        if priority == 'high':
+            bucket.high += sign
+    
+    def upsert_task(self, task_id: int, status: str, priority: str, created_at: datetime,
+                    updated_at: Optional[datetime]):
+        completion_minutes = None
+        if status == 'completed' and updated_at is not None:
+            completion_minutes = (updated_at - created_at).total_seconds() / 60
+        state = (created_at.date(), status, priority, completion_minutes)
+        old = self.tasks.get(task_id)
+        if old == state:
+            return
+        if old is not None:
+            self._count_task(old, -1)
+        self._count_task(state, 1)
+        self.tasks[task_id] = state
+    
+    def delete_task(self, task_id: int):
+        old = self.tasks.pop(task_id, None)
+        if old is not None:
+            self._count_task(old, -1)
+    
+    def upsert_mood(self, mood_id: int, mood: str, created_at: datetime):
+        self.moods[mood_id] = (created_at, mood)
+        if self.latest_mood is None or (created_at, mood_id) >= (self.latest_mood[0], self.latest_mood[2]):
+            self.latest_mood = (created_at, mood, mood_id)
+        elif self.latest_mood[2] == mood_id:
+            self._recompute_latest_mood()
+    
+    def delete_mood(self, mood_id: int):
+        if self.moods.pop(mood_id, None) is not None and self.latest_mood is not None and self.latest_mood[2] == mood_id:
+            self._recompute_latest_mood()
+    
+    def _recompute_latest_mood(self):
+        if not self.moods:
+            self.latest_mood = None
+            return
+        mood_id, (created_at, mood) = max(self.moods.items(), key=lambda item: (item[1][0], item[0]))
+        self.latest_mood = (created_at, mood, mood_id)
+    
+    def prune(self, first_day: date):
+        """Drop buckets, tasks and moods that fell out of the window"""
+        for day in [day for day in self.buckets if day < first_day]:
+            del self.buckets[day]
+        for task_id in [task_id for task_id, state in self.tasks.items() if state[0] < first_day]:
+            del self.tasks[task_id]
+        stale_moods = [mood_id for mood_id, (created_at, _) in self.moods.items() if created_at.date() < first_day]
+        for mood_id in stale_moods:
+            del self.moods[mood_id]
+        if stale_moods and self.latest_mood is not None and self.latest_mood[0].date() < first_day:
+            self._recompute_latest_mood()
+
+class OnlineFeatureStore:
+    """
+    Running per-user aggregates (session and task totals per day, latest
+    mood, gamification) updated in O(1) by activity events posted to
+    /ml/events, so inference features are read without touching history.
+    
+    The window is the last ONLINE_FEATURES_DAYS calendar days including
+    today (the SQL paths use a rolling NOW() - interval, so the oldest
+    partial day can differ). A background job rebuilds everything from
+    PostgreSQL every ONLINE_FEATURES_RECONCILE_SECONDS to correct drift from
+    lost or out-of-order events; events arriving during a rebuild are
+    replayed onto its result.
+    """
+    
+    def __init__(self, days: int = None, reconcile_interval: float = None):
+        self.days = days or settings.ONLINE_FEATURES_DAYS
+        self.reconcile_interval = reconcile_interval or settings.ONLINE_FEATURES_RECONCILE_SECONDS
+        self._users: Dict[int, UserAggregates] = {}
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        # Events received while a reconciliation is reading, replayed onto its result
+        self._replay: Optional[List[Dict]] = None
+        self._reconciled_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.events = 0
+        self.rejected_events = 0
+        self.reconciliations = 0
+        self.last_reconcile_seconds = 0.0
+    
+    @property
+    def ready(self) -> bool:
+        """Rebuilt from the database at least once, and recently"""
+        return self._reconciled_at > 0 and time.monotonic() - self._reconciled_at < 3 * self.reconcile_interval
+    
+    def _first_day(self, today: date = None) -> date:
+        return (today or date.today()) - timedelta(days=self.days - 1)
+    
+    @staticmethod
+    def _apply(users: Dict[int, UserAggregates], event: Dict, first_day: date):
+        kind = event['type']
+        user_id = int(event['user_id'])
+        user = users.get(user_id)
+        if user is None:
+            user = users[user_id] = UserAggregates()
+        
+        if kind == 'session':
+            if event['completed_at'].date() >= first_day:
+                user.add_session(event.get('id'), event['session_type'], int(event['duration']), event['completed_at'])
+        elif kind == 'task':
+            if event['created_at'].date() >= first_day:
+                user.upsert_task(int(event['id']), event.get('status'), event.get('priority'),
+                                 event['created_at'], event.get('updated_at'))
+        elif kind == 'task_deleted':
+            user.delete_task(int(event['id']))
+        elif kind == 'mood':
+            if event['created_at'].date() >= first_day:
+                user.upsert_mood(int(event['id']), event['mood'], event['created_at'])
+            else:
+                user.delete_mood(int(event['id']))
+        elif kind == 'mood_deleted':
+            user.delete_mood(int(event['id']))
+        elif kind == 'gamification':
+            user.gamification = (event.get('streak') or 0, event.get('level') or 1)
+    
+    def apply_event(self, event: Dict) -> bool:
+        """
+        Fold one activity event into the aggregates. Returns False for a
+        malformed event (see EVENT_TYPES for the kinds and their fields).
+        """
+        if event.get('type') not in EVENT_TYPES or event.get('user_id') is None:
+            self.rejected_events += 1
+            return False
+        with self._lock:
+            try:
+                self._apply(self._users, event, self._first_day())
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                self.rejected_events += 1
+                logger.warning(f"Rejected {event.get('type')} event for user {event.get('user_id')}: {e}")
+                return False
+            if self._replay is not None:
+                self._replay.append(event)
+            self.events += 1
+        return True
+    
+    def get_user_features(self, user_id: int, now: datetime = None) -> UserFeatures:
+        """Inference features from the running aggregates"""
+        now = now or datetime.now()
+        today = now.date()
+        first_day = self._first_day(today)
+        totals = {
+            'sessions': 0, 'duration_sum': 0, 'work_count': 0, 'work_sum': 0, 'break_count': 0, 'break_sum': 0,
+            'sessions_today': 0, 'focus_by_day': [0, 0, 0],
+            'tasks': 0, 'completed': 0, 'pending': 0, 'high': 0, 'completion_sum': 0, 'completion_count': 0,
+        }
+        recent_mood = None
+        gamification = None
+        
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is not None:
+                for day, bucket in user.buckets.items():
+                    if day < first_day or day > today:
+                        continue
+                    for name in ('sessions', 'duration_sum', 'work_count', 'work_sum', 'break_count', 'break_sum',
+                                 'tasks', 'completed', 'pending', 'high', 'completion_sum', 'completion_count'):
+                        totals[name] += getattr(bucket, name)
+                    offset = (today - day).days - 1
+                    if 0 <= offset < 3:
+                        totals['focus_by_day'][offset] = bucket.work_sum
+                totals['sessions_today'] = user.buckets[today].sessions if today in user.buckets else 0
+                if user.latest_mood is not None and user.latest_mood[0].date() >= first_day:
+                    recent_mood = user.latest_mood[1]
+                gamification = user.gamification
+        
+        return features_from_totals(user_id, totals, recent_mood, gamification, now)
+    
+    def reconcile(self):
+        """Rebuild every user's aggregates from PostgreSQL and swap them in"""
+        with self._reconcile_lock:
+            started = time.monotonic()
+            first_day = self._first_day()
+            params = {'window_start': datetime.combine(first_day, datetime.min.time())}
+            with self._lock:
+                self._replay = []
+            
+            users: Dict[int, UserAggregates] = {}
+            try:
+                # Not a lagging replica: it could drop events already applied
+                with get_inference_pool().connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute(RECONCILE_QUERIES['session'], params)
+                        for session_id, user_id, session_type, duration, completed_at in cur.fetchall():
+                            self._apply(users, {'type': 'session', 'user_id': user_id, 'id': session_id,
+                                                'session_type': session_type, 'duration': duration,
+                                                'completed_at': completed_at}, first_day)
+                        cur.execute(RECONCILE_QUERIES['task'], params)
+                        for task_id, user_id, status, priority, created_at, updated_at in cur.fetchall():
+                            self._apply(users, {'type': 'task', 'user_id': user_id, 'id': task_id, 'status': status,
+                                                'priority': priority, 'created_at': created_at,
+                                                'updated_at': updated_at}, first_day)
+                        cur.execute(RECONCILE_QUERIES['mood'], params)
+                        for mood_id, user_id, mood, created_at in cur.fetchall():
+                            self._apply(users, {'type': 'mood', 'user_id': user_id, 'id': mood_id, 'mood': mood,
+                                                'created_at': created_at}, first_day)
+                        cur.execute(RECONCILE_QUERIES['gamification'])
+                        for user_id, streak, level in cur.fetchall():
+                            self._apply(users, {'type': 'gamification', 'user_id': user_id, 'streak': streak,
+                                                'level': level}, first_day)
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            
+            with self._lock:
+                for event in self._replay:
+                    self._apply(users, event, first_day)
+                self._replay = None
+                self._users = users
+                self._reconciled_at = time.monotonic()
+            self.reconciliations += 1
+            self.last_reconcile_seconds = self._reconciled_at - started
+            logger.info(f"✅ Online features reconciled for {len(users)} users in {self.last_reconcile_seconds:.2f}s")
+    
+    def prune(self):
+        """Drop data that fell out of the window (run between reconciliations)"""
+        first_day = self._first_day()
+        with self._lock:
+            for user in self._users.values():
+                user.prune(first_day)
+    
+    def stats(self) -> Dict:
+        """Users tracked, events applied and reconciliation timing"""
+        return {
+            'ready': self.ready,
+            'users': len(self._users),
+            'events': self.events,
+            'rejected_events': self.rejected_events,
+            'reconciliations': self.reconciliations,
+            'last_reconcile_seconds': round(self.last_reconcile_seconds, 3),
+        }
+    
+    def start(self):
+        """Reconcile now and then periodically in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="online-features-reconcile", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the reconciliation thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.warning(f"Online feature reconciliation failed: {e}")
+            # Buckets age out at midnight; prune hourly between rebuilds
+            deadline = time.monotonic() + self.reconcile_interval
+            while not self._stop.wait(min(3600, max(0.0, deadline - time.monotonic()))):
+                if time.monotonic() >= deadline:
+                    break
+                self.prune()
+
+# Process-wide store shared by DataLoader, AsyncDataLoader and /ml/events
+_online_store: Optional[OnlineFeatureStore] = None
+_online_store_lock = threading.Lock()
+
+def get_online_feature_store() -> Optional[OnlineFeatureStore]:
+    """Return the shared online feature store, or None when it is disabled"""
+    global _online_store
+    if not settings.ONLINE_FEATURES_ENABLED:
+        return None
+    if _online_store is None:
+        with _online_store_lock:
+            if _online_store is None:
+                _online_store = OnlineFeatureStore()
+    return _online_store
+
+def online_user_features(user_id: int, days: int = 7) -> Optional[UserFeatures]:
+    """Features from the online store when it is enabled, ready and covers `days`"""
+    store = get_online_feature_store()
+    if store is None or not store.ready or days != store.days:
+        return None
+    return store.get_user_features(user_id)
+
+def start_online_feature_store():
+    """Start the reconciliation job (e.g. on app startup)"""
+    store = get_online_feature_store()
+    if store is not None:
+        store.start()
+        logger.info(f"✅ Online feature store enabled (last {store.days} days, reconcile every {store.reconcile_interval}s)")
+
+def stop_online_feature_store():
+    """Stop the reconciliation job (e.g. on app shutdown)"""
+    if _online_store is not None:
+        _online_store.stop()
@@ -0,0 +1,166 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence
+
+from loguru import logger
+from config.config import settings
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+# Explain a given slow query at most this often
+EXPLAIN_INTERVAL_SECONDS = 60
+
+def estimate_bytes(rows: Sequence, sample: int = 50) -> int:
+    """Approximate in-memory size of fetched rows, from a sample of them"""
+    if not rows:
+        return 0
+    head = rows[:sample]
+    sampled = sum(
+        sys.getsizeof(value)
+        for row in head
+        for value in (row.values() if isinstance(row, dict) else row)
+    )
+    return int(sampled * len(rows) / len(head))
+
+class QueryRecord:
+    """Mutable result of one timed query; the caller fills in rows and bytes"""
+    
+    __slots__ = ('rows', 'bytes')
+    
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+class _QueryMetric:
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms', 'rows', 'bytes', 'buckets')
+    
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound (bucket edge) of the q-th latency percentile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS + [self.max_ms], self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+class QueryStats:
+    """
+    Per-query-name latency histograms, row counts and bytes fetched.
+    
+    Queries slower than SLOW_QUERY_MS are logged with their parameters and,
+    when SLOW_QUERY_EXPLAIN is on, their EXPLAIN (ANALYZE, BUFFERS) plan,
+    captured on a background thread so the slow request isn't slowed further.
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, _QueryMetric] = {}
+        self._lock = threading.Lock()
+        self._explained_at: Dict[str, float] = {}
+        self._explain_executor: Optional[ThreadPoolExecutor] = None
+    
+    def record(self, name: str, elapsed_ms: float, rows: int = 0, nbytes: int = 0, error: bool = False,
+               query: Optional[str] = None, params: Optional[Dict] = None):
+        """Add one execution to the stats and log it if it was slow"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _QueryMetric()
+            metric.count += 1
+            metric.errors += int(error)
+            metric.total_ms += elapsed_ms
+            metric.max_ms = max(metric.max_ms, elapsed_ms)
+            metric.rows += rows
+            metric.bytes += nbytes
+            metric.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        
+        if settings.SLOW_QUERY_MS > 0 and elapsed_ms >= settings.SLOW_QUERY_MS:
+            logger.warning(f"🐢 Slow query {name}: {elapsed_ms:.0f}ms, {rows} rows, params={params}")
+            if settings.SLOW_QUERY_EXPLAIN and query is not None:
+                self._explain_later(name, query, params)
+    
+    @contextmanager
+    def timed(self, name: str, query: Optional[str] = None, params: Optional[Dict] = None):
+        """Time the block as one execution of query `name`; set rows/bytes on the yielded record"""
+        record = QueryRecord()
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception:
+            self.record(name, (time.perf_counter() - started) * 1000, record.rows, record.bytes,
+                        error=True, query=query, params=params)
+            raise
+        self.record(name, (time.perf_counter() - started) * 1000, record.rows, record.bytes,
+                    query=query, params=params)
+    
+    def _explain_later(self, name: str, query: str, params: Optional[Dict]):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(name, float('-inf')) < EXPLAIN_INTERVAL_SECONDS:
+                return
+            self._explained_at[name] = now
+            if self._explain_executor is None:
+                self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._explain_executor.submit(self._explain, name, query, params)
+    
+    @staticmethod
+    def _explain(name: str, query: str, params: Optional[Dict]):
+        # Imported here: db_pool is only needed once a slow query is explained
+        from utils.db_pool import get_read_pool
+        try:
+            with get_read_pool().connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params or None)
+                    plan = "\n".join(row[0] for row in cur.fetchall())
+            logger.warning(f"🐢 Plan for slow query {name}:\n{plan}")
+        except Exception as e:
+            logger.warning(f"Could not EXPLAIN slow query {name}: {e}")
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """Aggregates per query name, e.g. for a dashboard"""
+        with self._lock:
+            return {
+                name: {
+                    'count': m.count,
+                    'errors': m.errors,
+                    'total_ms': round(m.total_ms, 3),
+                    'mean_ms': round(m.total_ms / m.count, 3) if m.count else None,
+                    'max_ms': round(m.max_ms, 3),
+                    'p50_ms': m.percentile(0.5),
+                    'p95_ms': m.percentile(0.95),
+                    'p99_ms': m.percentile(0.99),
+                    'rows': m.rows,
+                    'bytes': m.bytes,
+                    'histogram': {
+                        **{f"le_{bound}ms": n for bound, n in zip(LATENCY_BUCKETS_MS, m.buckets)},
+                        'le_inf': m.buckets[-1],
+                    },
+                }
+                for name, m in self._metrics.items()
+            }
+    
+    def reset(self):
+        """Clear all aggregates"""
+        with self._lock:
+            self._metrics.clear()
+
+# Process-wide stats shared by every DataLoader
+query_stats = QueryStats()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+ML-side schema bootstrap
+
+Installs the database objects the ML service owns on top of the backend
+schema. Safe to run repeatedly:
+
+    python utils/schema_bootstrap.py [--user-id 1] [--days 7]
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from utils.db_pool import get_pool
+from utils.data_loaders import DataLoader, DAILY_FOCUS_QUERY, USER_FEATURES_QUERY
+
+# Per-user, per-day work time rollup read by DataLoader instead of
+# re-aggregating timer_sessions on every recommendation
+DAILY_FOCUS_ROLLUP_SQL = """
+    CREATE TABLE IF NOT EXISTS user_daily_focus (
+        user_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        total_duration BIGINT NOT NULL DEFAULT 0,
+        session_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, date)
+    );
+    
+    CREATE OR REPLACE FUNCTION ml_rollup_daily_focus() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.session_type = 'work'
+                AND OLD.user_id IS NOT NULL AND OLD.completed_at IS NOT NULL THEN
+            UPDATE user_daily_focus
+            SET total_duration = total_duration - OLD.duration,
+                session_count = session_count - 1
+            WHERE user_id = OLD.user_id AND date = DATE(OLD.completed_at);
+        END IF;
+        
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.session_type = 'work'
+                AND NEW.user_id IS NOT NULL AND NEW.completed_at IS NOT NULL THEN
+            INSERT INTO user_daily_focus (user_id, date, total_duration, session_count)
+            VALUES (NEW.user_id, DATE(NEW.completed_at), NEW.duration, 1)
+            ON CONFLICT (user_id, date) DO UPDATE
+            SET total_duration = user_daily_focus.total_duration + EXCLUDED.total_duration,
+                session_count = user_daily_focus.session_count + 1;
+        END IF;
+        
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    
+    DROP TRIGGER IF EXISTS trg_ml_rollup_daily_focus ON timer_sessions;
+    CREATE TRIGGER trg_ml_rollup_daily_focus
+        AFTER INSERT OR UPDATE OR DELETE ON timer_sessions
+        FOR EACH ROW EXECUTE FUNCTION ml_rollup_daily_focus();
+"""
+
+# Rebuild the rollup from raw sessions; runs in the same transaction as the
+# trigger install with writers blocked, so no session is counted twice or missed
+DAILY_FOCUS_BACKFILL_SQL = """
+    LOCK TABLE timer_sessions IN SHARE MODE;
+    DELETE FROM user_daily_focus;
+    INSERT INTO user_daily_focus (user_id, date, total_duration, session_count)
+    SELECT user_id, DATE(completed_at), SUM(duration), COUNT(*)
+    FROM timer_sessions
+    WHERE session_type = 'work'
+        AND user_id IS NOT NULL
+        AND completed_at IS NOT NULL
+    GROUP BY user_id, DATE(completed_at);
+"""
+
+# Publish the user id of every activity change so the ML service can drop
+# that user's cached features (see utils/feature_cache.py)
+ACTIVITY_NOTIFY_SQL = """
+    CREATE OR REPLACE FUNCTION ml_notify_user_activity() RETURNS trigger AS $$
+    DECLARE
+        changed_user INTEGER;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            changed_user := OLD.user_id;
+        ELSE
+            changed_user := NEW.user_id;
+        END IF;
+        
+        IF changed_user IS NOT NULL THEN
+            PERFORM pg_notify('ml_user_activity', changed_user::text);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+ACTIVITY_TABLES = ['timer_sessions', 'tasks', 'mood_logs', 'user_gamification']
+
+# Composite indexes for the ML access paths: every per-user query filters on
+# user_id plus a time range and sorts by time. The backend migration only has
+# single-column indexes. INCLUDE columns let the feature query run index-only.
+ML_INDEXES: List[Tuple[str, str, str]] = [
+    (
+        'idx_ml_timer_sessions_user_completed',
+        'timer_sessions',
+        "(user_id, completed_at DESC) INCLUDE (session_type, duration)",
+    ),
+    (
+        'idx_ml_tasks_user_created',
+        'tasks',
+        "(user_id, created_at DESC) INCLUDE (status, priority, updated_at)",
+    ),
+    (
+        'idx_ml_mood_logs_user_created',
+        'mood_logs',
+        "(user_id, created_at DESC) INCLUDE (mood)",
+    ),
+]
+
+EXISTING_INDEXES_SQL = """
+    SELECT
+        indexname,
+        (SELECT indisvalid FROM pg_index
+         WHERE indexrelid = (quote_ident(schemaname) || '.' || quote_ident(indexname))::regclass) AS is_valid
+    FROM pg_indexes
+    WHERE schemaname = current_schema()
+        AND indexname = ANY(%(names)s)
+"""
+
+def install_daily_focus_rollup():
+    """Create the user_daily_focus rollup, its maintenance trigger, and backfill it"""
+    pool = get_pool()
+    with pool.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(DAILY_FOCUS_ROLLUP_SQL)
+                cur.execute(DAILY_FOCUS_BACKFILL_SQL)
+                cur.execute("SELECT COUNT(*) FROM user_daily_focus")
+                rows = cur.fetchone()[0]
+            conn.commit()
+            logger.info(f"✅ user_daily_focus rollup installed ({rows} user-days)")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"❌ Failed to install user_daily_focus rollup: {e}")
+            raise
+
+def install_activity_notify():
+    """Install the NOTIFY triggers that invalidate cached user features"""
+    pool = get_pool()
+    with pool.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(ACTIVITY_NOTIFY_SQL)
+                for table in ACTIVITY_TABLES:
+                    cur.execute(f"DROP TRIGGER IF EXISTS trg_ml_notify_{table} ON {table}")
+                    cur.execute(f"""
+                        CREATE TRIGGER trg_ml_notify_{table}
+                            AFTER INSERT OR UPDATE OR DELETE ON {table}
+                            FOR EACH ROW EXECUTE FUNCTION ml_notify_user_activity()
+                    """)
+            conn.commit()
+            logger.info(f"✅ Activity NOTIFY triggers installed on {', '.join(ACTIVITY_TABLES)}")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"❌ Failed to install activity NOTIFY triggers: {e}")
+            raise
+
+def _existing_indexes(cur) -> Dict[str, bool]:
+    """Return {index name: is valid} for the ML indexes already in pg_indexes"""
+    cur.execute(EXISTING_INDEXES_SQL, {'names': [name for name, _, _ in ML_INDEXES]})
+    return {name: bool(valid) for name, valid in cur.fetchall()}
+
+def _explain_queries(user_id: int, days: int) -> Dict[str, Tuple[str, Dict]]:
+    """The per-user DataLoader queries covered by ML_INDEXES"""
+    return {
+        'sessions': DataLoader._sessions_query(user_id, days),
+        'tasks': DataLoader._tasks_query(user_id, days),
+        'moods': DataLoader._moods_query(user_id, days),
+        'daily_focus': (DAILY_FOCUS_QUERY, {'user_id': user_id, 'days': days, 'limit': days}),
+        'user_features': (USER_FEATURES_QUERY, DataLoader._feature_params(user_id, days, date.today())),
+    }
+
+def _plan_summary(plan: Dict) -> Tuple[float, List[str]]:
+    """Total cost and the scan nodes (with index names) of an EXPLAIN JSON plan"""
+    scans = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        node_type = node['Node Type']
+        if 'Scan' in node_type and 'Relation Name' in node:
+            label = f"{node_type} on {node['Relation Name']}"
+            if 'Index Name' in node:
+                label += f" using {node['Index Name']}"
+            scans.append(label)
+        stack.extend(reversed(node.get('Plans', [])))
+    return plan['Total Cost'], scans
+
+def explain_report(user_id: int, days: int) -> Dict[str, Tuple[float, List[str]]]:
+    """EXPLAIN each covered query and summarize its plan"""
+    report = {}
+    pool = get_pool()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            for label, (query, params) in _explain_queries(user_id, days).items():
+                cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                report[label] = _plan_summary(cur.fetchone()[0][0]['Plan'])
+    return report
+
+def print_explain_report(before: Dict, after: Dict):
+    """Print before/after plan cost and scans per query"""
+    print(f"\n{'query':<16}{'cost before':>14}{'cost after':>14}")
+    for label, (cost_after, scans_after) in after.items():
+        cost_before, scans_before = before.get(label, (float('nan'), []))
+        print(f"{label:<16}{cost_before:>14.2f}{cost_after:>14.2f}")
+        for scan in scans_before:
+            print(f"    before: {scan}")
+        for scan in scans_after:
+            print(f"    after:  {scan}")
+
+def install_ml_indexes() -> List[str]:
+    """
+    Create any missing (or invalid) ML index
+    
+    Uses CREATE INDEX CONCURRENTLY so the backend keeps writing sessions,
+    tasks and moods while the indexes build. Returns the names created.
+    """
+    created = []
+    pool = get_pool()
+    with pool.connection() as conn:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                existing = _existing_indexes(cur)
+                
+                for name, table, definition in ML_INDEXES:
+                    if existing.get(name):
+                        logger.info(f"Index {name} already present")
+                        continue
+                    if name in existing:
+                        # Left behind by an interrupted concurrent build
+                        logger.warning(f"Rebuilding invalid index {name}")
+                        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                    
+                    cur.execute(f"CREATE INDEX CONCURRENTLY {name} ON {table} {definition}")
+                    created.append(name)
+                    logger.info(f"✅ Created index {name} on {table}")
+                
+                if created:
+                    cur.execute("ANALYZE timer_sessions, tasks, mood_logs")
+        except Exception as e:
+            logger.error(f"❌ Failed to install ML indexes: {e}")
+            raise
+        finally:
+            conn.autocommit = False
+    return created
+
+def _sample_user_id() -> Optional[int]:
+    """Most active user, used when no --user-id is given for the EXPLAIN report"""
+    pool = get_pool()
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id FROM timer_sessions
+                WHERE user_id IS NOT NULL
+                GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1
+            """)
+            row = cur.fetchone()
+    return row[0] if row else None
+
+def bootstrap(user_id: Optional[int] = None, days: int = 7):
+    """Install every ML-owned schema object and report the effect of the indexes"""
+    install_daily_focus_rollup()
+    install_activity_notify()
+    
+    if user_id is None:
+        user_id = _sample_user_id() or 1
+    
+    before = explain_report(user_id, days)
+    install_ml_indexes()
+    after = explain_report(user_id, days)
+    print_explain_report(before, after)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Install ML-side database objects")
+    parser.add_argument('--user-id', type=int, default=None, help='User to EXPLAIN queries for (default: most active)')
+    parser.add_argument('--days', type=int, default=7, help='Day window for the EXPLAIN queries')
+    args = parser.parse_args()
+    bootstrap(args.user_id, args.days)
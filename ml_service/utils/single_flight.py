@@ -0,0 +1,117 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from operator import methodcaller
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+class _FlightStats:
+    __slots__ = ('calls', 'executions', 'coalesced', 'errors')
+    
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+    
+    def snapshot(self, in_flight: int) -> Dict:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'in_flight': in_flight,
+        }
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key across threads: the first
+    caller runs the function, callers arriving while it is running wait for
+    and share its result (or exception). Nothing is kept once it finishes.
+    
+    `share` is applied to the result handed to waiting callers, e.g. a copy
+    so each gets its own instance of a mutable result.
+    """
+    
+    def __init__(self, share: Optional[Callable] = None):
+        self._share = share
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self._stats = _FlightStats()
+    
+    def do(self, key: Hashable, fn: Callable, *args):
+        with self._lock:
+            self._stats.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self._stats.executions += 1
+            else:
+                self._stats.coalesced += 1
+        
+        if not leader:
+            result = flight.result()
+            return self._share(result) if self._share is not None else result
+        
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            with self._lock:
+                self._stats.errors += 1
+                del self._flights[key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            del self._flights[key]
+        flight.set_result(result)
+        return result
+    
+    def stats(self) -> Dict:
+        """Calls, actual executions and calls that shared another's execution"""
+        with self._lock:
+            return self._stats.snapshot(len(self._flights))
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop. The shared computation
+    runs as its own task, so a caller being cancelled (e.g. a client
+    disconnecting) doesn't cancel it for the others.
+    """
+    
+    def __init__(self, share: Optional[Callable] = None):
+        self._share = share
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._stats = _FlightStats()
+    
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args):
+        self._stats.calls += 1
+        task = self._flights.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn(*args))
+            self._flights[key] = task
+            self._stats.executions += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            return await asyncio.shield(task)
+        
+        self._stats.coalesced += 1
+        result = await asyncio.shield(task)
+        return self._share(result) if self._share is not None else result
+    
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._stats.errors += 1
+    
+    def stats(self) -> Dict:
+        """Calls, actual executions and calls that shared another's execution"""
+        return self._stats.snapshot(len(self._flights))
+
+# Process-wide groups for per-user feature fetches; waiting callers get their
+# own copy of the UserFeatures record
+feature_flights = SingleFlight(share=methodcaller('copy'))
+async_feature_flights = AsyncSingleFlight(share=methodcaller('copy'))
@@ -0,0 +1,151 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, Optional
+
+# Field name -> type every producer's value is converted to (NumPy scalars
+# from pandas aggregations become plain int/float). Order is iteration order.
+FIELD_TYPES = {
+    'user_id': int,
+    'total_sessions': int,
+    'avg_session_duration': float,
+    'completion_rate': float,
+    'current_streak': int,
+    'level': int,
+    'recent_mood': str,
+    'hour_of_day': int,
+    'day_of_week': int,
+    'is_weekend': int,
+    'pending_tasks': int,
+    'high_priority_tasks': int,
+    'avg_task_completion_time': float,
+    'avg_focus_duration': float,
+    'avg_break_duration': float,
+    'sessions_today': int,
+    'focus_time_yesterday': float,
+    'focus_time_day_before': float,
+    'focus_time_three_days_ago': float,
+    'daily_trend': float,
+    'avg_focus_last_3_days': float,
+}
+
+FIELDS = tuple(FIELD_TYPES)
+
+class UserFeatures(MutableMapping):
+    """
+    A user's inference features as a fixed-layout record
+    
+    Each field is a slot holding a typed value, so a record is a fraction of
+    the size of the equivalent dict and copying one is a single allocation.
+    It reads like the dict the loaders used to return (get, [], in, dict()),
+    so the feature engineer, predictors and coach use it unchanged. A field
+    that was never set reads as missing, like an absent key. Other keys
+    (e.g. stale markers) go to a small overflow dict that is only allocated
+    when used. Request context is not merged into a record (see
+    with_context), since it need not fit the field types.
+    """
+    
+    __slots__ = FIELDS + ('_extra',)
+    
+    def __init__(self, data: Optional[Dict] = None, **fields):
+        self._extra = None
+        for source in (data, fields):
+            if not source:
+                continue
+            for key, value in source.items():
+                field_type = FIELD_TYPES.get(key)
+                if field_type is None:
+                    self[key] = value
+                else:
+                    setattr(self, key, field_type(value) if value is not None else None)
+    
+    def __getitem__(self, key):
+        if key in FIELD_TYPES:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+    
+    def get(self, key, default=None):
+        if key in FIELD_TYPES:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra is not None else default
+    
+    def __setitem__(self, key, value):
+        field_type = FIELD_TYPES.get(key)
+        if field_type is not None:
+            setattr(self, key, field_type(value) if value is not None else None)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+    
+    def __delitem__(self, key):
+        if key in FIELD_TYPES:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+    
+    def __contains__(self, key) -> bool:
+        if key in FIELD_TYPES:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+    
+    def __iter__(self):
+        for name in FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return f"UserFeatures({self.to_dict()!r})"
+    
+    def copy(self) -> 'UserFeatures':
+        """A shallow copy (one allocation, plus the overflow dict if any)"""
+        copied = UserFeatures.__new__(UserFeatures)
+        for name in FIELDS:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                setattr(copied, name, value)
+        copied._extra = dict(self._extra) if self._extra is not None else None
+        return copied
+    
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+_MISSING = object()
+
+def with_context(features, context: Optional[Dict] = None) -> Dict:
+    """
+    A plain dict of the features with request context laid over them.
+    Context values are kept as given (e.g. level "beginner"), not converted
+    to the field types, just as when features were a dict.
+    """
+    merged = dict(features)
+    if context:
+        merged.update(context)
+    return merged
+
+def feature_columns(rows: Iterable[UserFeatures]) -> Dict[str, List]:
+    """
+    Per-field value lists over many records, the column input
+    FeatureEngineer's batch featurizers take. Unset fields are None (and
+    take the featurizers' defaults); fields no record has are left out.
+    """
+    rows = list(rows)
+    columns = {}
+    for name in FIELDS:
+        values = [row.get(name) for row in rows]
+        if any(value is not None for value in values):
+            columns[name] = values
+    return columns